@@ -151,6 +151,20 @@ def main(
     ):
         return 1
 
+    # Refresh the local price store (liquidity, stability and risk read it); not fatal
+    if not run_command(
+        [
+            python_exe,
+            str(base_dir / "main.py"),
+            "data",
+            "prices",
+            "--tickers-file",
+            str(merged_candidates_file),
+        ],
+        "Update Price Store",
+    ):
+        print("[WARN] Price store update failed; scoring will flag stale or missing price history")
+
     if not run_command(
         [python_exe, str(base_dir / "main.py"), "score", "score"],
         "Score Candidates",
@@ -158,6 +172,13 @@ def main(
         return 1
 
     # Build portfolio into biweekly runs directory
+    notional_val = notional
+    notional_env = os.getenv("BIWEEKLY_NOTIONAL")
+    if notional_env:
+        try:
+            notional_val = float(notional_env)
+        except ValueError:
+            pass
     if not run_command(
         [
             python_exe,
@@ -166,6 +187,8 @@ def main(
             "build",
             "--runs-base-dir",
             str(BIWEEKLY_RUNS_DIR),
+            "--notional",
+            str(notional_val),
         ],
         "Build Portfolio (biweekly)",
     ):
@@ -210,13 +233,6 @@ def main(
     print("GENERATING TRADES CSV")
     print("="*80)
     csv_path = latest_run / "trades.csv"
-    notional_val = notional
-    notional_env = os.getenv("BIWEEKLY_NOTIONAL")
-    if notional_env:
-        try:
-            notional_val = float(notional_env)
-        except ValueError:
-            pass
     csv_cmd = [
         python_exe,
         str(base_dir / "main.py"),
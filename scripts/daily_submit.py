@@ -224,6 +224,14 @@ def main(
     ):
         return 1
     
+    # Step 2.5: Refresh the local price store (liquidity, stability and risk read it); not fatal
+    if not run_command(
+        [python_exe, str(base_dir / "main.py"), "data", "prices",
+         "--tickers-file", str(merged_candidates_file)],
+        "Update Price Store"
+    ):
+        print("[WARN] Price store update failed; scoring will flag stale or missing price history")
+    
     # Step 3: Score candidates
     if not run_command(
         [python_exe, str(base_dir / "main.py"), "score", "score"],
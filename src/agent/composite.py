@@ -0,0 +1,173 @@
+"""Composite score weights and a vectorized composite combination.
+
+The composite is a weighted mean of the available factor z-scores and the sentiment
+score, plus a penalty for trading above the consensus price target. Components come from
+stored ScoredStock records, so weights can be changed and re-applied without LLM calls.
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+from pydantic import BaseModel, Field
+
+from .models import ScoredStock
+
+COMPONENTS = ("value", "quality", "growth", "stability", "revisions", "momentum", "sentiment")
+
+# Score assigned to names that fail risk screens (effectively disqualified)
+RISK_FAIL_SCORE = -10.0
+
+
+class CompositeWeights(BaseModel):
+    """Weights for the composite score (normalized by the weights of present components)."""
+    value: float = 0.20
+    quality: float = 0.25
+    growth: float = 0.20
+    stability: float = 0.10
+    revisions: float = 0.10
+    momentum: float = 0.05
+    sentiment: float = 0.15
+    pt_penalty_scale: float = Field(2.0, description="Penalty per unit of negative price-target upside (-5% -> -0.10)")
+    pt_penalty_cap: float = Field(0.20, description="Maximum price-target penalty")
+
+    def vector(self) -> np.ndarray:
+        return np.array([getattr(self, name) for name in COMPONENTS])
+
+
+def load_weights(path: Optional[Path]) -> CompositeWeights:
+    """Weights from a JSON file (missing keys keep their defaults), or the defaults if no path."""
+    if path is None:
+        return CompositeWeights()
+    return CompositeWeights.model_validate(json.loads(Path(path).read_text(encoding="utf-8")))
+
+
+def save_weights(weights: CompositeWeights, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(weights.model_dump_json(indent=2), encoding="utf-8")
+
+
+def component_arrays(candidates: Sequence[ScoredStock]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(components (N, 7) with NaN for missing, price-target upside % (N,), passed risk screens (N,)).
+
+    Sentiment is NaN for names whose sentiment was skipped (their stored 0.0 is a placeholder).
+    """
+    n = len(candidates)
+    components = np.full((n, len(COMPONENTS)), np.nan)
+    upside = np.full(n, np.nan)
+    passed = np.zeros(n, dtype=bool)
+    for i, c in enumerate(candidates):
+        fs = c.factor_scores
+        for j, name in enumerate(COMPONENTS[:-1]):
+            value = getattr(fs, name, None)
+            if value is not None:
+                components[i, j] = value
+        if not c.sentiment_skipped:
+            components[i, -1] = c.sentiment.sentiment_score
+        if c.sentiment.price_target_upside is not None:
+            upside[i] = c.sentiment.price_target_upside
+        passed[i] = c.risk_flags.passed_all_checks
+    return components, upside, passed
+
+
+def composite_matrix(
+    components: np.ndarray,
+    upside: np.ndarray,
+    passed: np.ndarray,
+    weights: np.ndarray,
+    pt_penalty_scale: np.ndarray | float = 2.0,
+    pt_penalty_cap: np.ndarray | float = 0.20,
+) -> np.ndarray:
+    """Composite scores for K weight sets at once.
+
+    Args:
+        components: (N, 7) component scores, NaN where missing
+        upside: (N,) price-target upside %, NaN where unknown
+        passed: (N,) risk-screen results
+        weights: (K, 7) or (7,) weight sets in COMPONENTS order
+        pt_penalty_scale, pt_penalty_cap: scalars or (K,) arrays
+
+    Returns:
+        (K, N) composite scores ((N,) if `weights` is 1-D)
+    """
+    single = weights.ndim == 1
+    w = np.atleast_2d(weights)
+    present = np.isfinite(components)
+    num = np.where(present, components, 0.0) @ w.T            # (N, K)
+    den = present.astype(float) @ w.T                          # (N, K)
+
+    # Negative price-target upside penalty, added before normalization (as it always was)
+    scale = np.broadcast_to(np.asarray(pt_penalty_scale, dtype=float), (w.shape[0],))
+    cap = np.broadcast_to(np.asarray(pt_penalty_cap, dtype=float), (w.shape[0],))
+    neg_upside = np.where(np.isfinite(upside) & (upside < 0), upside / 100.0, 0.0)
+    penalty = np.maximum(-cap[None, :], neg_upside[:, None] * scale[None, :])
+
+    raw = num + penalty
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.where(den > 0, raw / np.where(den > 0, den, 1.0), raw)
+    scores = np.where(passed[:, None], scores, RISK_FAIL_SCORE).T
+    return scores[0] if single else scores
+
+
+def rescore(candidates: Sequence[ScoredStock], weights: CompositeWeights) -> np.ndarray:
+    """Composite scores for stored candidates under one weight set."""
+    components, upside, passed = component_arrays(candidates)
+    return composite_matrix(
+        components, upside, passed, weights.vector(), weights.pt_penalty_scale, weights.pt_penalty_cap
+    )
+
+
+def composite_bounds(
+    factor_components: np.ndarray,
+    upside: np.ndarray,
+    passed: np.ndarray,
+    weights: CompositeWeights,
+    sentiment_range: tuple[float, float] = (-1.0, 1.0),
+) -> tuple[np.ndarray, np.ndarray]:
+    """(lower, upper) composite bounds over every possible sentiment score, before any LLM call.
+
+    `factor_components` is (N, 6) in COMPONENTS order without sentiment. Unknown price-target
+    upside counts as no penalty for the upper bound and the full penalty for the lower bound.
+    """
+    n = len(factor_components)
+    bounds = []
+    for sentiment, unknown_upside in ((sentiment_range[0], -1e9), (sentiment_range[1], np.nan)):
+        components = np.column_stack([factor_components, np.full(n, sentiment)])
+        filled = np.where(np.isfinite(upside), upside, unknown_upside)
+        bounds.append(composite_matrix(
+            components, filled, passed, weights.vector(), weights.pt_penalty_scale, weights.pt_penalty_cap
+        ))
+    return bounds[0], bounds[1]
+
+
+def viable_mask(
+    lower: np.ndarray,
+    upper: np.ndarray,
+    passed: np.ndarray,
+    keep_rank: int,
+    groups: Optional[Sequence[Optional[str]]] = None,
+    group_keep: int = 0,
+) -> np.ndarray:
+    """Names that could still rank in the top `keep_rank` (or their group's top `group_keep`).
+
+    A name is hopeless when at least `keep_rank` other names are guaranteed to outscore it,
+    i.e. its upper bound is below the keep_rank-th largest lower bound.
+    """
+    viable = passed.copy()
+    if passed.sum() <= keep_rank:
+        return viable
+
+    def threshold(mask: np.ndarray, k: int) -> float:
+        values = np.sort(lower[mask])[::-1]
+        return values[k - 1] if len(values) >= k else -np.inf
+
+    reachable = upper >= threshold(passed, keep_rank)
+    if groups is not None and group_keep > 0:
+        labels = np.array([g or "Unknown" for g in groups])
+        for label in np.unique(labels[passed]):
+            members = passed & (labels == label)
+            reachable |= members & (upper >= threshold(members, group_keep))
+    return viable & reachable
@@ -3,10 +3,14 @@ from __future__ import annotations
 import os
 from datetime import date, datetime
 from typing import Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 
 
+def _normalize_backend(value: str) -> str:
+    return value.strip().lower()
+
+
 class AppConfig(BaseModel):
     openai_api_key: str = Field(..., alias="OPENAI_API_KEY")
     openai_model: str = Field("gpt-4o-mini", alias="OPENAI_MODEL")
@@ -29,11 +33,73 @@ class AppConfig(BaseModel):
     beta_min: float = Field(0.5, alias="BETA_MIN")
     beta_max: float = Field(1.5, alias="BETA_MAX")
 
+    # Factor scoring: "zscore" (winsorized cross-sectional z-scores) or "bucket" (legacy ladders)
+    factor_mode: str = Field("zscore", alias="FACTOR_MODE")
+    factor_neutralization: str = Field("none", alias="FACTOR_NEUTRALIZATION", description="none, sector or industry (z-scores within groups)")
+    factor_min_group_size: int = Field(8, alias="FACTOR_MIN_GROUP_SIZE", description="Smaller groups are standardized against the whole universe")
+    stability_lookback_days: int = Field(250, alias="STABILITY_LOOKBACK_DAYS", description="Trading days of history for the stability factor")
+    stability_min_days: int = Field(60, alias="STABILITY_MIN_DAYS", description="Minimum daily returns to use price-history stability")
+
+    # Composite score weights
+    composite_weights_file: Optional[str] = Field(None, alias="COMPOSITE_WEIGHTS_FILE", description="JSON file of composite weights (see composite.CompositeWeights)")
+
+    # Local daily price store
+    price_store_dir: str = Field("data/prices", alias="PRICE_STORE_DIR", description="Local daily price store (see price_store.py)")
+
+    # Risk calendar screens
+    risk_calendar_enabled: bool = Field(True, alias="RISK_CALENDAR", description="Screen earnings, pending M&A and trading halts from the daily risk calendar")
+    earnings_blackout_days: int = Field(2, alias="EARNINGS_BLACKOUT_DAYS", description="Fail names reporting earnings within this many trading days")
+
+    # Covariance risk model (see risk_model.py)
+    risk_model_lookback_days: int = Field(250, alias="RISK_MODEL_LOOKBACK_DAYS", description="Trading days of returns for the covariance risk model")
+    risk_model_min_days: int = Field(120, alias="RISK_MODEL_MIN_DAYS", description="Minimum daily returns for a ticker to enter the risk model")
+
+    # LLM backend: "openai" (default) or "offline" (deterministic synthetic responses, no network)
+    llm_backend: str = Field("openai", alias="LLM_BACKEND")
+    offline_llm_latency_ms: float = Field(0.0, alias="OFFLINE_LLM_LATENCY_MS", description="Mean simulated latency per offline call")
+    offline_llm_seed: int = Field(0, alias="OFFLINE_LLM_SEED")
+
+    # LLM call policy
+    llm_max_retries: int = Field(2, alias="LLM_MAX_RETRIES", description="Retries on transient LLM errors")
+    llm_backoff_base: float = Field(1.0, alias="LLM_BACKOFF_BASE", description="Base seconds for jittered exponential backoff")
+    llm_hedge: bool = Field(False, alias="LLM_HEDGE", description="Send a duplicate request after the p95 latency")
+
+    # LLM HTTP transport (one pooled client per process)
+    llm_concurrency: int = Field(8, alias="LLM_CONCURRENCY", description="Expected concurrent LLM requests; sizes the connection pool")
+    llm_keepalive_seconds: float = Field(60.0, alias="LLM_KEEPALIVE_SECONDS", description="Idle keep-alive before pooled connections are closed")
+    llm_http2: bool = Field(True, alias="LLM_HTTP2", description="Use HTTP/2 when the h2 package is installed")
+    llm_prewarm: bool = Field(False, alias="LLM_PREWARM", description="Open a connection in the background when the client is created")
+
+    # Pre-LLM elimination: only names whose best-case composite can reach this rank get LLM calls
+    prellm_keep_rank: int = Field(60, alias="PRELLM_KEEP_RANK", description="Keep rank for the pre-LLM bound check (0 disables)")
+
+    # Portfolio weights: "milp" (exact integer-percent optimizer, needs scipy) or "legacy" (iterative rebalancer)
+    portfolio_optimizer: str = Field("milp", alias="PORTFOLIO_OPTIMIZER")
+    optimizer_pool_size: int = Field(200, alias="OPTIMIZER_POOL_SIZE", description="Top-scored candidates the optimizer may swap in")
+    portfolio_constructor: str = Field("llm", alias="PORTFOLIO_CONSTRUCTOR", description="llm or score (deterministic, no LLM call)")
+    portfolio_variants: str = Field("", alias="PORTFOLIO_VARIANTS", description="Comma-separated variants to build and select from (empty = single build)")
+    portfolio_variant_selection: str = Field("score_per_risk", alias="PORTFOLIO_VARIANT_SELECTION", description="score_per_risk, score or volatility")
+
+    # Turnover against the previous portfolio (weights as fractions; one-way turnover)
+    turnover_aware: bool = Field(True, alias="TURNOVER_AWARE", description="Use the previous run's portfolio when building")
+    no_trade_band: float = Field(0.01, alias="NO_TRADE_BAND", description="Keep held weights whose target is within this band")
+    turnover_penalty: float = Field(0.25, alias="TURNOVER_PENALTY", description="Optimizer cost per point traded (1 = a point off target)")
+    max_turnover: Optional[float] = Field(None, alias="MAX_TURNOVER", description="Cap on one-way turnover per rebalance")
+
+    # Portfolio prompt compaction
+    portfolio_shortlist_size: int = Field(40, alias="PORTFOLIO_SHORTLIST_SIZE", description="Max candidates shown to the portfolio LLM")
+    portfolio_prompt_token_budget: int = Field(6000, alias="PORTFOLIO_PROMPT_TOKEN_BUDGET", description="Approximate token budget for the portfolio user prompt")
+
     # Backtest mode
     backtest_mode: bool = Field(False, alias="BACKTEST_MODE")
     backtest_date: Optional[date] = Field(None, alias="BACKTEST_DATE", description="Point-in-time date for backtest (YYYY-MM-DD)")
     backtest_model_cutoff: Optional[date] = Field(None, alias="BACKTEST_MODEL_CUTOFF", description="Model training cutoff to simulate (YYYY-MM-DD)")
 
+    @field_validator("llm_backend", mode="before")
+    @classmethod
+    def _lowercase_backend(cls, value):
+        return _normalize_backend(value) if isinstance(value, str) else value
+
     @property
     def remaining_days(self) -> int:
         # In backtest mode, use backtest_date as "today"
@@ -51,6 +117,10 @@ def load_config(dotenv: bool = True) -> AppConfig:
         load_dotenv(override=False)
     env = {k: v for k, v in os.environ.items()}
 
+    # The offline LLM backend never talks to OpenAI, so don't require a key for it
+    if _normalize_backend(env.get("LLM_BACKEND", "")) == "offline" and "OPENAI_API_KEY" not in env:
+        env["OPENAI_API_KEY"] = "offline"
+
     if "PORTFOLIO_HORIZON_END" not in env:
         env["PORTFOLIO_HORIZON_END"] = "2026-05-15"
 
@@ -0,0 +1,213 @@
+"""Vectorized portfolio constraint checks.
+
+A portfolio is a weight vector plus integer sector/industry codes over the same names;
+a (K, N) weight matrix is K candidate weightings of one pool (0 = not held). Every
+constraint is evaluated for all K rows at once with one group-sum matrix product, so
+optimizers and variant builders can screen thousands of weightings per second.
+check_portfolio turns one row into structured Violations.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+# Group sums above the cap but within this much are warnings, not errors (rebalancing slack)
+CAP_TOLERANCE = 0.02
+# Allowed |sum of weights - 1|
+SUM_TOLERANCE = 0.001
+# Float slack on per-name bounds and on caps before a warning is raised
+EPS = 1e-9
+CAP_WARN_EPS = 0.001
+
+
+class ConstraintLimits(NamedTuple):
+    count: int = 20
+    min_weight: float = 0.02
+    max_weight: float = 0.10
+    sector_cap: float = 0.25
+    industry_cap: Optional[float] = 0.15
+    cap_tolerance: float = CAP_TOLERANCE
+    sum_tolerance: float = SUM_TOLERANCE
+
+
+class Violation(NamedTuple):
+    kind: str  # "count", "total", "min_weight", "max_weight", "sector_cap" or "industry_cap"
+    subject: Optional[str]  # Ticker or group name (None for portfolio-wide checks)
+    value: float
+    limit: float
+    severity: str = "error"  # "warning" = over a cap but within the tolerance
+    tolerance: float = 0.0  # Cap overage allowed before it is an error
+
+    @property
+    def message(self) -> str:
+        if self.kind == "count":
+            return f"Must have exactly {int(self.limit)} holdings, got {int(self.value)}"
+        if self.kind == "total":
+            return f"Weights must sum to 1.0, got {self.value:.6f}"
+        if self.kind == "min_weight":
+            return f"{self.subject}: weight {self.value:.4f} below minimum {self.limit}"
+        if self.kind == "max_weight":
+            return f"{self.subject}: weight {self.value:.4f} above maximum {self.limit}"
+        label = "Sector" if self.kind == "sector_cap" else "Industry"
+        if self.severity == "warning":
+            return f"{label} {self.subject}: {self.value*100:.2f}% slightly over cap of {self.limit*100:.0f}% but within tolerance"
+        return (
+            f"{label} {self.subject}: {self.value*100:.2f}% exceeds cap of {self.limit*100:.0f}% "
+            f"(tolerance: {(self.limit + self.tolerance)*100:.0f}%)"
+        )
+
+
+class PortfolioArrays(NamedTuple):
+    tickers: list[str]
+    weights: np.ndarray  # (N,) or (K, N)
+    sector_codes: np.ndarray  # (N,) into sector_names
+    industry_codes: np.ndarray  # (N,) into industry_names; -1 = unclassified (not capped)
+    sector_names: list[str]
+    industry_names: list[str]
+
+
+def encode_labels(labels: Sequence[Optional[str]], missing: Optional[str] = None) -> tuple[np.ndarray, list[str]]:
+    """(codes, names) for group labels; None becomes `missing`, or code -1 if `missing` is None."""
+    index: dict[str, int] = {}
+    codes = np.full(len(labels), -1, dtype=np.int64)
+    for i, label in enumerate(labels):
+        label = label or missing
+        if label is not None:
+            codes[i] = index.setdefault(label, len(index))
+    return codes, list(index)
+
+
+def portfolio_arrays(
+    tickers: Sequence[str],
+    weights: np.ndarray,
+    sectors: Sequence[Optional[str]],
+    industries: Sequence[Optional[str]],
+) -> PortfolioArrays:
+    """Arrays for a pool of names; unknown sectors form one "Unknown" group, unknown industries none."""
+    sector_codes, sector_names = encode_labels(sectors, missing="Unknown")
+    industry_codes, industry_names = encode_labels(industries)
+    return PortfolioArrays(
+        list(tickers), np.asarray(weights, dtype=float), sector_codes, industry_codes, sector_names, industry_names
+    )
+
+
+def from_holdings(holdings: Sequence) -> PortfolioArrays:
+    """PortfolioArrays for PortfolioHolding-like objects (ticker, weight, sector, industry)."""
+    return portfolio_arrays(
+        [h.ticker for h in holdings],
+        np.array([h.weight for h in holdings], dtype=float),
+        [h.sector for h in holdings],
+        [h.industry for h in holdings],
+    )
+
+
+def group_weights(weights: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """(K, G) summed weight per group for (K, N) weights (codes of -1 are left out)."""
+    weights = np.atleast_2d(weights)
+    if n_groups == 0:
+        return np.zeros((weights.shape[0], 0))
+    membership = np.zeros((len(codes), n_groups))
+    grouped = codes >= 0
+    membership[np.nonzero(grouped)[0], codes[grouped]] = 1.0
+    return weights @ membership
+
+
+def allocation(weights: np.ndarray, codes: np.ndarray, names: Sequence[str]) -> dict[str, float]:
+    """{group: weight} for a single (N,) weight vector, in first-seen group order."""
+    sums = group_weights(weights, codes, len(names))[0]
+    return {name: float(w) for name, w in zip(names, sums)}
+
+
+def check_weights(
+    weights: np.ndarray,
+    sector_codes: np.ndarray,
+    industry_codes: np.ndarray,
+    limits: ConstraintLimits,
+    n_sectors: Optional[int] = None,
+    n_industries: Optional[int] = None,
+    held: Optional[np.ndarray] = None,
+) -> dict[str, np.ndarray]:
+    """Evaluate every constraint for (K, N) weightings at once.
+
+    `held` marks the names counted as holdings (default: weight > 0). Returns arrays:
+    count (K,), total (K,), below_min / above_max (K, N), sector_weights (K, S),
+    industry_weights (K, I), sector_over / industry_over (K, S|I) beyond the tolerance, and
+    feasible (K,) - no errors (within-tolerance cap overage is allowed).
+    """
+    w = np.atleast_2d(np.asarray(weights, dtype=float))
+    held = w > 0 if held is None else np.broadcast_to(np.atleast_2d(held), w.shape)
+    n_sectors = int(sector_codes.max(initial=-1)) + 1 if n_sectors is None else n_sectors
+    n_industries = int(industry_codes.max(initial=-1)) + 1 if n_industries is None else n_industries
+
+    count = held.sum(axis=1)
+    total = w.sum(axis=1)
+    below_min = held & (w < limits.min_weight - EPS)
+    above_max = held & (w > limits.max_weight + EPS)
+    sector_weights = group_weights(w, sector_codes, n_sectors)
+    industry_weights = group_weights(w, industry_codes, n_industries)
+    sector_over = sector_weights > limits.sector_cap + limits.cap_tolerance
+    if limits.industry_cap is None:
+        industry_over = np.zeros_like(industry_weights, dtype=bool)
+    else:
+        industry_over = industry_weights > limits.industry_cap + limits.cap_tolerance
+
+    feasible = (
+        (count == limits.count)
+        & (np.abs(total - 1.0) <= limits.sum_tolerance)
+        & ~below_min.any(axis=1)
+        & ~above_max.any(axis=1)
+        & ~sector_over.any(axis=1)
+        & ~industry_over.any(axis=1)
+    )
+    return {
+        "count": count,
+        "total": total,
+        "below_min": below_min,
+        "above_max": above_max,
+        "sector_weights": sector_weights,
+        "industry_weights": industry_weights,
+        "sector_over": sector_over,
+        "industry_over": industry_over,
+        "feasible": feasible,
+    }
+
+
+def feasible_mask(arrays: PortfolioArrays, limits: ConstraintLimits) -> np.ndarray:
+    """(K,) True where a row of `arrays.weights` satisfies every constraint."""
+    return check_weights(
+        arrays.weights, arrays.sector_codes, arrays.industry_codes, limits,
+        len(arrays.sector_names), len(arrays.industry_names),
+    )["feasible"]
+
+
+def check_portfolio(arrays: PortfolioArrays, limits: ConstraintLimits, held: Optional[np.ndarray] = None) -> list[Violation]:
+    """Violations (errors, then within-tolerance cap warnings) for a single weighting."""
+    w = np.asarray(arrays.weights, dtype=float).reshape(-1)
+    result = check_weights(
+        w, arrays.sector_codes, arrays.industry_codes, limits,
+        len(arrays.sector_names), len(arrays.industry_names), held,
+    )
+    violations = []
+    if result["count"][0] != limits.count:
+        violations.append(Violation("count", None, float(result["count"][0]), limits.count))
+    if abs(result["total"][0] - 1.0) > limits.sum_tolerance:
+        violations.append(Violation("total", None, float(result["total"][0]), 1.0))
+    for i in np.nonzero(result["below_min"][0] | result["above_max"][0])[0]:
+        if result["below_min"][0, i]:
+            violations.append(Violation("min_weight", arrays.tickers[i], float(w[i]), limits.min_weight))
+        if result["above_max"][0, i]:
+            violations.append(Violation("max_weight", arrays.tickers[i], float(w[i]), limits.max_weight))
+
+    groups = [("sector_cap", "sector_weights", arrays.sector_names, limits.sector_cap)]
+    if limits.industry_cap is not None:
+        groups.append(("industry_cap", "industry_weights", arrays.industry_names, limits.industry_cap))
+    warnings = []
+    for kind, key, names, cap in groups:
+        for name, value in zip(names, result[key][0]):
+            if value > cap + limits.cap_tolerance:
+                violations.append(Violation(kind, name, float(value), cap, "error", limits.cap_tolerance))
+            elif value > cap + CAP_WARN_EPS:
+                warnings.append(Violation(kind, name, float(value), cap, "warning", limits.cap_tolerance))
+    return violations + warnings
@@ -511,6 +511,50 @@ def fetch_historical_daily_series(
         return []
 
 
+def fetch_historical_daily_bars(
+    ticker: str,
+    from_date: date,
+    to_date: date,
+    fmp_api_key: str,
+) -> list[Tuple[date, float, float]]:
+    """Fetch daily (date, close, volume) bars for a ticker over a date range using FMP API.
+
+    Same endpoint as fetch_historical_daily_series, keeping volume for liquidity screens.
+    Returns bars sorted by date ascending (trading days only); [] on any failure.
+    """
+    if not fmp_api_key or from_date > to_date:
+        return []
+    try:
+        url = f"https://financialmodelingprep.com/api/v3/historical-price-full/{ticker}"
+        params = {
+            "apikey": fmp_api_key,
+            "from": from_date.strftime("%Y-%m-%d"),
+            "to": to_date.strftime("%Y-%m-%d"),
+        }
+        resp = requests.get(url, params=params, timeout=(5, 30))
+        if resp.status_code != 200:
+            return []
+        data = resp.json()
+        if not isinstance(data, dict):
+            return []
+        out = []
+        for day in data.get("historical", []) or []:
+            day_str = day.get("date")
+            close = day.get("close")
+            if not day_str or close is None:
+                continue
+            try:
+                d = datetime.strptime(day_str.split()[0], "%Y-%m-%d").date()
+                if from_date <= d <= to_date:
+                    out.append((d, float(close), float(day.get("volume") or 0.0)))
+            except (ValueError, TypeError):
+                continue
+        out.sort(key=lambda x: x[0])
+        return out
+    except Exception:
+        return []
+
+
 def fetch_price_data_finnhub(ticker: str, api_key: str) -> Optional[PriceData]:
     """Fetch price and volume data from Finnhub API."""
     try:
@@ -563,6 +607,24 @@ def fetch_price_data_finnhub(ticker: str, api_key: str) -> Optional[PriceData]:
         return None
 
 
+def fetch_quotes_fmp_batch(tickers: list[str], api_key: str, chunk_size: int = 100) -> dict[str, float]:
+    """{ticker: last price} from the FMP quote endpoint, many symbols per request."""
+    prices: dict[str, float] = {}
+    for i in range(0, len(tickers), chunk_size):
+        chunk = tickers[i:i + chunk_size]
+        url = "https://financialmodelingprep.com/api/v3/quote/{}".format(",".join(chunk))
+        resp = requests.get(url, params={"apikey": api_key}, timeout=(5, 30))
+        resp.raise_for_status()
+        data = resp.json()
+        if not isinstance(data, list):
+            raise ValueError(f"Unexpected quote response: {str(data)[:200]}")
+        for q in data:
+            symbol, price = q.get("symbol"), q.get("price")
+            if symbol and price:
+                prices[symbol] = float(price)
+    return prices
+
+
 def fetch_price_data_fmp(ticker: str, api_key: str) -> Optional[PriceData]:
     """Fetch price, volume, market cap from FMP quote API.
     Also calculates avg_volume_30d from historical data."""
@@ -847,6 +847,156 @@ def fetch(
         typer.echo(f"Detailed log saved to: {log_file}")
 
 
+@app.command()
+def synthesize(
+    candidates_file: Path = typer.Option(
+        Path("data/candidates.json"), help="Input candidates JSON path"
+    ),
+    out: Path = typer.Option(
+        Path("data/stock_data.json"), help="Output JSON path"
+    ),
+    count: Optional[int] = typer.Option(
+        None, help="Generate this many synthetic tickers instead of reading the candidates file"
+    ),
+    seed: int = typer.Option(0, help="Seed for the synthetic data"),
+):
+    """Write synthetic stock data (no network) for offline benchmarking with LLM_BACKEND=offline."""
+    from .offline_backend import synthesize_stock_data, synthetic_ticker
+
+    if count is not None:
+        tickers = [synthetic_ticker(i) for i in range(count)]
+    else:
+        if not candidates_file.exists():
+            typer.echo(f"Candidates file not found: {candidates_file}")
+            raise typer.Exit(code=1)
+        candidates_resp = CandidateResponse.model_validate(json.loads(candidates_file.read_text()))
+        tickers = list(dict.fromkeys(c.ticker for c in candidates_resp.candidates))
+
+    start = time.time()
+    response = synthesize_stock_data(tickers, seed=seed)
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(response.model_dump_json(indent=2), encoding='utf-8')
+    typer.echo(f"Synthesized data for {len(response.data)} tickers in {time.time() - start:.2f}s -> {out}")
+
+
+@app.command()
+def prices(
+    tickers_file: Optional[Path] = typer.Option(
+        None, help="Candidates or scored candidates JSON whose tickers to update"
+    ),
+    runs_dir: Optional[Path] = typer.Option(
+        None, help="Also update every ticker in the scored_candidates.json files under this runs directory"
+    ),
+    start: Optional[str] = typer.Option(None, help="Start date YYYY-MM-DD (default: 1 year ago)"),
+    end: Optional[str] = typer.Option(None, help="End date YYYY-MM-DD (default: the effective date, today or BACKTEST_DATE)"),
+    price_dir: Optional[Path] = typer.Option(None, help="Price store directory (default: PRICE_STORE_DIR)"),
+):
+    """Update the local daily price store (close and volume) for candidates and/or past runs."""
+    from .price_store import update_prices
+
+    cfg = load_config()
+    if not cfg.fmp_api_key:
+        typer.echo("FMP_API_KEY is required to update the price store")
+        raise typer.Exit(code=1)
+
+    tickers: set[str] = {"SPY"}
+    files = [tickers_file] if tickers_file else []
+    if runs_dir:
+        files.extend(sorted(runs_dir.glob("*/scored_candidates.json")))
+    if not files:
+        files = [Path("data/scored_candidates.json")]
+    for f in files:
+        if not f.exists():
+            typer.echo(f"  [WARN] {f} not found")
+            continue
+        try:
+            payload = json.loads(f.read_text(encoding='utf-8'))
+            tickers.update(c["ticker"] for c in payload.get("candidates", []) if c.get("ticker"))
+        except Exception as e:
+            typer.echo(f"  [WARN] Could not read tickers from {f}: {e}")
+
+    price_dir = price_dir or Path(cfg.price_store_dir)
+    end_date = datetime.strptime(end, "%Y-%m-%d").date() if end else cfg.effective_date
+    start_date = datetime.strptime(start, "%Y-%m-%d").date() if start else end_date - timedelta(days=365)
+
+    typer.echo(f"Updating prices for {len(tickers)} tickers, {start_date} to {end_date} -> {price_dir}")
+    t0 = time.time()
+    added = update_prices(sorted(tickers), start_date, end_date, cfg.fmp_api_key, price_dir)
+    fetched = sum(1 for n in added.values() if n)
+    typer.echo(
+        f"Price store updated in {time.time() - t0:.1f}s: {sum(added.values())} new bars "
+        f"for {fetched} tickers ({len(tickers) - fetched} already current or unavailable)"
+    )
+
+
+@app.command()
+def security_master(
+    out: Path = typer.Option(Path("data/security_master.json"), help="Security master cache path"),
+):
+    """Refresh the cached ticker -> sector/industry security master from the FMP screener."""
+    from .security_master import refresh_security_master
+
+    cfg = load_config()
+    if not cfg.fmp_api_key:
+        typer.echo("FMP_API_KEY is required to refresh the security master")
+        raise typer.Exit(code=1)
+    securities = refresh_security_master(cfg.fmp_api_key, out)
+    industries = {s["industry"] for s in securities.values() if s.get("industry")}
+    typer.echo(f"Security master: {len(securities)} tickers, {len(industries)} industries -> {out}")
+
+
+
+@app.command("risk-calendar")
+def risk_calendar(
+    refresh: bool = typer.Option(True, help="Re-fetch even if today's calendar is cached"),
+):
+    """Fetch the daily earnings / M&A / trading-halt calendar used by the risk screens."""
+    from .risk_calendar import load_risk_calendar
+
+    cfg = load_config()
+    calendar = load_risk_calendar(
+        cfg.effective_date,
+        fmp_api_key=cfg.fmp_api_key,
+        blackout_days=cfg.earnings_blackout_days,
+        live_feeds=not cfg.backtest_mode,
+        refresh=refresh,
+    )
+    typer.echo(
+        f"Risk calendar {calendar.as_of}: {len(calendar.earnings)} earnings through {calendar.blackout_end}, "
+        f"{len(calendar.ma_targets)} M&A targets, {len(calendar.halts)} halts (sources: {calendar.sources})"
+    )
+
+
+@app.command("risk-model")
+def risk_model(
+    stock_data_file: Path = typer.Option(Path("data/stock_data.json"), help="Universe to estimate the model for"),
+    refresh: bool = typer.Option(True, help="Re-estimate even if today's model is cached"),
+):
+    """Estimate (and cache) the day's covariance risk model from the local price store."""
+    from .risk_model import load_risk_model
+
+    cfg = load_config()
+    if not stock_data_file.exists():
+        typer.echo(f"Stock data file not found: {stock_data_file}")
+        raise typer.Exit(code=1)
+    data = StockDataResponse.model_validate_json(stock_data_file.read_text(encoding="utf-8"))
+    tickers = [sd.ticker for sd in data.data]
+    t0 = time.time()
+    model = load_risk_model(
+        tickers,
+        cfg.effective_date,
+        lookback_days=cfg.risk_model_lookback_days,
+        min_days=cfg.risk_model_min_days,
+        price_dir=Path(cfg.price_store_dir),
+        refresh=refresh,
+    )
+    market_vol = f"{model.market_vol:.1%}" if model.market_vol is not None else "n/a (no SPY history)"
+    typer.echo(
+        f"Risk model {model.as_of}: {len(model.tickers)}/{len(tickers)} tickers with history, "
+        f"shrinkage {model.shrinkage:.2f}, SPY volatility {market_vol} ({time.time() - t0:.1f}s)"
+    )
+
+
 def main():
     app()
 
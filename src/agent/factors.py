@@ -0,0 +1,361 @@
+"""Vectorized factor engine.
+
+Loads every ticker's inputs into NumPy arrays (NaN = missing) and computes all factor
+scores in one pass, either as winsorized cross-sectional z-scores ("zscore") or as the
+legacy per-ticker bucket ladders ("bucket"). z-scores can be taken within sector or
+industry groups (neutralization) so absolute thresholds don't favor some sectors.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from .models import FactorScores, StockData
+
+FACTOR_MODES = ("zscore", "bucket")
+NEUTRALIZATION_MODES = ("none", "sector", "industry")
+FACTOR_NAMES = ("value", "quality", "growth", "stability", "revisions", "momentum")
+
+# Raw inputs are clipped to these cross-sectional percentiles before standardizing
+WINSOR_PCT = (2.5, 97.5)
+# z-scores are clipped to +/- this many standard deviations
+Z_CLIP = 3.0
+# Fewer observations than this and a metric's z-score is neutral (0) for everyone
+MIN_OBSERVATIONS = 5
+# Groups with fewer observations than this are standardized against the whole universe
+MIN_GROUP_SIZE = 8
+
+_CONSENSUS_CODES = {"Buy": 0.5, "Hold": 0.0, "Sell": -0.5}
+
+
+def _f(value) -> float:
+    return np.nan if value is None else float(value)
+
+
+def load_factor_inputs(stock_data: Sequence[StockData]) -> dict[str, np.ndarray]:
+    """Collect the raw factor inputs for all tickers into float arrays (NaN where missing)."""
+    n = len(stock_data)
+    columns = (
+        "ev_ebitda", "pe_ratio", "fcf_margin", "roic", "operating_margin", "revenue_growth",
+        "beta", "chg_1d", "chg_5d", "chg_20d",
+        "rec_counts_score", "consensus_score", "rec_changes", "has_price_target", "has_recs",
+        # From the local price store (see price_history_stats); NaN without enough history
+        "hist_vol", "hist_max_drawdown", "hist_downside_dev", "hist_beta",
+    )
+    inputs = {name: np.full(n, np.nan) for name in columns}
+
+    for i, sd in enumerate(stock_data):
+        fund = sd.fundamentals
+        if fund:
+            inputs["ev_ebitda"][i] = _f(fund.ev_ebitda)
+            inputs["pe_ratio"][i] = _f(fund.pe_ratio)
+            inputs["fcf_margin"][i] = _f(fund.fcf_margin_ttm)
+            inputs["roic"][i] = _f(fund.roic)
+            inputs["operating_margin"][i] = _f(fund.operating_margin_ttm)
+            inputs["revenue_growth"][i] = _f(fund.revenue_yoy_growth)
+
+        price = sd.price_data
+        if price:
+            inputs["beta"][i] = _f(price.beta)
+            inputs["chg_1d"][i] = _f(price.price_change_pct)
+            inputs["chg_5d"][i] = _f(price.price_change_pct_5d)
+            inputs["chg_20d"][i] = _f(price.price_change_pct_20d)
+
+        recs = sd.analyst_recommendations
+        if recs:
+            inputs["has_recs"][i] = 1.0
+            if recs.buy_count is not None and recs.hold_count is not None and recs.sell_count is not None:
+                total = recs.buy_count + recs.hold_count + recs.sell_count
+                inputs["rec_counts_score"][i] = (recs.buy_count - recs.sell_count) / total if total > 0 else 0.0
+            inputs["consensus_score"][i] = _CONSENSUS_CODES.get(recs.consensus, 0.0)
+            net = 0
+            for change in recs.recent_changes or []:
+                change = change.lower()
+                if "upgrade" in change or "positive" in change:
+                    net += 1
+                elif "downgrade" in change or "negative" in change:
+                    net -= 1
+            inputs["rec_changes"][i] = net
+            inputs["has_price_target"][i] = 1.0 if recs.price_target and recs.price_target > 0 else 0.0
+
+    return inputs
+
+
+def price_history_stats(
+    closes: np.ndarray,
+    market: np.ndarray,
+    min_days: int = 60,
+) -> dict[str, np.ndarray]:
+    """Risk statistics per column of a (T, N) close matrix, against a (T,) market close series.
+
+    Returns annualized realized volatility, max drawdown (<= 0), annualized downside deviation
+    and regression beta vs the market, each (N,); NaN where a ticker has fewer than
+    `min_days` daily returns.
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = closes[1:] / closes[:-1] - 1.0
+        market_returns = market[1:] / market[:-1] - 1.0
+    valid = np.isfinite(returns)
+    counts = valid.sum(axis=0)
+    enough = counts >= min_days
+    safe_counts = np.maximum(counts, 1)
+
+    r = np.where(valid, returns, 0.0)
+    mean = r.sum(axis=0) / safe_counts
+    var = np.where(valid, (returns - mean) ** 2, 0.0).sum(axis=0) / safe_counts
+    vol = np.sqrt(var * 252)
+    downside = np.sqrt((np.minimum(r, 0.0) ** 2).sum(axis=0) / safe_counts * 252)
+
+    # Max drawdown on forward-filled closes (gaps carry the last close)
+    t_idx = np.arange(closes.shape[0])[:, None]
+    last_valid = np.maximum.accumulate(np.where(np.isfinite(closes), t_idx, 0), axis=0)
+    filled = closes[last_valid, np.arange(closes.shape[1])]
+    running_max = np.fmax.accumulate(filled, axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        drawdown = filled / running_max - 1.0
+    max_drawdown = np.where(np.isfinite(drawdown), drawdown, 0.0).min(axis=0)
+
+    # Beta over the days both the ticker and the market have returns
+    both = valid & np.isfinite(market_returns)[:, None]
+    n_both = np.maximum(both.sum(axis=0), 1)
+    x = np.where(both, market_returns[:, None], 0.0)
+    y = np.where(both, returns, 0.0)
+    mean_x, mean_y = x.sum(axis=0) / n_both, y.sum(axis=0) / n_both
+    cov = (x * y).sum(axis=0) / n_both - mean_x * mean_y
+    var_x = (x * x).sum(axis=0) / n_both - mean_x ** 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = np.where((both.sum(axis=0) >= min_days) & (var_x > 0), cov / var_x, np.nan)
+
+    return {
+        "hist_vol": np.where(enough, vol, np.nan),
+        "hist_max_drawdown": np.where(enough, max_drawdown, np.nan),
+        "hist_downside_dev": np.where(enough, downside, np.nan),
+        "hist_beta": beta,
+    }
+
+
+def _nanmean_rows(*arrays: np.ndarray) -> np.ndarray:
+    """Mean across component arrays, ignoring NaN; NaN only where every component is missing."""
+    stacked = np.vstack(arrays)
+    present = np.isfinite(stacked)
+    counts = present.sum(axis=0)
+    sums = np.where(present, stacked, 0.0).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def _coalesce(*arrays: np.ndarray) -> np.ndarray:
+    """First non-NaN value per position, in argument order."""
+    out = arrays[0].copy()
+    for arr in arrays[1:]:
+        out = np.where(np.isfinite(out), out, arr)
+    return out
+
+
+def encode_groups(labels: Sequence[Optional[str]]) -> np.ndarray:
+    """Integer group codes for labels; missing/"Unknown" labels get -1 (no group)."""
+    codes = {}
+    out = np.full(len(labels), -1, dtype=np.int64)
+    for i, label in enumerate(labels):
+        if label and label != "Unknown":
+            out[i] = codes.setdefault(label, len(codes))
+    return out
+
+
+def _standardize(x: np.ndarray, groups: Optional[np.ndarray], min_group_size: int) -> np.ndarray:
+    """(x - mean) / std over the universe, or within groups that have enough observations."""
+    mask = np.isfinite(x)
+    z = np.full(x.shape, np.nan)
+    if mask.sum() < MIN_OBSERVATIONS:
+        z[mask] = 0.0
+        return z
+
+    vals = x[mask]
+    mean = np.full(vals.shape, vals.mean())
+    std = np.full(vals.shape, vals.std())
+
+    if groups is not None:
+        g = groups[mask]
+        grouped = g >= 0
+        if grouped.any():
+            # Group-by mean/variance via bincount over group codes
+            n_groups = int(g.max()) + 1
+            counts = np.bincount(g[grouped], minlength=n_groups)
+            sums = np.bincount(g[grouped], weights=vals[grouped], minlength=n_groups)
+            sq_sums = np.bincount(g[grouped], weights=vals[grouped] ** 2, minlength=n_groups)
+            safe_counts = np.maximum(counts, 1)
+            g_mean = sums / safe_counts
+            g_std = np.sqrt(np.maximum(sq_sums / safe_counts - g_mean ** 2, 0.0))
+
+            # Thin groups fall back to the universe statistics
+            use_group = grouped & (counts[np.where(grouped, g, 0)] >= min_group_size)
+            mean = np.where(use_group, g_mean[np.where(use_group, g, 0)], mean)
+            std = np.where(use_group, g_std[np.where(use_group, g, 0)], std)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z[mask] = np.where(std > 0, np.clip((vals - mean) / std, -Z_CLIP, Z_CLIP), 0.0)
+    return z
+
+
+def winsorized_zscore(
+    x: np.ndarray,
+    groups: Optional[np.ndarray] = None,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> np.ndarray:
+    """Cross-sectional z-score of x after winsorizing; NaN stays NaN.
+
+    With `groups` (codes from encode_groups), each value is standardized within its group.
+    """
+    mask = np.isfinite(x)
+    if mask.sum() < MIN_OBSERVATIONS:
+        return _standardize(x, None, min_group_size)
+    lo, hi = np.percentile(x[mask], WINSOR_PCT)
+    return _standardize(np.clip(x, lo, hi), groups, min_group_size)
+
+
+def zscore_factors(
+    inputs: dict[str, np.ndarray],
+    groups: Optional[np.ndarray] = None,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> dict[str, np.ndarray]:
+    """Winsorized cross-sectional z-scores per factor (higher is better), optionally within groups."""
+
+    def zs(x: np.ndarray) -> np.ndarray:
+        return winsorized_zscore(x, groups, min_group_size)
+
+    def restandardize(x: np.ndarray) -> np.ndarray:
+        # Averaging component z-scores shrinks their spread; rescale the blend to unit variance
+        return _standardize(x, groups, min_group_size)
+
+    def positive(x: np.ndarray) -> np.ndarray:
+        return np.where(x > 0, x, np.nan)
+
+    with np.errstate(divide="ignore"):
+        # Yields rather than multiples, so cheap names don't blow up the tail
+        ebitda_yield = 1.0 / positive(inputs["ev_ebitda"])
+        earnings_yield = 1.0 / positive(inputs["pe_ratio"])
+
+    revisions_raw = (
+        _coalesce(inputs["rec_counts_score"], inputs["consensus_score"])
+        + 0.2 * np.nan_to_num(inputs["rec_changes"])
+    )
+    revisions_raw = np.where(np.isfinite(inputs["has_recs"]), revisions_raw, np.nan)
+
+    return {
+        "value": restandardize(_nanmean_rows(zs(ebitda_yield), zs(earnings_yield), zs(inputs["fcf_margin"]))),
+        "quality": restandardize(_nanmean_rows(zs(inputs["roic"]), zs(inputs["operating_margin"]))),
+        "growth": zs(inputs["revenue_growth"]),
+        # From price history where available (lower vol/drawdown/downside/beta is more stable);
+        # otherwise profile beta, then the size of the last 1d move
+        "stability": _coalesce(
+            restandardize(_nanmean_rows(
+                zs(-inputs["hist_vol"]),
+                zs(inputs["hist_max_drawdown"]),
+                zs(-inputs["hist_downside_dev"]),
+                zs(-inputs["hist_beta"]),
+            )),
+            zs(-inputs["beta"]),
+            zs(-np.abs(inputs["chg_1d"])),
+        ),
+        "revisions": zs(revisions_raw),
+        "momentum": _coalesce(zs(inputs["chg_20d"]), zs(inputs["chg_5d"]), zs(inputs["chg_1d"])),
+    }
+
+
+def _ladder(x: np.ndarray, edges: Sequence[float], scores: Sequence[float], upper: bool) -> np.ndarray:
+    """Bucket scores for x: the first edge it satisfies wins, else the last score.
+
+    upper=True means "x <= edge" buckets (lower is better); otherwise "x > edge".
+    """
+    conditions = [(x <= e) if upper else (x > e) for e in edges]
+    with np.errstate(invalid="ignore"):
+        out = np.select(conditions, scores[:-1], default=scores[-1])
+    return np.where(np.isfinite(x), out, np.nan)
+
+
+def bucket_factors(inputs: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """Legacy bucket scores (same ladders as the calculate_*_score functions), vectorized."""
+    ev = np.where(inputs["ev_ebitda"] > 0, inputs["ev_ebitda"], np.nan)
+    pe = np.where(inputs["pe_ratio"] > 0, inputs["pe_ratio"], np.nan)
+    fcf = inputs["fcf_margin"]
+    value = _nanmean_rows(
+        _ladder(ev, [8, 12, 16, 20, 25], [1.0, 0.7, 0.4, 0.0, -0.3, -0.6], upper=True),
+        _ladder(pe, [12, 18, 24, 30, 40], [1.0, 0.7, 0.4, 0.0, -0.3, -0.6], upper=True),
+        # FCF buckets are ">= edge"; nudge edges so the "> edge" ladder matches
+        _ladder(fcf, np.nextafter([20, 15, 10, 5, 0], -np.inf), [1.0, 0.7, 0.4, 0.0, -0.3, -0.6], upper=False),
+    )
+    quality = _nanmean_rows(
+        _ladder(inputs["roic"], [20, 15, 10, 5], [1.0, 0.7, 0.4, 0.0, -0.5], upper=False),
+        _ladder(inputs["operating_margin"], [20, 15, 10, 5], [1.0, 0.7, 0.4, 0.0, -0.3], upper=False),
+    )
+    growth = _ladder(inputs["revenue_growth"], [20, 15, 10, 5, 0], [1.0, 0.7, 0.5, 0.2, 0.0, -0.5], upper=False)
+
+    beta_score = _ladder(-inputs["beta"], [-0.8, -1.0, -1.2, -1.5], [0.7, 0.4, 0.1, -0.2, -0.5], upper=False)
+    move_score = _ladder(np.abs(inputs["chg_1d"]), np.nextafter([2, 5], -np.inf), [0.5, 0.0, -0.3], upper=True)
+    stability = _coalesce(beta_score, move_score)
+
+    revisions = (
+        _coalesce(inputs["rec_counts_score"], inputs["consensus_score"])
+        + 0.2 * np.nan_to_num(inputs["rec_changes"])
+        + 0.1 * np.nan_to_num(inputs["has_price_target"])
+    )
+    revisions = np.where(np.isfinite(inputs["has_recs"]), np.clip(revisions, -1.0, 1.0), np.nan)
+
+    momentum = np.clip(
+        _coalesce(inputs["chg_20d"] / 20.0, inputs["chg_5d"] / 12.0, inputs["chg_1d"] / 10.0), -1.0, 1.0
+    )
+
+    return {
+        "value": np.clip(value, -1.0, 1.0),
+        "quality": quality,
+        "growth": growth,
+        "stability": stability,
+        "revisions": revisions,
+        "momentum": momentum,
+    }
+
+
+def compute_factor_arrays(
+    inputs: dict[str, np.ndarray],
+    mode: str = "zscore",
+    groups: Optional[np.ndarray] = None,
+    min_group_size: int = MIN_GROUP_SIZE,
+) -> dict[str, np.ndarray]:
+    """Factor arrays for all tickers in the given mode ("zscore" or "bucket").
+
+    `groups` only applies to zscore mode; bucket scores use absolute thresholds.
+    """
+    if mode == "zscore":
+        return zscore_factors(inputs, groups, min_group_size)
+    if mode == "bucket":
+        return bucket_factors(inputs)
+    raise ValueError(f"Unknown factor mode {mode!r}; expected one of {FACTOR_MODES}")
+
+
+def compute_factor_scores(
+    stock_data: Sequence[StockData],
+    mode: str = "zscore",
+    group_labels: Optional[Sequence[Optional[str]]] = None,
+    min_group_size: int = MIN_GROUP_SIZE,
+    price_history: Optional[dict[str, np.ndarray]] = None,
+) -> list[FactorScores]:
+    """FactorScores for each StockData, computed cross-sectionally in one pass.
+
+    `group_labels` (sector or industry per ticker) makes the z-scores group-neutral;
+    `price_history` (from price_history_stats, same ticker order) feeds the stability factor.
+    """
+    groups = encode_groups(group_labels) if group_labels is not None else None
+    inputs = load_factor_inputs(stock_data)
+    if price_history:
+        inputs.update(price_history)
+    arrays = compute_factor_arrays(inputs, mode, groups, min_group_size)
+    return [
+        FactorScores(**{name: _optional(arrays[name][i]) for name in FACTOR_NAMES})
+        for i in range(len(stock_data))
+    ]
+
+
+def _optional(value: float) -> Optional[float]:
+    return float(value) if np.isfinite(value) else None
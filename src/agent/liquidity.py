@@ -0,0 +1,87 @@
+"""Dollar-volume liquidity estimates for the risk screens.
+
+The primary estimate is the median daily dollar volume (close x volume) over the last 20
+and 60 stored trading days, computed for the whole universe at once from the local price
+store. Zero or missing volumes are provider placeholders and are ignored rather than
+averaged in. Tickers without enough real history fall back to the quote provider's
+30-day average volume, then to the latest volume.
+"""
+
+from __future__ import annotations
+
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .models import StockData
+
+WINDOWS = (20, 60)
+# A window needs at least this share of non-placeholder days to be trusted
+MIN_VALID_SHARE = 0.5
+
+
+class LiquidityEstimate(NamedTuple):
+    dollar_volume: Optional[float]  # Value the screen compares to MIN_AVG_DOLLAR_VOLUME
+    median_20d: Optional[float]
+    median_60d: Optional[float]
+    source: str  # "price_store", "avg_volume_30d", "latest_volume" or "unknown"
+
+
+def median_dollar_volume(
+    closes: np.ndarray,
+    volumes: np.ndarray,
+    window: int,
+    min_valid_share: float = MIN_VALID_SHARE,
+) -> np.ndarray:
+    """(N,) median close x volume over the last `window` rows of (T, N) matrices.
+
+    Days with zero/NaN volume or price are placeholders and excluded; columns with fewer than
+    `min_valid_share * window` real days are NaN.
+    """
+    closes, volumes = closes[-window:], volumes[-window:]
+    with np.errstate(invalid="ignore"):
+        real = np.isfinite(closes) & np.isfinite(volumes) & (volumes > 0) & (closes > 0)
+    dollar = np.where(real, closes * np.where(real, volumes, 0.0), np.nan)
+    enough = real.sum(axis=0) >= max(1, int(np.ceil(min_valid_share * window)))
+    medians = np.full(closes.shape[1], np.nan)
+    if enough.any():
+        medians[enough] = np.nanmedian(dollar[:, enough], axis=0)
+    return medians
+
+
+def estimate_liquidity(
+    stock_data: Sequence[StockData],
+    closes: Optional[np.ndarray] = None,
+    volumes: Optional[np.ndarray] = None,
+) -> list[LiquidityEstimate]:
+    """Liquidity estimates in `stock_data` order.
+
+    `closes`/`volumes` are (T, N) price-store matrices in the same column order (or None).
+    The screened value is the smaller of the 20- and 60-day medians, so a recent drop in
+    trading shows up immediately.
+    """
+    n = len(stock_data)
+    medians = {w: np.full(n, np.nan) for w in WINDOWS}
+    if closes is not None and volumes is not None and len(closes):
+        for w in WINDOWS:
+            medians[w] = median_dollar_volume(closes, volumes, w)
+    screened = np.fmin(medians[WINDOWS[0]], medians[WINDOWS[1]])
+
+    def opt(x: float) -> Optional[float]:
+        return float(x) if np.isfinite(x) else None
+
+    estimates = []
+    for i, sd in enumerate(stock_data):
+        m20, m60 = opt(medians[20][i]), opt(medians[60][i])
+        if np.isfinite(screened[i]):
+            estimates.append(LiquidityEstimate(float(screened[i]), m20, m60, "price_store"))
+            continue
+        pd = sd.price_data
+        price = pd.price if pd and pd.price and pd.price > 0 else None
+        if price and pd.avg_volume_30d:
+            estimates.append(LiquidityEstimate(price * pd.avg_volume_30d, m20, m60, "avg_volume_30d"))
+        elif price and pd.volume:
+            estimates.append(LiquidityEstimate(price * pd.volume, m20, m60, "latest_volume"))
+        else:
+            estimates.append(LiquidityEstimate(None, m20, m60, "unknown"))
+    return estimates
@@ -8,6 +8,7 @@ from pydantic import BaseModel, Field
 class Candidate(BaseModel):
     ticker: str = Field(..., description="US-listed common stock ticker (uppercase)")
     sector: Optional[str] = Field(None, description="GICS sector if known")
+    industry: Optional[str] = Field(None, description="Industry from the security master")
     rationale: str = Field(..., description="One-line rationale")
     theme: Optional[str] = Field(None, description="Market theme this candidate aligns with")
 
@@ -129,12 +130,14 @@ class RiskFlags(BaseModel):
     no_trading_halts: bool = Field(True, description="No recent trading halts detected")
     no_pending_ma: bool = Field(True, description="No pending M&A detected")
     earnings_clear: bool = Field(True, description="No earnings within 2 trading days")
+    avg_dollar_volume: Optional[float] = Field(None, description="Median daily dollar volume used by the liquidity check")
 
 
 class ScoredStock(BaseModel):
     """Complete scoring analysis for a single ticker"""
     ticker: str
     sector: Optional[str] = None
+    industry: Optional[str] = None
     theme: Optional[str] = None
     
     # Factor scores
@@ -156,6 +159,11 @@ class ScoredStock(BaseModel):
     price: Optional[float] = None
     market_cap: Optional[float] = None
     scored_at: datetime = Field(default_factory=datetime.now)
+    
+    # Fingerprints of the LLM inputs, used to reuse sentiment/summary when inputs are unchanged
+    sentiment_fingerprint: Optional[str] = Field(None, description="Hash of the sentiment synthesis inputs")
+    news_fingerprint: Optional[str] = Field(None, description="Hash of the news summary inputs")
+    sentiment_skipped: bool = Field(False, description="Sentiment/news LLM calls skipped (failed risk screens or no path to the top ranks)")
 
 
 class ScoredCandidatesResponse(BaseModel):
@@ -171,11 +179,35 @@ class PortfolioHolding(BaseModel):
     ticker: str = Field(..., description="Stock ticker")
     weight: float = Field(..., description="Portfolio weight (0.02 to 0.10, i.e., 2% to 10%)")
     sector: Optional[str] = Field(None, description="GICS sector")
+    industry: Optional[str] = Field(None, description="Industry (security master)")
     theme: Optional[str] = Field(None, description="Market theme if applicable")
     rationale: Optional[str] = Field(None, description="Brief rationale for inclusion")
     composite_score: Optional[float] = Field(None, description="Composite score from Phase 3")
 
 
+class TurnoverReport(BaseModel):
+    """Turnover against the previous portfolio (one-way turnover = half the sum of |weight change|)"""
+    previous_portfolio: str = Field(..., description="Path of the previous portfolio.json")
+    turnover: float = Field(..., description="One-way turnover of this portfolio")
+    from_scratch_turnover: Optional[float] = Field(None, description="One-way turnover had the previous portfolio been ignored")
+    notional: float = Field(..., description="Notional the trade principals are computed at")
+    trades_principal: float = Field(..., description="Expected trades-CSV principal (buys + sells)")
+    principal_avoided: Optional[float] = Field(None, description="Trades-CSV principal saved versus building from scratch")
+    held_in_band: List[str] = Field(default_factory=list, description="Names kept at their previous weight by the no-trade band")
+    forced_sells: List[str] = Field(default_factory=list, description="Previous holdings no longer eligible (unscored or failing risk checks)")
+
+
+class RiskSummary(BaseModel):
+    """Ex-ante risk from the covariance risk model (annualized)"""
+    as_of: date = Field(..., description="Date of the risk model")
+    volatility: float = Field(..., description="Ex-ante annualized volatility of the covered holdings")
+    beta: float = Field(..., description="Ex-ante beta vs SPY")
+    coverage: float = Field(..., description="Share of portfolio weight covered by the model")
+    missing: List[str] = Field(default_factory=list, description="Holdings without enough price history")
+    shrinkage: float = Field(..., description="Ledoit-Wolf shrinkage intensity")
+    risk_contributions: dict[str, float] = Field(default_factory=dict, description="Share of portfolio variance per holding")
+
+
 class Portfolio(BaseModel):
     """Final portfolio construction"""
     holdings: List[PortfolioHolding] = Field(..., description="Exactly 20 holdings")
@@ -185,3 +217,5 @@ class Portfolio(BaseModel):
     portfolio_date: date = Field(default_factory=date.today, description="Portfolio construction date")
     horizon_end: date = Field(..., description="Portfolio horizon end date")
     constructed_at: datetime = Field(default_factory=datetime.now, description="Construction timestamp")
+    turnover: Optional[TurnoverReport] = Field(None, description="Turnover against the previous portfolio, if one was used")
+    risk: Optional[RiskSummary] = Field(None, description="Ex-ante risk from the covariance risk model")
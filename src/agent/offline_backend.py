@@ -0,0 +1,397 @@
+"""Offline, deterministic stand-in for the OpenAI chat API.
+
+Selected with LLM_BACKEND=offline. Every prompt the pipeline sends is recognised by its
+system/user text and answered with schema-valid synthetic JSON (candidates, themes,
+sentiments, summaries, holdings, ...), seeded from the prompt so repeated runs give the
+same output. Together with `data synthesize` this lets the whole pipeline run end to end
+with no network, e.g. for CI or for benchmarking orchestration at 1,000+ tickers.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import random
+import re
+import time
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Iterable, Optional
+
+import httpx
+import openai
+
+from .models import (
+    AnalystRecommendation,
+    Fundamentals,
+    NewsItem,
+    PriceData,
+    StockData,
+    StockDataResponse,
+)
+
+GICS_SECTORS = [
+    "Information Technology",
+    "Health Care",
+    "Financials",
+    "Consumer Discretionary",
+    "Communication Services",
+    "Industrials",
+    "Consumer Staples",
+    "Energy",
+    "Utilities",
+    "Real Estate",
+    "Materials",
+]
+
+_THEME_NAMES = [
+    "AI Infrastructure Buildout",
+    "Energy Transition",
+    "Healthcare Innovation",
+    "Reshoring and Industrial Automation",
+    "Digital Payments",
+    "Defense Modernization",
+    "Aging Demographics",
+    "Cybersecurity Spending",
+]
+
+
+def _rng(*parts: Any) -> random.Random:
+    """Deterministic RNG seeded from the given values."""
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def synthetic_ticker(index: int) -> str:
+    """Deterministic 4-letter synthetic ticker ("XAAA", "XAAB", ...) unlikely to collide with real symbols."""
+    letters = []
+    for _ in range(3):
+        index, rem = divmod(index, 26)
+        letters.append(chr(ord("A") + rem))
+    return "X" + "".join(reversed(letters))
+
+
+def synthetic_sector(ticker: str, seed: int = 0) -> str:
+    return _rng("sector", ticker, seed).choice(GICS_SECTORS)
+
+
+# Characters per streamed delta chunk (roughly a few tokens)
+_STREAM_CHUNK_CHARS = 16
+
+
+class _Completions:
+    def __init__(self, backend: "OfflineLLMClient"):
+        self._backend = backend
+
+    def create(self, model: str, messages: list[dict], timeout: Optional[float] = None, stream: bool = False, **kwargs):
+        if stream:
+            return self._backend._stream(model, messages, timeout)
+        return self._backend._complete(model, messages, timeout)
+
+
+class OfflineLLMClient:
+    """Duck-typed replacement for `openai.OpenAI` that answers `chat.completions.create`."""
+
+    def __init__(self, latency_ms: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.seed = seed
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
+
+    def _prompt(self, model: str, messages: list[dict]) -> tuple[str, str, random.Random]:
+        system = next((m["content"] for m in messages if m["role"] == "system"), "")
+        user = next((m["content"] for m in messages if m["role"] == "user"), "")
+        self.calls += 1
+        return system, user, _rng(self.seed, model, system, user)
+
+    def _latency(self, model: str, system: str, user: str) -> float:
+        """Simulated latency: 0.5x-1.5x the configured mean, deterministic per prompt.
+
+        Drawn from its own RNG so responses don't change with OFFLINE_LLM_LATENCY_MS.
+        """
+        if self.latency_ms <= 0:
+            return 0.0
+        return self.latency_ms / 1000.0 * (0.5 + _rng("latency", self.seed, model, system, user).random())
+
+    def _stream(self, model: str, messages: list[dict], timeout: Optional[float]):
+        """Yield the response in small delta chunks, spreading the simulated latency across them."""
+        system, user, rng = self._prompt(model, messages)
+        delay = self._latency(model, system, user)
+        content = json.dumps(respond(system, user, rng, self.seed))
+        pieces = [content[i:i + _STREAM_CHUNK_CHARS] for i in range(0, len(content), _STREAM_CHUNK_CHARS)]
+        per_chunk = delay / max(1, len(pieces))
+        elapsed = 0.0
+        for piece in pieces:
+            if per_chunk:
+                if timeout is not None and elapsed + per_chunk > timeout:
+                    raise openai.APITimeoutError(request=httpx.Request("POST", "offline://chat/completions"))
+                time.sleep(per_chunk)
+                elapsed += per_chunk
+            yield SimpleNamespace(
+                model=model,
+                choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)],
+            )
+
+    def _complete(self, model: str, messages: list[dict], timeout: Optional[float]):
+        system, user, rng = self._prompt(model, messages)
+        delay = self._latency(model, system, user)
+        if delay > 0:
+            if timeout is not None and delay > timeout:
+                time.sleep(timeout)
+                raise openai.APITimeoutError(request=httpx.Request("POST", "offline://chat/completions"))
+            time.sleep(delay)
+
+        payload = respond(system, user, rng, self.seed)
+        content = json.dumps(payload)
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=SimpleNamespace(
+                prompt_tokens=max(1, (len(system) + len(user)) // 4),
+                completion_tokens=max(1, len(content) // 4),
+            ),
+        )
+
+
+def respond(system: str, user: str, rng: random.Random, seed: int = 0) -> dict:
+    """Route a prompt to the matching synthetic responder."""
+    if "constructing a long-only portfolio" in system:
+        return _portfolio(user)
+    if "financial sentiment analyst" in system:
+        return _sentiment(user, rng)
+    if "financial news summarizer" in system:
+        return _summary(user, rng)
+    if "Classify the sentiment of each news item" in system:
+        return _news_sentiments(user)
+    if "aligned with specific market themes" in system:
+        return _theme_candidates(user, seed)
+    if "thematic equity research" in system:
+        return _themes(rng)
+    if "candidate universe" in system:
+        return _universe(user, seed)
+    if "analyst recommendations" in system:
+        return _analyst_recs(rng)
+    if "news extraction" in system:
+        return _news(user, rng)
+    return {}
+
+
+def _universe(user: str, seed: int) -> dict:
+    match = re.search(r"Target (\d+) candidate tickers", user)
+    count = int(match.group(1)) if match else 60
+    candidates = []
+    for i in range(count):
+        ticker = synthetic_ticker(i)
+        candidates.append({
+            "ticker": ticker,
+            "sector": synthetic_sector(ticker, seed),
+            "rationale": f"Synthetic candidate #{i + 1} (offline backend).",
+        })
+    return {"candidates": candidates}
+
+
+def _themes(rng: random.Random) -> dict:
+    names = rng.sample(_THEME_NAMES, k=6)
+    return {
+        "themes": [
+            {
+                "name": name,
+                "description": f"Synthetic theme '{name}' generated by the offline backend.",
+                "timeframe": "next 6-12 months",
+            }
+            for name in names
+        ]
+    }
+
+
+def _theme_candidates(user: str, seed: int) -> dict:
+    themes = re.findall(r"^\s*- ([^:\n]+):", user.split("Constraints:")[0], flags=re.MULTILINE)
+    candidates = []
+    for theme in themes:
+        theme_rng = _rng("theme", theme, seed)
+        for _ in range(4):
+            ticker = synthetic_ticker(theme_rng.randrange(26 ** 3))
+            candidates.append({
+                "ticker": ticker,
+                "sector": synthetic_sector(ticker, seed),
+                "rationale": f"Synthetic exposure to {theme}.",
+                "theme": theme.strip(),
+            })
+    return {"candidates": candidates}
+
+
+def _sentiment(user: str, rng: random.Random) -> dict:
+    def count(label: str) -> int:
+        match = re.search(rf"- {label}: (\d+)", user)
+        return int(match.group(1)) if match else 0
+
+    bullish, bearish, neutral = count("Bullish"), count("Bearish"), count("Neutral")
+    total = bullish + bearish + neutral
+    news_score = (bullish - bearish) / total if total else 0.0
+    score = max(-1.0, min(1.0, 0.6 * news_score + 0.4 * rng.uniform(-1, 1)))
+    label = "bullish" if score > 0.2 else "bearish" if score < -0.2 else "neutral"
+    consensus = re.search(r"Consensus: (\w+)", user)
+    return {
+        "overall_sentiment": label,
+        "sentiment_score": round(score, 3),
+        "analyst_consensus": consensus.group(1) if consensus and consensus.group(1) != "None" else None,
+        "analyst_score": round(rng.uniform(-1, 1), 3),
+        "news_sentiment": label if total else None,
+        "news_score": round(news_score, 3) if total else None,
+        "key_drivers": ["Synthetic driver A", "Synthetic driver B"],
+        "key_risks": ["Synthetic risk A", "Synthetic risk B"],
+        "price_target_upside": None,
+    }
+
+
+def _summary(user: str, rng: random.Random) -> dict:
+    match = re.search(r"articles about (\S+) into", user)
+    ticker = match.group(1) if match else "the company"
+    headlines = re.findall(r'"headline": "([^"]*)"', user)[:2]
+    tone = rng.choice(["constructive", "mixed", "cautious"])
+    lead = "; ".join(headlines) if headlines else "no major headlines"
+    return {
+        "summary": (
+            f"Recent coverage of {ticker} was {tone}. Key items: {lead}. "
+            f"This summary was generated by the offline backend."
+        )
+    }
+
+
+def _news_sentiments(user: str) -> dict:
+    body = user.split("Classify sentiment for these news items:", 1)[-1].split("Output JSON:", 1)[0]
+    try:
+        items = json.loads(body)
+    except ValueError:
+        items = []
+    labels = ["bullish", "neutral", "bearish"]
+    return {"sentiments": [_rng("news", item.get("headline")).choice(labels) for item in items]}
+
+
+def _analyst_recs(rng: random.Random) -> dict:
+    price_target = round(rng.uniform(20, 400), 2)
+    return {
+        "consensus": rng.choice(["Buy", "Hold", "Sell"]),
+        "price_target": price_target,
+        "price_target_high": round(price_target * 1.25, 2),
+        "price_target_low": round(price_target * 0.75, 2),
+        "num_analysts": rng.randint(3, 40),
+        "recent_changes": [],
+    }
+
+
+def _news(user: str, rng: random.Random) -> dict:
+    match = re.search(r"about (\S+)\.", user)
+    ticker = match.group(1) if match else "TICKER"
+    today = date.today()
+    return {
+        "news": [
+            {
+                "headline": f"{ticker} synthetic headline {i + 1}",
+                "summary": "Synthetic article generated by the offline backend.",
+                "source": "Offline",
+                "url": None,
+                "published_at": (today - timedelta(days=rng.randint(0, 30))).strftime("%Y-%m-%d"),
+            }
+            for i in range(3)
+        ]
+    }
+
+
+def _portfolio(user: str) -> dict:
+    """Pick 20 names by score with 6/5/4% tiers, respecting the sector cap stated in the prompt."""
+    cap_match = re.search(r"Sector cap: (\d+)%", user)
+    sector_cap = int(cap_match.group(1)) if cap_match else 25
+    rows = re.findall(
+        r"^\s*([A-Z][A-Z0-9.\-]*): score=(-?[\d.]+), sector=([^,]+), sentiment=",
+        user,
+        flags=re.MULTILINE,
+    )
+    ranked = sorted(rows, key=lambda r: float(r[1]), reverse=True)
+    tiers = [6] * 5 + [5] * 10 + [4] * 5
+
+    holdings = []
+    sector_weights: dict[str, int] = {}
+    for ticker, score, sector in ranked:
+        if len(holdings) == len(tiers):
+            break
+        weight = tiers[len(holdings)]
+        if sector_weights.get(sector, 0) + weight > sector_cap:
+            continue
+        sector_weights[sector] = sector_weights.get(sector, 0) + weight
+        holdings.append({
+            "ticker": ticker,
+            "weight": weight / 100.0,
+            "sector": sector,
+            "theme": None,
+            "rationale": f"Offline backend pick (score {float(score):.3f})",
+            "composite_score": float(score),
+        })
+    return {"holdings": holdings}
+
+
+def synthesize_stock_data(tickers: Iterable[str], seed: int = 0, news_per_ticker: int = 3) -> StockDataResponse:
+    """Build schema-valid Phase 2 data (price, fundamentals, analyst recs, news) without any network calls."""
+    now = datetime.now()
+    labels = ["bullish", "neutral", "bearish"]
+    data = []
+    for ticker in tickers:
+        rng = _rng("stock", ticker, seed)
+        price = round(rng.lognormvariate(4.0, 0.8), 2)
+        price_data = PriceData(
+            ticker=ticker,
+            price=price,
+            volume=int(rng.lognormvariate(14.5, 1.0)),
+            avg_volume_30d=int(rng.lognormvariate(14.5, 1.0)),
+            market_cap=round(rng.lognormvariate(23.5, 1.3), 0),
+            price_change_pct=rng.gauss(0, 2),
+            price_change_pct_5d=rng.gauss(0, 4),
+            price_change_pct_20d=rng.gauss(0, 8),
+            beta=round(max(0.1, rng.gauss(1.0, 0.35)), 2),
+            sma_20=round(price * rng.uniform(0.95, 1.05), 2),
+            sma_50=round(price * rng.uniform(0.9, 1.1), 2),
+            rsi_14=round(rng.uniform(25, 75), 1),
+            as_of=now,
+        )
+        fundamentals = Fundamentals(
+            ticker=ticker,
+            revenue_ttm=round(rng.lognormvariate(22.5, 1.2), 0),
+            revenue_yoy_growth=rng.gauss(8, 12),
+            operating_margin_ttm=rng.gauss(15, 10),
+            fcf_margin_ttm=rng.gauss(10, 8),
+            roic=rng.gauss(12, 9),
+            net_debt_to_ebitda=rng.gauss(1.5, 1.2),
+            pe_ratio=round(rng.lognormvariate(3.1, 0.45), 2),
+            ev_ebitda=round(rng.lognormvariate(2.6, 0.45), 2),
+            as_of=now.date(),
+        )
+        buy, hold, sell = rng.randint(0, 30), rng.randint(0, 15), rng.randint(0, 6)
+        analyst = AnalystRecommendation(
+            ticker=ticker,
+            consensus="Buy" if buy > hold + sell else "Hold" if buy >= sell else "Sell",
+            buy_count=buy,
+            hold_count=hold,
+            sell_count=sell,
+            price_target=round(price * rng.uniform(0.8, 1.4), 2),
+            num_analysts=buy + hold + sell,
+            recent_changes=[],
+            as_of=now.date(),
+        )
+        news = [
+            NewsItem(
+                ticker=ticker,
+                headline=f"{ticker} synthetic headline {i + 1}",
+                summary="Synthetic article generated by the offline backend.",
+                source="Offline",
+                published_at=now - timedelta(days=rng.randint(0, 14)),
+                sentiment=rng.choice(labels),
+            )
+            for i in range(news_per_ticker)
+        ]
+        data.append(StockData(
+            ticker=ticker,
+            price_data=price_data,
+            fundamentals=fundamentals,
+            analyst_recommendations=analyst,
+            news=news,
+        ))
+    return StockDataResponse(data=data)
@@ -1,12 +1,191 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+import json
+import random
+import statistics
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
 
+import httpx
+import openai
 from openai import OpenAI
 
+# Recent successful call latencies per model, used to derive the hedge delay
+_LATENCY_HISTORY: dict[str, deque] = defaultdict(lambda: deque(maxlen=100))
+_LATENCY_LOCK = threading.Lock()
+
+# Below this many samples the hedge delay falls back to a fraction of the timeout
+_MIN_HEDGE_SAMPLES = 5
+_MIN_ATTEMPT_SECONDS = 1.0
+
+# Process-wide client shared by every module that calls get_client()
+_CLIENT: Optional[OpenAI] = None
+_CLIENT_LOCK = threading.Lock()
+
 
 def get_client() -> OpenAI:
-    return OpenAI()
+    """Return the shared LLM client: OpenAI, or the offline backend if LLM_BACKEND=offline.
+
+    The client is created once per process and reused, so its connection pool (and any
+    warmed-up TLS connections) is shared by every caller.
+    """
+    global _CLIENT
+    if _CLIENT is not None:
+        return _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = _build_client(_llm_settings())
+    return _CLIENT
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _build_client(settings: dict) -> OpenAI:
+    if settings["backend"] == "offline":
+        from .offline_backend import OfflineLLMClient
+        return OfflineLLMClient(latency_ms=settings["offline_latency_ms"], seed=settings["offline_seed"])
+
+    # Pool sized for the concurrency level; hedged requests can double the in-flight count
+    pool_size = max(1, settings["concurrency"]) * (2 if settings["hedge"] else 1)
+    http_client = httpx.Client(
+        http2=settings["http2"] and _http2_available(),
+        limits=httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=settings["keepalive_seconds"],
+        ),
+        # Per-request read timeouts are passed by chat_json; this only bounds connection setup
+        timeout=httpx.Timeout(120.0, connect=10.0),
+    )
+    # Retries are handled by chat_json so they can respect the caller's deadline
+    client = OpenAI(max_retries=0, http_client=http_client)
+    if settings["prewarm"]:
+        threading.Thread(target=_prewarm, args=(client,), name="llm-prewarm", daemon=True).start()
+    return client
+
+
+def _prewarm(client: OpenAI) -> None:
+    """Open a pooled connection (DNS, TCP, TLS) ahead of the first real request."""
+    try:
+        client.models.list(timeout=10.0)
+    except Exception:
+        pass  # Best effort; the first real call will connect instead
+
+
+def deadline_after(seconds: float) -> float:
+    """Return a deadline (time.monotonic() based) `seconds` from now, for passing to chat_json."""
+    return time.monotonic() + seconds
+
+
+@lru_cache(maxsize=1)
+def _llm_settings() -> dict:
+    """LLM backend and retry settings from AppConfig, or defaults if config can't load."""
+    try:
+        from .config import load_config
+        cfg = load_config()
+        return {
+            "backend": cfg.llm_backend,
+            "offline_latency_ms": cfg.offline_llm_latency_ms,
+            "offline_seed": cfg.offline_llm_seed,
+            "max_retries": cfg.llm_max_retries,
+            "hedge": cfg.llm_hedge,
+            "backoff_base": cfg.llm_backoff_base,
+            "concurrency": cfg.llm_concurrency,
+            "keepalive_seconds": cfg.llm_keepalive_seconds,
+            "http2": cfg.llm_http2,
+            "prewarm": cfg.llm_prewarm,
+        }
+    except Exception:
+        return {
+            "backend": "openai",
+            "offline_latency_ms": 0.0,
+            "offline_seed": 0,
+            "max_retries": 2,
+            "hedge": False,
+            "backoff_base": 1.0,
+            "concurrency": 8,
+            "keepalive_seconds": 60.0,
+            "http2": True,
+            "prewarm": False,
+        }
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Errors worth retrying: timeouts, dropped connections, rate limits and 5xx responses."""
+    if isinstance(exc, (openai.APITimeoutError, openai.APIConnectionError, openai.RateLimitError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code >= 500
+    return isinstance(exc, TimeoutError)
+
+
+def _record_latency(model: str, elapsed: float) -> None:
+    with _LATENCY_LOCK:
+        _LATENCY_HISTORY[model].append(elapsed)
+
+
+def hedge_delay(model: str, timeout: float) -> float:
+    """Delay before firing a duplicate request: p95 of recent latencies for this model."""
+    with _LATENCY_LOCK:
+        samples = list(_LATENCY_HISTORY[model])
+    if len(samples) < _MIN_HEDGE_SAMPLES:
+        return timeout * 0.5
+    p95 = statistics.quantiles(samples, n=20)[-1]
+    return min(p95, timeout * 0.5)
+
+
+def _create(client: OpenAI, kwargs: dict, timeout: float):
+    """Single completion request; drops web_search_options if the model rejects them."""
+    try:
+        return client.chat.completions.create(**kwargs, timeout=timeout)
+    except Exception as e:
+        # If web_search_options not supported, retry without it
+        if "web_search_options" in kwargs and "web_search_options" in str(e).lower():
+            kwargs.pop("web_search_options", None)
+            return client.chat.completions.create(**kwargs, timeout=timeout)
+        raise
+
+
+def _timed_create(client: OpenAI, kwargs: dict, timeout: float):
+    start = time.monotonic()
+    resp = _create(client, kwargs, timeout)
+    _record_latency(kwargs["model"], time.monotonic() - start)
+    return resp
+
+
+def _hedged_create(client: OpenAI, kwargs: dict, timeout: float):
+    """Send the request, and a duplicate if it is slower than the p95 delay; first success wins."""
+    delay = hedge_delay(kwargs["model"], timeout)
+    pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="llm-hedge")
+    try:
+        primary = pool.submit(_timed_create, client, dict(kwargs), timeout)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        hedge = pool.submit(_timed_create, client, dict(kwargs), max(_MIN_ATTEMPT_SECONDS, timeout - delay))
+        pending = {primary, hedge}
+        last_error: Optional[BaseException] = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.exception() is None:
+                    return fut.result()
+                last_error = fut.exception()
+        raise last_error
+    finally:
+        # Don't block on the losing request; it is abandoned and times out on its own
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def chat_json(
@@ -16,7 +195,27 @@ def chat_json(
     user: str,
     use_web_search: bool = False,
     timeout: float = 120.0,
+    deadline: Optional[float] = None,
+    max_retries: Optional[int] = None,
+    hedge: Optional[bool] = None,
+    temperature: float = 0.2,
 ) -> Dict[str, Any]:
+    """Call the chat completions API in JSON mode.
+
+    Args:
+        timeout: Per-attempt timeout in seconds
+        deadline: Optional time.monotonic() deadline (see deadline_after); caps every attempt's
+            timeout and stops retrying once reached
+        max_retries: Retries on transient errors (defaults to LLM_MAX_RETRIES)
+        hedge: Fire a duplicate request after the p95 latency and take the first response
+            (defaults to LLM_HEDGE)
+        temperature: Sampling temperature (low by default for more deterministic outputs)
+    """
+    settings = _llm_settings()
+    backoff_base = settings["backoff_base"]
+    max_retries = settings["max_retries"] if max_retries is None else max_retries
+    hedge = settings["hedge"] if hedge is None else hedge
+
     kwargs = {
         "model": model,
         "messages": [
@@ -24,30 +223,233 @@ def chat_json(
             {"role": "user", "content": user},
         ],
         "response_format": {"type": "json_object"},
-        "temperature": 0.2,  # Use lower temperature for more deterministic outputs
+        "temperature": temperature,
     }
-    
+
     # Enable web search if requested (for models that support it)
     if use_web_search:
         kwargs["web_search_options"] = {
             "search_mode": "auto",  # Let the model decide when to search
         }
-    
-    try:
-        # Add timeout to prevent hanging (httpx timeout in seconds)
-        resp = client.chat.completions.create(**kwargs, timeout=timeout)
-    except Exception as e:
-        # If web_search_options not supported, retry without it
-        if use_web_search and "web_search_options" in str(e).lower():
-            kwargs.pop("web_search_options", None)
-            resp = client.chat.completions.create(**kwargs, timeout=timeout)
-        else:
-            raise
-    
+
+    attempt = 0
+    while True:
+        attempt_timeout = timeout
+        if deadline is not None:
+            remaining = deadline - time.monotonic()
+            if remaining < _MIN_ATTEMPT_SECONDS:
+                raise TimeoutError(f"LLM deadline exceeded before attempt {attempt + 1} ({model})")
+            attempt_timeout = min(timeout, remaining)
+
+        try:
+            if hedge:
+                resp = _hedged_create(client, kwargs, attempt_timeout)
+            else:
+                resp = _timed_create(client, kwargs, attempt_timeout)
+            break
+        except Exception as e:
+            if attempt >= max_retries or not is_transient(e):
+                raise
+            # Full-jitter exponential backoff, never sleeping past the deadline
+            backoff = random.uniform(0, backoff_base * (2 ** attempt))
+            if deadline is not None:
+                backoff = min(backoff, max(0.0, deadline - time.monotonic() - _MIN_ATTEMPT_SECONDS))
+            attempt += 1
+            time.sleep(backoff)
+
     content = resp.choices[0].message.content or "{}"
     return _safe_json_parse(content)
 
 
+class JsonArrayParser:
+    """Incremental parser that extracts objects from one top-level JSON array as text arrives.
+
+    Feed it chunks of a response like {"holdings": [{...}, {...}]}; each object in the
+    array named `key` is returned from feed() as soon as its closing brace is seen.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._array_depth: Optional[int] = None
+        self._object_start: Optional[int] = None
+        self.done = False
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.buffer += text
+        items: List[Dict[str, Any]] = []
+        buf = self.buffer
+        for i in range(self._pos, len(buf)):
+            ch = buf[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    self._last_string = buf[self._string_start:i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i + 1
+            elif ch == "[":
+                self._depth += 1
+                # The target array is a value of the top-level object
+                if self._array_depth is None and not self.done and self._depth == 2 and self._last_string == self.key:
+                    self._array_depth = self._depth
+            elif ch == "{":
+                self._depth += 1
+                if self._array_depth is not None and self._depth == self._array_depth + 1:
+                    self._object_start = i
+            elif ch == "}":
+                if self._object_start is not None and self._depth == self._array_depth + 1:
+                    try:
+                        item = json.loads(buf[self._object_start:i + 1])
+                        if isinstance(item, dict):
+                            items.append(item)
+                    except ValueError:
+                        pass  # Malformed element; skip it rather than lose the rest
+                    self._object_start = None
+                self._depth -= 1
+            elif ch == "]":
+                if self._array_depth is not None and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self.done = True
+                self._depth -= 1
+        self._pos = len(buf)
+        return items
+
+
+class JsonArrayStream:
+    """Iterable over the objects of one array in a streamed JSON-mode completion.
+
+    After iteration, `complete` tells whether the response finished normally; if it was cut
+    off (deadline, timeout, dropped connection) the objects already yielded are still valid
+    and `error` holds the reason. `raw` is the text received so far.
+    """
+
+    def __init__(self, client: OpenAI, kwargs: dict, key: str, timeout: float, deadline: Optional[float]):
+        self._client = client
+        self._kwargs = kwargs
+        self._timeout = timeout
+        self._deadline = deadline
+        self.parser = JsonArrayParser(key)
+        self.items: List[Dict[str, Any]] = []
+        self.complete = False
+        self.error: Optional[BaseException] = None
+
+    @property
+    def raw(self) -> str:
+        return self.parser.buffer
+
+    def result(self) -> Dict[str, Any]:
+        """The full parsed response, or just the array items received if it was cut off."""
+        if self.complete:
+            parsed = _safe_json_parse(self.raw or "{}")
+            if "error" not in parsed:
+                return parsed
+        return {self.parser.key: list(self.items)}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        """Yield array objects; retries (with chat_json's backoff) only while nothing was received."""
+        settings = _llm_settings()
+        attempt = 0
+        while True:
+            timeout = self._timeout
+            if self._deadline is not None:
+                remaining = self._deadline - time.monotonic()
+                if remaining < _MIN_ATTEMPT_SECONDS:
+                    if attempt == 0:
+                        raise TimeoutError(f"LLM deadline exceeded before streaming ({self._kwargs['model']})")
+                    return  # Retries ran out of time; self.error holds the last failure
+                timeout = min(timeout, remaining)
+
+            self.error = None
+            try:
+                stream = _create(self._client, dict(self._kwargs, stream=True), timeout)
+            except Exception as e:
+                if attempt >= settings["max_retries"] or not is_transient(e):
+                    raise
+                self.error = e
+            else:
+                yield from self._consume(stream, timeout)
+                if self.complete or self.items or attempt >= settings["max_retries"]:
+                    return
+                if not (is_transient(self.error) or isinstance(self.error, httpx.TransportError)):
+                    return
+
+            # Failed before any object arrived: start over with a fresh parser after backoff
+            self.parser = JsonArrayParser(self.parser.key)
+            backoff = random.uniform(0, settings["backoff_base"] * (2 ** attempt))
+            if self._deadline is not None:
+                backoff = min(backoff, max(0.0, self._deadline - time.monotonic() - _MIN_ATTEMPT_SECONDS))
+            attempt += 1
+            time.sleep(backoff)
+
+    def _consume(self, stream, timeout: float) -> Iterator[Dict[str, Any]]:
+        start = time.monotonic()
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                for item in self.parser.feed(chunk.choices[0].delta.content or ""):
+                    self.items.append(item)
+                    yield item
+                if self._deadline is not None and time.monotonic() >= self._deadline:
+                    self.error = TimeoutError("LLM deadline reached while streaming")
+                    return
+                if time.monotonic() - start >= timeout:
+                    self.error = TimeoutError(f"LLM stream exceeded {timeout:.0f}s timeout")
+                    return
+            self.complete = True
+            _record_latency(self._kwargs["model"], time.monotonic() - start)
+        except Exception as e:
+            if not is_transient(e) and not isinstance(e, httpx.TransportError):
+                raise
+            self.error = e
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+
+def chat_json_stream(
+    client: OpenAI,
+    model: str,
+    system: str,
+    user: str,
+    key: str,
+    timeout: float = 120.0,
+    deadline: Optional[float] = None,
+    temperature: float = 0.2,
+) -> JsonArrayStream:
+    """Stream a JSON-mode completion, yielding each object of the array `key` as it closes.
+
+    Transient failures before the first object arrives are retried like chat_json (within the
+    deadline). Once objects have been yielded there are no retries: a stream cut off by the
+    timeout, deadline or a dropped connection ends iteration early (see
+    JsonArrayStream.complete/error) and keeps what was already received.
+    """
+    kwargs = {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system},
+            {"role": "user", "content": user},
+        ],
+        "response_format": {"type": "json_object"},
+        "temperature": temperature,
+    }
+    return JsonArrayStream(client, kwargs, key, timeout, deadline)
+
+
 def _safe_json_parse(text: str) -> Dict[str, Any]:
     try:
         import orjson
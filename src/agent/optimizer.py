@@ -0,0 +1,198 @@
+"""Exact integer-percent portfolio weights.
+
+One mixed-integer program picks exactly `count` names and whole-percent weights that sum
+to 100, within per-name min/max and sector/industry caps, as close as possible (L1) to
+target weights (the LLM's, or score-implied). Given the previous portfolio, it can also
+penalize or cap turnover. Needs scipy (optional); without it callers fall back to the
+iterative rebalancer in portfolio.py.
+"""
+
+from __future__ import annotations
+
+from collections import Counter
+from typing import Optional, Sequence
+
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:  # Optional dependency
+    milp = None
+
+# Weight on the score-rank tie-breaker, in percent of deviation. Below 1 so the score never
+# outweighs a whole percent of distance from the targets; it only picks among equal fits.
+SCORE_TIEBREAK = 0.5
+
+
+class PortfolioInfeasibleError(RuntimeError):
+    """No weights satisfy the constraints; `report` lists the binding reasons found."""
+
+    def __init__(self, message: str, report: Sequence[str]):
+        super().__init__(message)
+        self.report = list(report)
+
+
+def available() -> bool:
+    return milp is not None
+
+
+def _group_capacity(labels: Sequence[Optional[str]], cap: int, min_percent: int, max_percent: int) -> tuple[int, int]:
+    """(max total percent, max name count) reachable under a per-group cap."""
+    total = names = 0
+    for label, n in Counter(labels).items():
+        if label is None:  # Unclassified names are not capped
+            total += n * max_percent
+            names += n
+        else:
+            total += min(cap, n * max_percent)
+            names += min(n, cap // min_percent if min_percent else n)
+    return total, names
+
+
+def infeasibility_report(
+    tickers: Sequence[str],
+    sectors: Sequence[Optional[str]],
+    industries: Optional[Sequence[Optional[str]]],
+    count: int,
+    min_percent: int,
+    max_percent: int,
+    sector_cap_percent: int,
+    industry_cap_percent: Optional[int],
+    total: int = 100,
+) -> list[str]:
+    """Human-readable reasons the constraints can't all hold (empty if none of the checks bind)."""
+    report = []
+    if len(tickers) < count:
+        report.append(f"Only {len(tickers)} eligible candidates for {count} holdings")
+    if count * min_percent > total:
+        report.append(f"{count} names x {min_percent}% minimum = {count * min_percent}% > {total}%")
+    if count * max_percent < total:
+        report.append(f"{count} names x {max_percent}% maximum = {count * max_percent}% < {total}%")
+
+    groups = [("Sector", [s or "Unknown" for s in sectors], sector_cap_percent)]
+    if industries is not None and industry_cap_percent is not None:
+        groups.append(("Industry", list(industries), industry_cap_percent))
+    for kind, labels, cap in groups:
+        reachable, names = _group_capacity(labels, cap, min_percent, max_percent)
+        if reachable < total:
+            report.append(f"{kind} caps of {cap}% allow at most {reachable}% invested across {len(set(labels))} groups")
+        if names < count:
+            report.append(
+                f"{kind} caps of {cap}% fit at most {names} names at the {min_percent}% minimum (need {count})"
+            )
+    return report
+
+
+def solve_weights(
+    tickers: Sequence[str],
+    targets: Sequence[float],
+    scores: Sequence[float],
+    sectors: Sequence[Optional[str]],
+    industries: Optional[Sequence[Optional[str]]] = None,
+    count: int = 20,
+    min_percent: int = 2,
+    max_percent: int = 10,
+    sector_cap_percent: int = 25,
+    industry_cap_percent: Optional[int] = None,
+    total: int = 100,
+    time_limit: float = 10.0,
+    previous: Optional[Sequence[float]] = None,
+    turnover_penalty: float = 0.0,
+    max_turnover_percent: Optional[float] = None,
+) -> dict[str, int]:
+    """{ticker: whole-percent weight} for exactly `count` names (all others are left out).
+
+    Args:
+        tickers: eligible names
+        targets: (N,) desired weight in percent (0 for names nobody asked for)
+        scores: (N,) composite scores; break ties between equally close solutions
+        sectors, industries: group labels (None sector = "Unknown"; None industry = uncapped)
+        previous: (N,) current weight in percent (0 if not held), enables the turnover terms
+        turnover_penalty: objective cost per percentage point traded (one point of target
+            deviation costs 1, so values >= 1 only trade when a constraint forces it)
+        max_turnover_percent: cap on one-way turnover within the pool, 0.5 * sum |w - previous|
+
+    Raises:
+        PortfolioInfeasibleError: no solution exists (with a report of binding constraints)
+        RuntimeError: scipy is not installed, or the solver failed for another reason
+    """
+    if milp is None:
+        raise RuntimeError("scipy is not installed")
+    n = len(tickers)
+    report = infeasibility_report(
+        tickers, sectors, industries, count, min_percent, max_percent, sector_cap_percent, industry_cap_percent, total
+    )
+    if report:
+        raise PortfolioInfeasibleError("Portfolio constraints are infeasible", report)
+
+    # Variables: w (N, integer percent), z (N, binary selection), d (N, |w - target|) and,
+    # with a previous portfolio, u (N, |w - previous|)
+    targets = np.asarray(targets, dtype=float)
+    order = np.argsort(-np.asarray(scores, dtype=float), kind="stable")
+    rank = np.empty(n)
+    rank[order] = np.arange(n) / max(1, n - 1)  # 0 = best score
+    with_turnover = previous is not None
+    blocks = 4 if with_turnover else 3
+    c = np.concatenate([np.zeros(n), SCORE_TIEBREAK * rank, np.ones(n)])
+    if with_turnover:
+        c = np.concatenate([c, np.full(n, turnover_penalty)])
+
+    eye = np.eye(n)
+    zeros = np.zeros((n, n))
+    rows, lower, upper = [], [], []
+
+    def add(row_w, row_z, row_d, lo, hi, row_u=None):
+        parts = [row_w, row_z, row_d]
+        if with_turnover:
+            parts.append(np.zeros(n) if row_u is None else row_u)
+        rows.append(np.concatenate(parts))
+        lower.append(lo)
+        upper.append(hi)
+
+    def stack(*parts):
+        return np.hstack(list(parts) + ([zeros] if with_turnover and len(parts) < blocks else []))
+
+    add(np.ones(n), np.zeros(n), np.zeros(n), total, total)
+    add(np.zeros(n), np.ones(n), np.zeros(n), count, count)
+    block = [
+        (stack(eye, -min_percent * eye, zeros), 0, np.inf),         # w >= min * z
+        (stack(eye, -max_percent * eye, zeros), -np.inf, 0),        # w <= max * z
+        (stack(eye, zeros, -eye), -np.inf, targets),                # w - d <= t
+        (stack(-eye, zeros, -eye), -np.inf, -targets),              # -w - d <= -t
+    ]
+    if with_turnover:
+        previous = np.asarray(previous, dtype=float)
+        block += [
+            (stack(eye, zeros, zeros, -eye), -np.inf, previous),    # w - u <= p
+            (stack(-eye, zeros, zeros, -eye), -np.inf, -previous),  # -w - u <= -p
+        ]
+        if max_turnover_percent is not None:
+            add(np.zeros(n), np.zeros(n), np.zeros(n), -np.inf, 2 * max_turnover_percent, row_u=np.ones(n))
+    labels = [("sector", [s or "Unknown" for s in sectors], sector_cap_percent)]
+    if industries is not None and industry_cap_percent is not None:
+        labels.append(("industry", list(industries), industry_cap_percent))
+    for _, group_labels, cap in labels:
+        for label in sorted({g for g in group_labels if g is not None}):
+            member = np.array([g == label for g in group_labels], dtype=float)
+            if member.sum() * max_percent > cap:  # Only add caps that can bind
+                add(member, np.zeros(n), np.zeros(n), -np.inf, cap)
+
+    constraints = [LinearConstraint(np.array(rows), lower, upper)]
+    constraints += [LinearConstraint(a, lo, hi) for a, lo, hi in block]
+    integrality = np.concatenate([np.ones(n), np.ones(n), np.zeros((blocks - 2) * n)])
+    bounds = Bounds(
+        np.zeros(blocks * n),
+        np.concatenate([np.full(n, max_percent), np.ones(n), np.full((blocks - 2) * n, np.inf)]),
+    )
+    result = milp(c, constraints=constraints, integrality=integrality, bounds=bounds,
+                  options={"time_limit": time_limit})
+    if result.status == 2:
+        raise PortfolioInfeasibleError(
+            "Portfolio constraints are infeasible",
+            [f"Solver: {result.message}", "No single-constraint check binds; the caps conflict in combination"],
+        )
+    if result.x is None:
+        raise RuntimeError(f"Portfolio optimizer failed: {result.message}")
+
+    weights = np.round(result.x[:n]).astype(int)
+    return {tickers[i]: int(weights[i]) for i in range(n) if weights[i] > 0}
@@ -7,6 +7,7 @@ from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Optional
 
+import numpy as np
 import requests
 import typer
 import yfinance as yf
@@ -478,6 +479,69 @@ def track_performance(
         typer.echo(f"\nDetailed report written to {out}")
 
 
+@app.command("rebalance-sim")
+def rebalance_sim(
+    runs_dir: Path = typer.Option(Path("data/runs"), help="Run folders whose portfolio.json history is replayed"),
+    schedules: str = typer.Option(
+        "daily,runs,weekly,biweekly,semimonthly,threshold:0.05,threshold:0.10",
+        help="Comma-separated schedules: daily, runs, weekly, biweekly, semimonthly, monthly, threshold:<one-way drift>",
+    ),
+    cost_bps: float = typer.Option(10.0, help="Transaction cost in basis points of traded notional"),
+    end: Optional[str] = typer.Option(None, help="Last date to simulate (YYYY-MM-DD, default: latest stored close)"),
+    out: Optional[Path] = typer.Option(None, help="Write results (with daily NAV) to this JSON file"),
+):
+    """Replay the portfolio history under different rebalance schedules using the local price store."""
+    from .rebalance_sim import build_inputs, load_target_history, parse_schedule, simulate_schedules
+
+    cfg = load_config()
+    specs = [s.strip() for s in schedules.split(",") if s.strip()]
+    try:
+        for spec in specs:
+            parse_schedule(spec)
+    except ValueError as e:
+        typer.echo(f"[ERROR] {e}")
+        raise typer.Exit(code=1)
+
+    history = load_target_history(runs_dir)
+    if not history:
+        typer.echo(f"[ERROR] No portfolio.json history in {runs_dir}")
+        raise typer.Exit(code=1)
+    dates, tickers, returns, targets, run_days = build_inputs(
+        history, date.fromisoformat(end) if end else None, Path(cfg.price_store_dir)
+    )
+    if len(dates) < 2:
+        typer.echo(f"[ERROR] Not enough stored prices in {cfg.price_store_dir} after {history[0][0]}")
+        raise typer.Exit(code=1)
+    coverage = np.isfinite(returns[1:]).mean() if len(returns) > 1 else 0.0
+    typer.echo(
+        f"Replaying {len(history)} portfolios ({int(run_days.sum())} targets) over {len(dates)} trading days "
+        f"{dates[0]} to {dates[-1]}, {len(tickers)} names ({coverage:.0%} of returns stored), {cost_bps:g} bps costs"
+    )
+
+    results = simulate_schedules(dates, returns, targets, run_days, specs, cost_bps)
+    typer.echo(f"\n{'Schedule':<16} {'Return':>8} {'Gross':>8} {'Cost drag':>9} {'Vol':>7} {'Rebal':>6} {'Turnover':>9} {'Ann. TO':>8}")
+    for r in results:
+        typer.echo(
+            f"{r.schedule:<16} {r.total_return:>8.2%} {r.gross_return:>8.2%} {r.cost_drag:>9.3%} {r.volatility:>7.1%} "
+            f"{r.rebalances:>6} {r.turnover:>9.2f} {r.annual_turnover:>8.2f}"
+        )
+    best = max(results, key=lambda r: r.total_return)
+    typer.echo(f"\n[INFO] Highest net return: {best.schedule}")
+
+    if out is not None:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out.write_text(json.dumps({
+            "runs_dir": str(runs_dir),
+            "cost_bps": cost_bps,
+            "dates": [d.isoformat() for d in dates],
+            "schedules": [
+                {**{k: v for k, v in r._asdict().items() if k != "nav"}, "nav": [round(x, 6) for x in r.nav]}
+                for r in results
+            ],
+        }, indent=2), encoding="utf-8")
+        typer.echo(f"Results written to {out}")
+
+
 @app.command()
 def track(
     portfolio_file: Optional[Path] = typer.Option(
@@ -1,39 +1,240 @@
 from __future__ import annotations
 
 import json
-from collections import defaultdict
+from collections import Counter, defaultdict
 import math
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from pathlib import Path
-from typing import Optional
+from typing import NamedTuple, Optional
 
+import numpy as np
 import typer
 from openai import OpenAI
 
 from .config import load_config
-from .models import Portfolio, PortfolioHolding, ScoredCandidatesResponse
-from .openai_client import chat_json, get_client
+from .constraints import ConstraintLimits, allocation, check_portfolio, from_holdings
+from .models import Portfolio, PortfolioHolding, RiskSummary, ScoredCandidatesResponse, ScoredStock, TurnoverReport
+from .openai_client import chat_json, chat_json_stream, deadline_after, get_client
+from .optimizer import PortfolioInfeasibleError, available as optimizer_available, solve_weights
 from .prompts import system_portfolio, user_portfolio
-from .run_manager import RUN_MODE_FILE, get_run_folder
+from .risk_model import load_risk_model
+from .run_manager import RUN_MODE_FILE, find_all_portfolios, get_run_folder
+from .security_master import load_security_master
+from .trades import size_lots
 
 app = typer.Typer()
 
+PORTFOLIO_CONSTRUCTORS = ("llm", "score")
+# LLM responses with fewer usable holdings than this go to the score-only constructor
+MIN_LLM_HOLDINGS = 10
+# Names per weight tier for rank-tiered score-only weights
+TIER_SIZE = 5
+VARIANT_SELECTIONS = ("score_per_risk", "score", "volatility")
+
+
+class PortfolioVariant(NamedTuple):
+    """One way of building the portfolio; `overrides` replace config fields (e.g. optimizer settings, None for none)."""
+    name: str
+    constructor: str  # "llm" or "score"
+    temperature: float = 0.2
+    style: Optional[str] = None  # Extra rule appended to the portfolio system prompt
+    weighting: str = "score"  # Score-only weights: "score" or "tiered"
+    overrides: Optional[dict] = None
+
+
+PORTFOLIO_VARIANTS = {
+    v.name: v
+    for v in (
+        PortfolioVariant("llm", "llm"),
+        PortfolioVariant(
+            "llm-diversified",
+            "llm",
+            temperature=0.7,
+            style="Favor names that diversify each other (different industries and drivers) and spread weight evenly.",
+        ),
+        PortfolioVariant("score", "score"),
+        PortfolioVariant("score-tiered", "score", weighting="tiered"),
+        PortfolioVariant("score-low-turnover", "score", overrides={"turnover_penalty": 1.0, "no_trade_band": 0.02}),
+    )
+}
+# Config fields that only matter against a previous portfolio
+TURNOVER_SETTINGS = {"turnover_penalty", "no_trade_band", "max_turnover"}
+
 
 def calculate_sector_allocation(holdings: list[PortfolioHolding]) -> dict[str, float]:
     """Calculate sector allocation percentages."""
-    sector_weights = defaultdict(float)
-    for holding in holdings:
-        sector = holding.sector or "Unknown"
-        sector_weights[sector] += holding.weight
-    return dict(sector_weights)
+    arrays = from_holdings(holdings)
+    return allocation(arrays.weights, arrays.sector_codes, arrays.sector_names)
+
+
+def calculate_industry_allocation(holdings: list[PortfolioHolding]) -> dict[str, float]:
+    """Calculate industry allocation percentages (unclassified holdings are left out)."""
+    arrays = from_holdings(holdings)
+    return allocation(arrays.weights, arrays.industry_codes, arrays.industry_names)
+
+
+def _sector_of(item) -> Optional[str]:
+    return item.sector or "Unknown"
+
+
+def _industry_of(item) -> Optional[str]:
+    return item.industry  # None = unclassified, not capped
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate prompt tokens (tiktoken if installed, else ~4 characters per token)."""
+    try:
+        import tiktoken
+        return len(tiktoken.get_encoding("cl100k_base").encode(text))
+    except Exception:
+        return max(1, len(text) // 4)
+
+
+_ABBREVIATIONS = {"Inc.", "Corp.", "Co.", "Ltd.", "Mr.", "Ms.", "Dr.", "Jr.", "St.", "vs.", "U.S.", "U.K.", "Nos.", "No."}
+
+
+def compress_summary(summary: Optional[str], max_chars: int) -> Optional[str]:
+    """Shorten a news summary to max_chars, cutting at sentence boundaries where possible."""
+    if not summary or max_chars <= 0:
+        return None
+    text = " ".join(summary.split())
+    if len(text) <= max_chars:
+        return text
+    sentences: list[str] = []
+    for piece in re.split(r"(?<=[.!?])\s+", text):
+        # Re-join pieces split after abbreviations such as "Inc." or "U.S."
+        if sentences and sentences[-1].split()[-1] in _ABBREVIATIONS:
+            sentences[-1] = f"{sentences[-1]} {piece}"
+        else:
+            sentences.append(piece)
+    kept = ""
+    for sentence in sentences:
+        candidate = f"{kept} {sentence}".strip()
+        if len(candidate) > max_chars:
+            break
+        kept = candidate
+    if len(kept) >= max_chars // 2:
+        return kept
+    # Sentences don't pack well into the budget; hard-truncate on a word boundary
+    return text[:max_chars].rsplit(" ", 1)[0] + "..."
+
+
+def shortlist_candidates(
+    candidates: list[ScoredStock],
+    shortlist_size: int,
+    min_weight: float,
+    max_weight: float,
+    sector_cap: float,
+    target_count: int = 20,
+) -> list[ScoredStock]:
+    """Pick a score-ranked shortlist that guarantees enough names per sector.
+
+    Each sector first gets up to ceil(sector_cap / max_weight) names (enough to fill its
+    cap at max weight), then the remaining slots are filled by score. No sector takes
+    more than floor(sector_cap / min_weight) slots, since more names than that can never
+    be held together under the cap. Candidates that failed risk screens are excluded.
+    """
+    passing = [c for c in candidates if c.risk_flags.passed_all_checks]
+    ranked = sorted(passing, key=lambda c: c.composite_score or 0, reverse=True)
+    size = max(shortlist_size, target_count)
+    if len(ranked) <= size:
+        return ranked
+
+    min_per_sector = max(1, math.ceil(sector_cap / max_weight - 1e-9))
+    max_per_sector = max(min_per_sector, int(sector_cap / min_weight + 1e-9))
+
+    by_sector: dict[str, list[ScoredStock]] = defaultdict(list)
+    for cand in ranked:
+        by_sector[cand.sector or "Unknown"].append(cand)
+
+    coverage = [c for names in by_sector.values() for c in names[:min_per_sector]]
+    coverage.sort(key=lambda c: c.composite_score or 0, reverse=True)
+    selected = coverage[:size]
+    chosen = {c.ticker for c in selected}
+    sector_counts: dict[str, int] = defaultdict(int)
+    for cand in selected:
+        sector_counts[cand.sector or "Unknown"] += 1
+
+    for cand in ranked:
+        if len(selected) >= size:
+            break
+        sector = cand.sector or "Unknown"
+        if cand.ticker in chosen or sector_counts[sector] >= max_per_sector:
+            continue
+        selected.append(cand)
+        chosen.add(cand.ticker)
+        sector_counts[sector] += 1
+
+    selected.sort(key=lambda c: c.composite_score or 0, reverse=True)
+    return selected
+
+
+def _candidate_prompt_dict(cand: ScoredStock, summary_chars: Optional[int] = None) -> dict:
+    """Prompt-facing view of a scored candidate, with the news summary compressed if requested."""
+    news_summary = cand.news_summary
+    if summary_chars is not None:
+        news_summary = compress_summary(news_summary, summary_chars)
+    return {
+        "ticker": cand.ticker,
+        "sector": cand.sector,
+        "industry": cand.industry,
+        "theme": cand.theme,
+        "composite_score": cand.composite_score,
+        "price": cand.price,
+        "sentiment": {
+            "overall_sentiment": cand.sentiment.overall_sentiment,
+            "sentiment_score": cand.sentiment.sentiment_score,
+        } if cand.sentiment else {},
+        "news_summary": news_summary,
+    }
 
 
-def _compute_sector_weights_percent(entries: list[dict]) -> dict[str, float]:
-    """Helper to compute sector weights using float percentages (matches validation)."""
+def build_portfolio_prompt(
+    shortlist: list[ScoredStock],
+    cfg,
+) -> tuple[str, int]:
+    """Render the portfolio user prompt within cfg.portfolio_prompt_token_budget.
+
+    Summaries share whatever budget is left after the fixed part of the prompt; if the
+    estimate is still over budget, the per-name summary allowance shrinks until it fits
+    (or summaries are dropped entirely). Returns (prompt, estimated_tokens).
+    """
+    def render(summary_chars: Optional[int]) -> str:
+        return user_portfolio(
+            scored_candidates=[_candidate_prompt_dict(c, summary_chars) for c in shortlist],
+            remaining_days=cfg.remaining_days,
+            min_weight=cfg.min_weight,
+            max_weight=cfg.max_weight,
+            sector_cap=cfg.sector_cap,
+            industry_cap=cfg.industry_cap,
+            horizon_end=cfg.portfolio_horizon_end,
+        )
+
+    base_tokens = estimate_tokens(render(0))
+    available_tokens = max(0, cfg.portfolio_prompt_token_budget - base_tokens)
+    summary_chars = (available_tokens * 4) // max(1, len(shortlist))
+
+    while True:
+        prompt = render(summary_chars)
+        tokens = estimate_tokens(prompt)
+        if tokens <= cfg.portfolio_prompt_token_budget or summary_chars == 0:
+            return prompt, tokens
+        # Summaries are usually shorter than the allowance, so shrink in proportion to the overshoot
+        summary_chars = int(summary_chars * 0.9 * cfg.portfolio_prompt_token_budget / tokens)
+        if summary_chars < 80:
+            summary_chars = 0
+
+
+def _compute_sector_weights_percent(entries: list[dict], group_of=_sector_of) -> dict[str, float]:
+    """Helper to compute sector (or other group) weights using float percentages (matches validation)."""
     weights: dict[str, float] = defaultdict(float)
     for entry in entries:
-        sector = entry["holding"].sector or "Unknown"
-        weights[sector] += entry["weight_percent"]
+        group = group_of(entry["holding"])
+        if group is not None:
+            weights[group] += entry["weight_percent"]
     return weights
 
 
@@ -142,8 +343,13 @@ def _rebalance_sector_caps(
     selected_tickers: set[str],
     sector_cap_percent: int,
     min_percent: int,
+    group_of=_sector_of,
+    kind: str = "Sector",
 ) -> None:
-    """Trim or swap holdings until all sector caps are satisfied."""
+    """Trim or swap holdings until all sector caps are satisfied.
+
+    `group_of`/`kind` apply the same procedure to other groupings (industries).
+    """
     sorted_candidates = sorted(
         scored_resp.candidates,
         key=lambda c: c.composite_score or 0,
@@ -159,7 +365,7 @@ def _rebalance_sector_caps(
 
     while iteration < max_iterations:
         iteration += 1
-        sector_weights = _compute_sector_weights_percent(entries)
+        sector_weights = _compute_sector_weights_percent(entries, group_of)
         overweight_sectors = [
             (sector, weight - sector_cap_float)
             for sector, weight in sector_weights.items()
@@ -170,10 +376,10 @@ def _rebalance_sector_caps(
 
         # Work on the most overweight sector first
         sector, over = max(overweight_sectors, key=lambda item: item[1])
-        typer.echo(f"[INFO] Sector {sector} overweight by {over}% (cap {sector_cap_percent}%).")
+        typer.echo(f"[INFO] {kind} {sector} overweight by {over}% (cap {sector_cap_percent}%).")
 
         sector_entries = sorted(
-            [entry for entry in entries if (entry["holding"].sector or "Unknown") == sector],
+            [entry for entry in entries if group_of(entry["holding"]) == sector],
             key=lambda e: (e["weight_percent"], e["holding"].composite_score or 0),
         )
 
@@ -210,23 +416,24 @@ def _rebalance_sector_caps(
         for cand in sorted_candidates:
             if cand.ticker in selected_tickers:
                 continue
-            cand_sector = cand.sector or "Unknown"
+            cand_sector = group_of(cand)
             if cand_sector == sector:
                 continue
-            cand_sector_weight = sector_weights.get(cand_sector, 0)
+            cand_sector_weight = sector_weights.get(cand_sector, 0) if cand_sector is not None else 0
             if cand_sector_weight + removed_weight <= sector_cap_float + 0.001:  # Use same tolerance as validation
                 replacement = cand
                 break
 
         if replacement is None:
             raise RuntimeError(
-                "Unable to find replacement candidate to satisfy sector caps."
+                f"Unable to find replacement candidate to satisfy {kind.lower()} caps."
             )
 
         new_holding = PortfolioHolding(
             ticker=replacement.ticker,
             weight=removed_weight / 100.0,
             sector=replacement.sector,
+            industry=replacement.industry,
             theme=replacement.theme,
             rationale=f"Added during sector rebalance (score {replacement.composite_score:.3f})",
             composite_score=replacement.composite_score,
@@ -234,12 +441,12 @@ def _rebalance_sector_caps(
         entries.append({"holding": new_holding, "weight_percent": removed_weight})
         selected_tickers.add(replacement.ticker)
         typer.echo(
-            f"  Added {replacement.ticker} ({removed_weight}%) in sector {replacement.sector or 'Unknown'}."
+            f"  Added {replacement.ticker} ({removed_weight}%) in {kind.lower()} {group_of(replacement) or 'Unknown'}."
         )
     
     if iteration >= max_iterations:
         raise RuntimeError(
-            f"Unable to satisfy sector caps after {max_iterations} iterations. "
+            f"Unable to satisfy {kind.lower()} caps after {max_iterations} iterations. "
             "This may indicate insufficient candidate diversity across sectors."
         )
 
@@ -251,8 +458,9 @@ def enforce_sector_caps_and_integer_weights(
     min_weight: float,
     max_weight: float,
     sector_cap: float,
+    industry_cap: Optional[float] = None,
 ) -> list[PortfolioHolding]:
-    """Ensure weights are integer percentages, respect min/max bounds, and satisfy sector caps."""
+    """Ensure weights are integer percentages, respect min/max bounds, and satisfy sector (and industry) caps."""
     min_percent = int(round(min_weight * 100))
     max_percent = int(round(max_weight * 100))
     sector_cap_percent = int(round(sector_cap * 100))
@@ -270,6 +478,18 @@ def enforce_sector_caps_and_integer_weights(
         sector_cap_percent,
         min_percent,
     )
+    if industry_cap is not None:
+        _rebalance_sector_caps(
+            entries,
+            scored_resp,
+            selected_tickers,
+            int(round(industry_cap * 100)),
+            min_percent,
+            group_of=_industry_of,
+            kind="Industry",
+        )
+        # Industry swaps can move weight into a full sector; re-check sectors
+        _rebalance_sector_caps(entries, scored_resp, selected_tickers, sector_cap_percent, min_percent)
     _round_weights_to_integers(entries, min_percent, max_percent)
 
     for entry in entries:
@@ -278,6 +498,293 @@ def enforce_sector_caps_and_integer_weights(
     return [entry["holding"] for entry in entries]
 
 
+def _legacy_fill_and_rebalance(
+    holdings: list[PortfolioHolding],
+    scored_resp: ScoredCandidatesResponse,
+    selected_tickers: set[str],
+    cfg,
+) -> list[PortfolioHolding]:
+    """Top up to 20 names, then trim/swap for sector caps and round (PORTFOLIO_OPTIMIZER=legacy)."""
+    # If we have fewer than 20 holdings, add the next best candidates
+    if len(holdings) < 20:
+        missing_count = 20 - len(holdings)
+        typer.echo(f"[WARN] Only {len(holdings)} holdings from LLM, adding {missing_count} top remaining candidates")
+
+        # Calculate current total weight before adding
+        current_total = sum(h.weight for h in holdings)
+
+        # Sort all candidates by composite score (highest first)
+        remaining_candidates = [
+            c for c in scored_resp.candidates 
+            if c.ticker not in selected_tickers
+        ]
+        remaining_candidates.sort(key=lambda x: x.composite_score or 0, reverse=True)
+
+        # Calculate weight for new stocks such that after normalization they meet minimum
+        # If we add M stocks with weight w each, total becomes T + M*w
+        # After normalization: w / (T + M*w) >= min_weight
+        # Solving: w >= (min_weight * T) / (1 - min_weight * M)
+        if missing_count > 0 and cfg.min_weight * missing_count < 1.0:
+            added_weight_per_stock = (cfg.min_weight * current_total) / (1.0 - cfg.min_weight * missing_count)
+            # Ensure we don't exceed max_weight
+            added_weight_per_stock = min(added_weight_per_stock, cfg.max_weight)
+        else:
+            # Fallback: use minimum weight
+            added_weight_per_stock = cfg.min_weight
+
+        # Add the top remaining candidates
+        for i in range(min(missing_count, len(remaining_candidates))):
+            cand = remaining_candidates[i]
+            holding = PortfolioHolding(
+                ticker=cand.ticker,
+                weight=added_weight_per_stock,
+                sector=cand.sector,
+                industry=cand.industry,
+                theme=cand.theme,
+                rationale=f"Added as top remaining candidate (composite score: {cand.composite_score:.3f})",
+                composite_score=cand.composite_score,
+            )
+            holdings.append(holding)
+            selected_tickers.add(cand.ticker)
+            typer.echo(f"  Added {cand.ticker} (score: {cand.composite_score:.3f}, weight: {added_weight_per_stock:.4f})")
+
+        # Normalize weights to sum to 1.0
+        total_weight = sum(h.weight for h in holdings)
+        if abs(total_weight - 1.0) > 0.001:  # Only normalize if significantly off
+            typer.echo(f"[INFO] Normalizing weights from {total_weight:.6f} to 1.0")
+            for holding in holdings:
+                holding.weight = holding.weight / total_weight
+
+            # After normalization, ensure all weights meet minimum requirement
+            # If any are below minimum, redistribute from holdings above minimum
+            below_min = [h for h in holdings if h.weight < cfg.min_weight]
+            if below_min:
+                typer.echo(f"[INFO] Adjusting {len(below_min)} holdings below minimum weight")
+                # Calculate total deficit
+                deficit = sum(cfg.min_weight - h.weight for h in below_min)
+                # Get holdings above minimum that we can reduce
+                above_min = [h for h in holdings if h.weight > cfg.min_weight]
+
+                if above_min and deficit > 0:
+                    # Calculate total weight we can reduce from above-min holdings
+                    reducible = sum(h.weight - cfg.min_weight for h in above_min)
+                    if reducible >= deficit:
+                        # Reduce proportionally from above-min holdings
+                        for h in below_min:
+                            needed = cfg.min_weight - h.weight
+                            # Reduce proportionally from above-min holdings
+                            for ah in above_min:
+                                reduction = needed * (ah.weight - cfg.min_weight) / reducible
+                                ah.weight -= reduction
+                            h.weight = cfg.min_weight
+
+                        # Re-normalize to ensure total is exactly 1.0
+                        total_weight = sum(h.weight for h in holdings)
+                        if abs(total_weight - 1.0) > 0.001:
+                            for holding in holdings:
+                                holding.weight = holding.weight / total_weight
+                    else:
+                        typer.echo(f"[WARN] Cannot meet minimum weight requirement for all holdings (deficit: {deficit:.6f}, reducible: {reducible:.6f})")
+
+    holdings = enforce_sector_caps_and_integer_weights(
+        holdings,
+        scored_resp,
+        selected_tickers,
+        cfg.min_weight,
+        cfg.max_weight,
+        cfg.sector_cap,
+        cfg.industry_cap,
+    )
+    return holdings
+
+
+class PreviousPortfolio(NamedTuple):
+    path: Path
+    weights: dict[str, float]  # {ticker: weight fraction}
+    prices: dict[str, float]  # Prices the previous trades CSV sized positions at
+
+
+def load_previous_portfolio(portfolio_file: Path) -> PreviousPortfolio:
+    """Weights of a previous portfolio.json, plus prices from the scored_candidates.json beside it."""
+    previous = Portfolio.model_validate_json(portfolio_file.read_text(encoding="utf-8"))
+    prices = {}
+    scored_file = portfolio_file.parent / "scored_candidates.json"
+    if scored_file.exists():
+        scored = ScoredCandidatesResponse.model_validate_json(scored_file.read_text(encoding="utf-8"))
+        prices = {c.ticker: c.price for c in scored.candidates if c.price and c.price > 0}
+    return PreviousPortfolio(portfolio_file, {h.ticker: h.weight for h in previous.holdings}, prices)
+
+
+def find_previous_portfolio(runs_dir: Path, exclude: Optional[Path] = None) -> Optional[Path]:
+    """Most recently constructed portfolio.json under `runs_dir` (other than `exclude`), or None."""
+    portfolios = [path for path, _ in find_all_portfolios(runs_dir) if exclude is None or path != exclude]
+    return portfolios[-1] if portfolios else None
+
+
+def _band_targets(targets: dict[str, float], previous: dict[str, float], band: float) -> list[str]:
+    """Snap targets within `band` of a held name's previous weight back to that weight (in place)."""
+    held = []
+    for ticker, target in targets.items():
+        prev = previous.get(ticker, 0.0)
+        if prev > 0 and target != prev and abs(target - prev) <= band + 1e-9:
+            targets[ticker] = prev
+            held.append(ticker)
+    return held
+
+
+def one_way_turnover(weights: dict[str, float], previous: dict[str, float]) -> float:
+    return 0.5 * sum(abs(weights.get(t, 0.0) - previous.get(t, 0.0)) for t in set(weights) | set(previous))
+
+
+def trade_principal(
+    weights: dict[str, float],
+    previous: PreviousPortfolio,
+    prices: dict[str, float],
+    notional: float,
+) -> float:
+    """Buy + sell principal the trades CSV would show for moving from `previous` to `weights`.
+
+    Mirrors write_trades_csv: new lots are sized with trades.size_lots; the previous book is
+    the positions.json beside it, or else whole shares at `notional` and its own prices.
+    Names without any price are skipped.
+    """
+    merged = {**previous.prices, **prices}
+    qty = size_lots(weights, merged, notional)
+    positions_file = previous.path.parent / "positions.json"
+    prev_qty: dict[str, float] = {}
+    if positions_file.exists():
+        try:
+            data = json.loads(positions_file.read_text(encoding="utf-8"))
+            prev_qty = {t: p["quantity"] for t, p in data.get("positions", {}).items()}
+        except Exception:
+            prev_qty = {}
+    if not prev_qty:
+        for ticker, weight in previous.weights.items():
+            prev_price = previous.prices.get(ticker) or prices.get(ticker)
+            if prev_price:
+                prev_qty[ticker] = int(round(weight * notional / prev_price))
+    total = 0.0
+    for ticker in set(qty) | set(prev_qty):
+        price = merged.get(ticker)
+        if price:
+            total += abs(qty.get(ticker, 0) - prev_qty.get(ticker, 0)) * price
+    return total
+
+
+def optimize_holdings(
+    holdings: list[PortfolioHolding],
+    scored_resp: ScoredCandidatesResponse,
+    cfg,
+    target_count: int = 20,
+    previous: Optional[PreviousPortfolio] = None,
+) -> tuple[list[PortfolioHolding], Optional[dict[str, float]], list[str]]:
+    """Exact integer-percent weights closest to the given holdings' weights (see optimizer.py).
+
+    The candidate pool is the given holdings plus the top OPTIMIZER_POOL_SIZE risk-passing
+    candidates by score, so names can be swapped in when caps or counts require it.
+    With a previous portfolio, its eligible names join the pool, targets inside the no-trade
+    band are snapped to the previous weights, and turnover is penalized (and capped).
+
+    Returns (holdings, from-scratch weights or None, names held by the no-trade band).
+    Raises PortfolioInfeasibleError if no portfolio satisfies the constraints.
+    """
+    given = {h.ticker: h for h in holdings}
+    given_total = sum(max(0.0, h.weight) for h in holdings) or 1.0
+    ranked = sorted(
+        (c for c in scored_resp.candidates if c.risk_flags.passed_all_checks and c.ticker not in given),
+        key=lambda c: c.composite_score or 0,
+        reverse=True,
+    )
+    by_ticker = {c.ticker: c for c in scored_resp.candidates}
+    pool = list(given) + [c.ticker for c in ranked[:cfg.optimizer_pool_size]]
+    eligible = {c.ticker for c in ranked}
+    if previous is not None:
+        pool += [t for t in previous.weights if t in eligible and t not in pool]
+
+    master = load_security_master(fmp_api_key=None)  # Only for names scored before industries were recorded
+    industries = [
+        (given[t].industry if t in given else by_ticker[t].industry) or (master.get(t) or {}).get("industry")
+        for t in pool
+    ]
+    sectors = [
+        (given[t].sector if t in given else by_ticker[t].sector) or (master.get(t) or {}).get("sector")
+        for t in pool
+    ]
+    targets = [max(0.0, given[t].weight) / given_total * 100.0 if t in given else 0.0 for t in pool]
+    scores = [(by_ticker[t].composite_score if t in by_ticker else given[t].composite_score) or 0.0 for t in pool]
+
+    def solve(targets, **turnover):
+        return solve_weights(
+            pool,
+            targets,
+            scores,
+            sectors,
+            industries if any(industries) else None,
+            count=target_count,
+            min_percent=int(round(cfg.min_weight * 100)),
+            max_percent=int(round(cfg.max_weight * 100)),
+            sector_cap_percent=int(round(cfg.sector_cap * 100)),
+            industry_cap_percent=int(round(cfg.industry_cap * 100)),
+            **turnover,
+        )
+
+    from_scratch = banded = None
+    held_in_band: list[str] = []
+    if previous is None:
+        weights = solve(targets)
+    else:
+        from_scratch = {t: w / 100.0 for t, w in solve(targets).items()}
+        prev = {t: w * 100.0 for t, w in previous.weights.items()}
+        banded = dict(zip(pool, targets))
+        held_in_band = _band_targets(banded, prev, cfg.no_trade_band * 100.0)
+        turnover = {"previous": [prev.get(t, 0.0) for t in pool], "turnover_penalty": cfg.turnover_penalty}
+        if cfg.max_turnover is not None:
+            # Previous names that left the pool are sold regardless and use up part of the cap
+            forced = sum(w for t, w in prev.items() if t not in banded)
+            turnover["max_turnover_percent"] = max(0.0, cfg.max_turnover * 100.0 - forced / 2)
+        try:
+            weights = solve([banded[t] for t in pool], **turnover)
+        except PortfolioInfeasibleError:
+            if cfg.max_turnover is None:
+                raise
+            typer.echo(f"[WARN] MAX_TURNOVER={cfg.max_turnover:.0%} is infeasible with the other constraints; ignoring it")
+            turnover.pop("max_turnover_percent")
+            weights = solve([banded[t] for t in pool], **turnover)
+        held_in_band = [t for t in held_in_band if weights.get(t, 0) == round(prev[t])]
+        targets = [banded[t] for t in pool]
+
+    result = []
+    for ticker, sector, industry, target in zip(pool, sectors, industries, targets):
+        if ticker not in weights:
+            if ticker in given:
+                typer.echo(f"  [OPT] Dropped {ticker} (target {target:.1f}%)")
+            continue
+        if ticker in given:
+            holding = given[ticker]
+            holding.weight = weights[ticker] / 100.0
+            holding.industry = holding.industry or industry
+        else:
+            cand = by_ticker[ticker]
+            holding = PortfolioHolding(
+                ticker=ticker,
+                weight=weights[ticker] / 100.0,
+                sector=sector,
+                industry=industry,
+                theme=cand.theme,
+                rationale=(
+                    f"Kept from the previous portfolio (composite score: {cand.composite_score:.3f})"
+                    if previous is not None and ticker in previous.weights
+                    else f"Added by optimizer (composite score: {cand.composite_score:.3f})"
+                ),
+                composite_score=cand.composite_score,
+            )
+            typer.echo(f"  [OPT] Added {ticker} at {weights[ticker]}% (score {cand.composite_score:.3f})")
+        result.append(holding)
+    distance = sum(abs(weights.get(t, 0) - target) for t, target in zip(pool, targets))
+    typer.echo(f"[INFO] Optimizer: {len(result)} holdings, {distance:.1f} percentage points from target weights")
+    return result, from_scratch, held_in_band
+
+
 def validate_portfolio(
     portfolio: Portfolio,
     min_weight: float,
@@ -286,49 +793,472 @@ def validate_portfolio(
     industry_cap: float,
     target_count: int = 20,
 ) -> tuple[bool, list[str]]:
-    """Validate portfolio constraints."""
-    errors = []
-    
-    # Check count
-    if len(portfolio.holdings) != target_count:
-        errors.append(f"Must have exactly {target_count} holdings, got {len(portfolio.holdings)}")
-    
-    # Check weights sum to 1.0
-    total_weight = sum(h.weight for h in portfolio.holdings)
-    if abs(total_weight - 1.0) > 0.001:  # Allow small floating point error
-        errors.append(f"Weights must sum to 1.0, got {total_weight:.6f}")
-    
-    # Check individual weights
-    for holding in portfolio.holdings:
-        if holding.weight < min_weight:
-            errors.append(f"{holding.ticker}: weight {holding.weight:.4f} below minimum {min_weight}")
-        if holding.weight > max_weight:
-            errors.append(f"{holding.ticker}: weight {holding.weight:.4f} above maximum {max_weight}")
-    
-    # Check sector caps (allow small tolerance after rebalancing attempts)
-    # After rebalancing, allow up to 2% over cap to avoid blocking submission
-    sector_allocation = calculate_sector_allocation(portfolio.holdings)
-    sector_cap_tolerance = sector_cap + 0.02  # Allow 2% over cap after rebalancing
-    for sector, weight in sector_allocation.items():
-        if weight > sector_cap_tolerance:
-            errors.append(f"Sector {sector}: {weight*100:.2f}% exceeds cap of {sector_cap*100:.0f}% (tolerance: {sector_cap_tolerance*100:.0f}%)")
-        elif weight > sector_cap + 0.001:  # Warn if slightly over but within tolerance
-            typer.echo(f"[WARN] Sector {sector}: {weight*100:.2f}% slightly over cap of {sector_cap*100:.0f}% but within tolerance")
-    
-    # Check industry caps (if we had industry data, for now just check we have it)
-    # Industry allocation would need industry data from candidates
-    
+    """Validate portfolio constraints (see constraints.check_portfolio).
+
+    Sector and industry caps allow a 2% overage after rebalancing so submission isn't
+    blocked; smaller overages are logged as warnings. Unclassified industries are not capped.
+    """
+    limits = ConstraintLimits(target_count, min_weight, max_weight, sector_cap, industry_cap)
+    holdings = from_holdings(portfolio.holdings)
+    violations = check_portfolio(holdings, limits, held=np.ones(len(portfolio.holdings), dtype=bool))
+    for v in violations:
+        if v.severity == "warning":
+            typer.echo(f"[WARN] {v.message}")
+    errors = [v.message for v in violations if v.severity == "error"]
     return len(errors) == 0, errors
 
 
+def _check_streamed_holding(
+    h_data: dict,
+    holdings_map: dict[str, ScoredStock],
+    min_weight: float,
+    max_weight: float,
+) -> None:
+    """Log problems with one streamed holding as soon as it arrives."""
+    ticker = h_data.get("ticker")
+    try:
+        weight = float(h_data.get("weight"))
+    except (TypeError, ValueError):
+        typer.echo(f"  [WARN] {ticker}: missing or invalid weight {h_data.get('weight')!r}")
+        return
+    if ticker not in holdings_map:
+        typer.echo(f"  [WARN] {ticker}: not in scored candidates")
+    elif weight < min_weight - 1e-6 or weight > max_weight + 1e-6:
+        typer.echo(f"  [WARN] {ticker}: weight {weight:.2%} outside {min_weight:.0%}-{max_weight:.0%}")
+    else:
+        typer.echo(f"  Received {ticker} ({weight:.2%})")
+
+
+def parse_llm_holdings(result: dict, holdings_map: dict[str, ScoredStock]) -> list[PortfolioHolding]:
+    """Holdings from an LLM portfolio response, keeping only tickers among the scored candidates."""
+    holdings_data = result.get("holdings", []) if isinstance(result, dict) else []
+    if len(holdings_data) != 20:
+        typer.echo(f"[WARN] LLM returned {len(holdings_data)} holdings, expected 20")
+    
+    # Create holdings with composite scores from scored data
+    holdings = []
+    seen = set()
+    for h_data in holdings_data:
+        ticker = h_data.get("ticker") if isinstance(h_data, dict) else None
+        if ticker not in holdings_map:
+            typer.echo(f"[WARN] Ticker {ticker} from LLM not found in scored candidates")
+            continue
+        if ticker in seen:
+            continue
+        try:
+            weight = float(h_data["weight"])
+        except (KeyError, TypeError, ValueError):
+            typer.echo(f"[WARN] Ticker {ticker} from LLM has no usable weight")
+            continue
+        seen.add(ticker)
+        scored_stock = holdings_map[ticker]
+        holdings.append(PortfolioHolding(
+            ticker=ticker,
+            weight=weight,
+            sector=h_data.get("sector") or scored_stock.sector,
+            industry=scored_stock.industry or h_data.get("industry"),
+            theme=h_data.get("theme") or scored_stock.theme,
+            rationale=h_data.get("rationale"),
+            composite_score=scored_stock.composite_score,
+        ))
+    return holdings
+
+
+def score_implied_weights(scores: list[float], min_weight: float, max_weight: float) -> list[float]:
+    """Weights proportional to score (shifted positive), clipped to [min, max] and summing to 1.
+
+    Water-filling: w_i = clip(k * s_i, min, max) with k found by bisection.
+    """
+    n = len(scores)
+    low_score, high_score = min(scores), max(scores)
+    spread = high_score - low_score
+    if spread <= 0:
+        return [1.0 / n] * n
+    # The lowest-ranked name keeps a floor of 1/n of the spread so it isn't zeroed out
+    shifted = [s - low_score + spread / n for s in scores]
+    lo, hi = 0.0, max_weight / min(shifted) * 2
+    for _ in range(100):
+        k = (lo + hi) / 2
+        total = sum(min(max_weight, max(min_weight, k * s)) for s in shifted)
+        if total > 1.0:
+            hi = k
+        else:
+            lo = k
+    return [min(max_weight, max(min_weight, lo * s)) for s in shifted]
+
+
+def score_only_holdings(
+    shortlist: list[ScoredStock],
+    cfg,
+    target_count: int = 20,
+    weighting: str = "score",
+) -> list[PortfolioHolding]:
+    """Top `target_count` names of the (score-ranked, sector-covering) shortlist with score-implied weights.
+
+    `weighting` "tiered" weights by rank in tiers of TIER_SIZE names instead of by score.
+    Caps are enforced afterwards by finalize_portfolio, exactly as for LLM holdings.
+    """
+    picks = sorted(shortlist, key=lambda c: c.composite_score or 0, reverse=True)[:target_count]
+    if weighting == "tiered":
+        basis = [float(len(picks) // TIER_SIZE - i // TIER_SIZE) for i in range(len(picks))]
+    else:
+        basis = [c.composite_score or 0 for c in picks]
+    weights = score_implied_weights(basis, cfg.min_weight, cfg.max_weight)
+    return [
+        PortfolioHolding(
+            ticker=c.ticker,
+            weight=w,
+            sector=c.sector,
+            industry=c.industry,
+            theme=c.theme,
+            rationale=f"Score-only constructor (composite score: {c.composite_score:.3f})",
+            composite_score=c.composite_score,
+        )
+        for c, w in zip(picks, weights)
+    ]
+
+
+def ex_ante_risk(weights: dict[str, float], universe: list[str], cfg) -> Optional[RiskSummary]:
+    """Ex-ante risk of `weights` from the day's risk model over `universe` (None without price history)."""
+    try:
+        model = load_risk_model(
+            universe,
+            cfg.effective_date,
+            lookback_days=cfg.risk_model_lookback_days,
+            min_days=cfg.risk_model_min_days,
+            price_dir=Path(cfg.price_store_dir),
+        )
+    except Exception as e:
+        typer.echo(f"[WARN] Risk model unavailable: {e}")
+        return None
+    if not model.tickers:
+        return None
+    return RiskSummary(**model.summary(weights))
+
+
+def finalize_portfolio(
+    holdings: list[PortfolioHolding],
+    scored_resp: ScoredCandidatesResponse,
+    cfg,
+    target_count: int = 20,
+    previous: Optional[PreviousPortfolio] = None,
+    notional: float = 1_000_000.0,
+) -> tuple[Portfolio, list[str]]:
+    """Enforce count, weight bounds and caps on proposed holdings; returns (portfolio, validation errors).
+
+    With a previous portfolio, construction is turnover-aware and the portfolio carries a
+    TurnoverReport (trade principals at `notional`).
+    Raises PortfolioInfeasibleError or RuntimeError if the caps can't be met at all.
+    """
+    selected_tickers = {h.ticker for h in holdings}
+    from_scratch = None
+    held_in_band: list[str] = []
+    if cfg.portfolio_optimizer == "milp" and optimizer_available():
+        holdings, from_scratch, held_in_band = optimize_holdings(holdings, scored_resp, cfg, target_count, previous)
+    else:
+        if cfg.portfolio_optimizer == "milp":
+            typer.echo("[WARN] scipy not installed; using the legacy sector-cap rebalancer")
+        if previous is not None:
+            # Only the no-trade band applies here; the turnover penalty and cap need the MILP
+            targets = {h.ticker: h.weight for h in holdings}
+            held_in_band = _band_targets(targets, previous.weights, cfg.no_trade_band)
+            for h in holdings:
+                h.weight = targets[h.ticker]
+        holdings = _legacy_fill_and_rebalance(holdings, scored_resp, selected_tickers, cfg)
+        held_in_band = [
+            h.ticker for h in holdings
+            if h.ticker in held_in_band and abs(h.weight - previous.weights[h.ticker]) < 1e-9
+        ]
+    
+    portfolio = Portfolio(
+        holdings=holdings,
+        total_weight=sum(h.weight for h in holdings),
+        sector_allocation=calculate_sector_allocation(holdings),
+        industry_allocation=calculate_industry_allocation(holdings),
+        portfolio_date=date.today(),
+        horizon_end=cfg.portfolio_horizon_end,
+        constructed_at=datetime.now(),
+    )
+    weights = {h.ticker: h.weight for h in holdings}
+    portfolio.risk = ex_ante_risk(weights, [c.ticker for c in scored_resp.candidates], cfg)
+    if previous is not None:
+        prices = {c.ticker: c.price for c in scored_resp.candidates if c.price and c.price > 0}
+        eligible = {c.ticker for c in scored_resp.candidates if c.risk_flags.passed_all_checks}
+        principal = trade_principal(weights, previous, prices, notional)
+        scratch_principal = trade_principal(from_scratch, previous, prices, notional) if from_scratch else None
+        portfolio.turnover = TurnoverReport(
+            previous_portfolio=str(previous.path),
+            turnover=one_way_turnover(weights, previous.weights),
+            from_scratch_turnover=one_way_turnover(from_scratch, previous.weights) if from_scratch else None,
+            notional=notional,
+            trades_principal=round(principal, 2),
+            principal_avoided=round(scratch_principal - principal, 2) if scratch_principal is not None else None,
+            held_in_band=sorted(held_in_band),
+            forced_sells=sorted(t for t in previous.weights if t not in eligible),
+        )
+    
+    _, errors = validate_portfolio(
+        portfolio,
+        cfg.min_weight,
+        cfg.max_weight,
+        cfg.sector_cap,
+        cfg.industry_cap,
+        target_count,
+    )
+    return portfolio, errors
+
+
+def _llm_portfolio(
+    shortlist: list[ScoredStock],
+    holdings_map: dict[str, ScoredStock],
+    scored_resp: ScoredCandidatesResponse,
+    cfg,
+    chosen_model: str,
+    deadline: float,
+    stream: bool,
+    previous: Optional[PreviousPortfolio],
+    notional: float,
+    temperature: float = 0.2,
+    style: Optional[str] = None,
+) -> tuple[Optional[Portfolio], list[str], dict, Optional[str]]:
+    """One LLM portfolio: (portfolio or None on failure, validation errors, prompts data, failure reason).
+
+    Any failure (API error, deadline, too few usable holdings, infeasible caps, failed
+    validation) returns None with the reason instead of raising.
+    """
+    system = system_portfolio()
+    if style:
+        system += f"\n- {style}"
+    user, user_tokens = build_portfolio_prompt(shortlist, cfg)
+    prompt_tokens = estimate_tokens(system) + user_tokens
+    typer.echo(
+        f"[INFO] Portfolio prompt: ~{prompt_tokens} tokens "
+        f"(budget {cfg.portfolio_prompt_token_budget} for user prompt)"
+    )
+    
+    portfolio = None
+    errors: list[str] = []
+    failure = None
+    result = None
+    try:
+        typer.echo("Calling LLM to construct portfolio...")
+        client = get_client()
+        if stream:
+            # Check holdings as they arrive; a cut-off response keeps what was received
+            llm_stream = chat_json_stream(
+                client, chosen_model, system, user, "holdings",
+                temperature=temperature, timeout=180.0, deadline=deadline,
+            )
+            for h_data in llm_stream:
+                _check_streamed_holding(h_data, holdings_map, cfg.min_weight, cfg.max_weight)
+            if not llm_stream.complete:
+                typer.echo(
+                    f"[WARN] Portfolio response cut off ({llm_stream.error}); "
+                    f"keeping {len(llm_stream.items)} holdings received"
+                )
+            result = llm_stream.result()
+        else:
+            result = chat_json(
+                client, chosen_model, system, user, temperature=temperature, timeout=180.0, deadline=deadline
+            )
+        
+        holdings = parse_llm_holdings(result, holdings_map)
+        if len(holdings) < MIN_LLM_HOLDINGS:
+            raise ValueError(f"only {len(holdings)} usable holdings in the LLM response")
+        portfolio, errors = finalize_portfolio(holdings, scored_resp, cfg, previous=previous, notional=notional)
+        if errors:
+            portfolio = None
+            raise ValueError("validation failed: " + "; ".join(errors))
+    except Exception as e:
+        failure = f"{type(e).__name__}: {e}"
+        if isinstance(e, PortfolioInfeasibleError):
+            failure += " (" + "; ".join(e.report) + ")"
+    
+    prompts_data = {
+        "system_prompt": system,
+        "user_prompt": user,
+        "llm_response": result,
+        "model": chosen_model,
+        "temperature": temperature,
+        "prompt_tokens_estimate": prompt_tokens,
+        "shortlist": [c.ticker for c in shortlist],
+        "constructor": "llm" if portfolio is not None else "score",
+        "fallback_reason": failure,
+        "timestamp": datetime.now().isoformat(),
+    }
+    return portfolio, errors, prompts_data, failure
+
+
+def _score_portfolio(
+    shortlist: list[ScoredStock],
+    scored_resp: ScoredCandidatesResponse,
+    cfg,
+    previous: Optional[PreviousPortfolio],
+    notional: float,
+    weighting: str = "score",
+) -> tuple[Portfolio, list[str]]:
+    holdings = score_only_holdings(shortlist, cfg, weighting=weighting)
+    return finalize_portfolio(holdings, scored_resp, cfg, previous=previous, notional=notional)
+
+
+def portfolio_metrics(portfolio: Portfolio) -> dict[str, Optional[float]]:
+    """Ex-ante selection metrics: weighted composite score, volatility, beta and score per unit of risk."""
+    total = sum(h.weight for h in portfolio.holdings) or 1.0
+    score = sum(h.weight * (h.composite_score or 0.0) for h in portfolio.holdings) / total
+    vol = portfolio.risk.volatility if portfolio.risk is not None else None
+    return {
+        "score": score,
+        "volatility": vol,
+        "beta": portfolio.risk.beta if portfolio.risk is not None else None,
+        "score_per_risk": score / vol if vol else None,
+        "turnover": portfolio.turnover.turnover if portfolio.turnover is not None else None,
+    }
+
+
+def select_variant(metrics: dict[str, dict], selection: str) -> Optional[str]:
+    """Name of the best variant by `selection` (higher score / score per risk, lower volatility)."""
+    def key(name: str) -> float:
+        m = metrics[name]
+        value = m.get(selection)
+        if value is None:
+            value = m["score"] if selection == "score_per_risk" else None
+        if value is None:
+            return -math.inf
+        return -value if selection == "volatility" else value
+    
+    return max(metrics, key=key) if metrics else None
+
+
+def _build_variants(
+    variant_names: list[str],
+    shortlist: list[ScoredStock],
+    holdings_map: dict[str, ScoredStock],
+    scored_resp: ScoredCandidatesResponse,
+    cfg,
+    chosen_model: str,
+    deadline: float,
+    stream: bool,
+    previous: Optional[PreviousPortfolio],
+    notional: float,
+    out_dir: Path,
+) -> tuple[Portfolio, list[str], dict]:
+    """Build all variants concurrently, write them to `out_dir`/variants/ and return the selected one.
+
+    Variants are compared on ex-ante metrics from the shared risk model (PORTFOLIO_VARIANT_SELECTION);
+    variants that fail or don't validate are reported and skipped.
+    """
+    variants = [PORTFOLIO_VARIANTS[name] for name in variant_names]
+    if previous is None:
+        # Turnover-only variants would duplicate their base variant without a previous portfolio
+        distinct = [v for v in variants if not (v.overrides and set(v.overrides) <= TURNOVER_SETTINGS)]
+        skipped = [v.name for v in variants if v not in distinct]
+        if skipped and distinct:
+            typer.echo(f"  [INFO] No previous portfolio; skipping turnover-only variants: {', '.join(skipped)}")
+            variants = distinct
+    variant_names = [v.name for v in variants]
+    # Estimate the day's risk model once so the concurrent builds all read the cache
+    ex_ante_risk({}, [c.ticker for c in scored_resp.candidates], cfg)
+    
+    def build_one(variant: PortfolioVariant):
+        variant_cfg = cfg.model_copy(update=variant.overrides) if variant.overrides else cfg
+        started = time.perf_counter()
+        if variant.constructor == "llm":
+            portfolio, errors, prompts_data, failure = _llm_portfolio(
+                shortlist, holdings_map, scored_resp, variant_cfg, chosen_model, deadline, stream,
+                previous, notional, temperature=variant.temperature, style=variant.style,
+            )
+        else:
+            prompts_data = {
+                "constructor": "score",
+                "weighting": variant.weighting,
+                "shortlist": [c.ticker for c in shortlist],
+                "timestamp": datetime.now().isoformat(),
+            }
+            try:
+                portfolio, errors = _score_portfolio(
+                    shortlist, scored_resp, variant_cfg, previous, notional, weighting=variant.weighting
+                )
+                failure = "validation failed: " + "; ".join(errors) if errors else None
+            except Exception as e:
+                portfolio, errors, failure = None, [], f"{type(e).__name__}: {e}"
+        return portfolio, errors, prompts_data, failure, time.perf_counter() - started
+    
+    typer.echo(f"Building {len(variants)} portfolio variants concurrently: {', '.join(variant_names)}")
+    with ThreadPoolExecutor(max_workers=len(variants)) as pool:
+        results = dict(zip(variant_names, pool.map(build_one, variants)))
+    
+    variants_dir = out_dir / "variants"
+    variants_dir.mkdir(parents=True, exist_ok=True)
+    metrics, summary = {}, {}
+    for name, (portfolio, errors, prompts_data, failure, elapsed) in results.items():
+        summary[name] = {"seconds": round(elapsed, 3), "error": failure}
+        if portfolio is None or failure:
+            typer.echo(f"  [WARN] Variant {name} failed: {failure}")
+            continue
+        (variants_dir / f"{name}.json").write_text(portfolio.model_dump_json(indent=2), encoding='utf-8')
+        metrics[name] = portfolio_metrics(portfolio)
+        summary[name].update(metrics[name])
+    
+    selected = select_variant(metrics, cfg.portfolio_variant_selection)
+    for name, m in metrics.items():
+        vol = f"{m['volatility']:.1%}" if m["volatility"] is not None else "n/a"
+        beta = f"{m['beta']:.2f}" if m["beta"] is not None else "n/a"
+        marker = "*" if name == selected else " "
+        typer.echo(
+            f"  {marker} {name:<20} score {m['score']:.3f}  vol {vol}  beta {beta}  "
+            f"({summary[name]['seconds']:.1f}s)"
+        )
+    (variants_dir / "summary.json").write_text(json.dumps({
+        "selection": cfg.portfolio_variant_selection,
+        "selected": selected,
+        "variants": summary,
+    }, indent=2), encoding='utf-8')
+    
+    if selected is None:
+        typer.echo("[ERROR] No portfolio variant succeeded")
+        raise typer.Exit(code=1)
+    typer.echo(f"[OK] Selected variant {selected} by {cfg.portfolio_variant_selection}")
+    portfolio, errors, prompts_data, _, _ = results[selected]
+    prompts_data["variant"] = selected
+    return portfolio, errors, prompts_data
+
+
 def construct_portfolio(
     scored_file: Path,
     out_json: Path,
     out_excel: Optional[Path] = None,
     model: Optional[str] = None,
+    time_budget: float = 300.0,
+    stream: bool = True,
+    constructor: Optional[str] = None,
+    fallback: bool = True,
+    previous_portfolio: Optional[Path] = None,
+    notional: float = 1_000_000.0,
+    variants: Optional[list[str]] = None,
 ) -> Portfolio:
-    """Construct portfolio from scored candidates."""
+    """Construct portfolio from scored candidates.
+    
+    `constructor` is "llm" or "score" (defaults to PORTFOLIO_CONSTRUCTOR). With `fallback`, an
+    LLM failure (error, timeout, unusable or infeasible holdings) falls back to "score".
+    With `previous_portfolio`, construction is turnover-aware (see optimize_holdings).
+    With `variants` (names in PORTFOLIO_VARIANTS), those are built concurrently and the best by
+    ex-ante metrics becomes the portfolio (see _build_variants).
+    """
     cfg = load_config()
+    constructor = constructor or cfg.portfolio_constructor
+    if constructor not in PORTFOLIO_CONSTRUCTORS:
+        typer.echo(f"Unknown constructor {constructor!r}; expected one of {PORTFOLIO_CONSTRUCTORS}")
+        raise typer.Exit(code=1)
+    if variants is None and cfg.portfolio_variants:
+        variants = [v.strip() for v in cfg.portfolio_variants.split(",") if v.strip()]
+    unknown = [v for v in variants or [] if v not in PORTFOLIO_VARIANTS]
+    if unknown:
+        typer.echo(f"Unknown variants {unknown}; expected any of {list(PORTFOLIO_VARIANTS)}")
+        raise typer.Exit(code=1)
+    if cfg.portfolio_variant_selection not in VARIANT_SELECTIONS:
+        typer.echo(f"Unknown PORTFOLIO_VARIANT_SELECTION; expected one of {VARIANT_SELECTIONS}")
+        raise typer.Exit(code=1)
+    deadline = deadline_after(time_budget)
     chosen_model = model or cfg.openai_model
     
     # Load scored candidates
@@ -349,208 +1279,108 @@ def construct_portfolio(
     
     typer.echo(f"Constructing portfolio from {len(scored_resp.candidates)} scored candidates...")
     
-    # Prepare candidate data for LLM
-    candidates_dict = []
-    for cand in scored_resp.candidates:
-        cand_dict = {
-            "ticker": cand.ticker,
-            "sector": cand.sector,
-            "theme": cand.theme,
-            "composite_score": cand.composite_score,
-            "price": cand.price,
-            "sentiment": {
-                "overall_sentiment": cand.sentiment.overall_sentiment,
-                "sentiment_score": cand.sentiment.sentiment_score,
-            } if cand.sentiment else {},
-            "news_summary": cand.news_summary,  # Include news summary
-        }
-        candidates_dict.append(cand_dict)
-    
-    # Call LLM to construct portfolio
-    client = get_client()
-    system = system_portfolio()
-    user = user_portfolio(
-        scored_candidates=candidates_dict,
-        remaining_days=cfg.remaining_days,
+    previous = None
+    if previous_portfolio is not None:
+        try:
+            previous = load_previous_portfolio(previous_portfolio)
+            typer.echo(f"[INFO] Turnover-aware against {previous_portfolio} ({len(previous.weights)} holdings)")
+        except Exception as e:
+            typer.echo(f"[WARN] Could not load previous portfolio {previous_portfolio}: {e}; building from scratch")
+    
+    # Shortlist candidates for the LLM (score-ranked with sector coverage, token-budgeted)
+    shortlist = shortlist_candidates(
+        scored_resp.candidates,
+        shortlist_size=cfg.portfolio_shortlist_size,
         min_weight=cfg.min_weight,
         max_weight=cfg.max_weight,
         sector_cap=cfg.sector_cap,
-        industry_cap=cfg.industry_cap,
-        horizon_end=cfg.portfolio_horizon_end,
+    )
+    shortlist_sectors = {c.sector or "Unknown" for c in shortlist}
+    typer.echo(
+        f"Shortlisted {len(shortlist)} of {len(scored_resp.candidates)} candidates "
+        f"across {len(shortlist_sectors)} sectors"
     )
     
-    typer.echo("Calling LLM to construct portfolio...")
-    result = chat_json(client, chosen_model, system, user, timeout=180.0)
-    
-    # Save prompts and response for submission
-    prompts_data = {
-        "system_prompt": system,
-        "user_prompt": user,
-        "llm_response": result,
-        "model": chosen_model,
-        "timestamp": datetime.now().isoformat(),
-    }
-    
-    # Save prompts file next to portfolio file
+    holdings_map = {c.ticker: c for c in scored_resp.candidates}
     prompts_file = Path(out_json).parent / "prompts_and_response.json"
-    prompts_file.write_text(json.dumps(prompts_data, indent=2), encoding='utf-8')
-    typer.echo(f"Saved prompts and response to {prompts_file}")
+    Path(out_json).parent.mkdir(parents=True, exist_ok=True)
     
-    # Parse and validate
-    try:
-        holdings_data = result.get("holdings", [])
-        if len(holdings_data) != 20:
-            typer.echo(f"[WARN] LLM returned {len(holdings_data)} holdings, expected 20")
-        
-        # Create holdings with composite scores from scored data
-        holdings_map = {c.ticker: c for c in scored_resp.candidates}
-        holdings = []
-        selected_tickers = set()
-        for h_data in holdings_data:
-            ticker = h_data["ticker"]
-            if ticker not in holdings_map:
-                typer.echo(f"[WARN] Ticker {ticker} from LLM not found in scored candidates")
-                continue
-            
-            selected_tickers.add(ticker)
-            scored_stock = holdings_map[ticker]
-            holding = PortfolioHolding(
-                ticker=ticker,
-                weight=float(h_data["weight"]),
-                sector=h_data.get("sector") or scored_stock.sector,
-                theme=h_data.get("theme") or scored_stock.theme,
-                rationale=h_data.get("rationale"),
-                composite_score=scored_stock.composite_score,
-            )
-            holdings.append(holding)
-        
-        # If we have fewer than 20 holdings, add the next best candidates
-        if len(holdings) < 20:
-            missing_count = 20 - len(holdings)
-            typer.echo(f"[WARN] Only {len(holdings)} holdings from LLM, adding {missing_count} top remaining candidates")
-            
-            # Calculate current total weight before adding
-            current_total = sum(h.weight for h in holdings)
-            
-            # Sort all candidates by composite score (highest first)
-            remaining_candidates = [
-                c for c in scored_resp.candidates 
-                if c.ticker not in selected_tickers
-            ]
-            remaining_candidates.sort(key=lambda x: x.composite_score or 0, reverse=True)
-            
-            # Calculate weight for new stocks such that after normalization they meet minimum
-            # If we add M stocks with weight w each, total becomes T + M*w
-            # After normalization: w / (T + M*w) >= min_weight
-            # Solving: w >= (min_weight * T) / (1 - min_weight * M)
-            if missing_count > 0 and cfg.min_weight * missing_count < 1.0:
-                added_weight_per_stock = (cfg.min_weight * current_total) / (1.0 - cfg.min_weight * missing_count)
-                # Ensure we don't exceed max_weight
-                added_weight_per_stock = min(added_weight_per_stock, cfg.max_weight)
-            else:
-                # Fallback: use minimum weight
-                added_weight_per_stock = cfg.min_weight
-            
-            # Add the top remaining candidates
-            for i in range(min(missing_count, len(remaining_candidates))):
-                cand = remaining_candidates[i]
-                holding = PortfolioHolding(
-                    ticker=cand.ticker,
-                    weight=added_weight_per_stock,
-                    sector=cand.sector,
-                    theme=cand.theme,
-                    rationale=f"Added as top remaining candidate (composite score: {cand.composite_score:.3f})",
-                    composite_score=cand.composite_score,
-                )
-                holdings.append(holding)
-                selected_tickers.add(cand.ticker)
-                typer.echo(f"  Added {cand.ticker} (score: {cand.composite_score:.3f}, weight: {added_weight_per_stock:.4f})")
-            
-            # Normalize weights to sum to 1.0
-            total_weight = sum(h.weight for h in holdings)
-            if abs(total_weight - 1.0) > 0.001:  # Only normalize if significantly off
-                typer.echo(f"[INFO] Normalizing weights from {total_weight:.6f} to 1.0")
-                for holding in holdings:
-                    holding.weight = holding.weight / total_weight
-                
-                # After normalization, ensure all weights meet minimum requirement
-                # If any are below minimum, redistribute from holdings above minimum
-                below_min = [h for h in holdings if h.weight < cfg.min_weight]
-                if below_min:
-                    typer.echo(f"[INFO] Adjusting {len(below_min)} holdings below minimum weight")
-                    # Calculate total deficit
-                    deficit = sum(cfg.min_weight - h.weight for h in below_min)
-                    # Get holdings above minimum that we can reduce
-                    above_min = [h for h in holdings if h.weight > cfg.min_weight]
-                    
-                    if above_min and deficit > 0:
-                        # Calculate total weight we can reduce from above-min holdings
-                        reducible = sum(h.weight - cfg.min_weight for h in above_min)
-                        if reducible >= deficit:
-                            # Reduce proportionally from above-min holdings
-                            for h in below_min:
-                                needed = cfg.min_weight - h.weight
-                                # Reduce proportionally from above-min holdings
-                                for ah in above_min:
-                                    reduction = needed * (ah.weight - cfg.min_weight) / reducible
-                                    ah.weight -= reduction
-                                h.weight = cfg.min_weight
-                            
-                            # Re-normalize to ensure total is exactly 1.0
-                            total_weight = sum(h.weight for h in holdings)
-                            if abs(total_weight - 1.0) > 0.001:
-                                for holding in holdings:
-                                    holding.weight = holding.weight / total_weight
-                        else:
-                            typer.echo(f"[WARN] Cannot meet minimum weight requirement for all holdings (deficit: {deficit:.6f}, reducible: {reducible:.6f})")
-        
-        holdings = enforce_sector_caps_and_integer_weights(
-            holdings,
-            scored_resp,
-            selected_tickers,
-            cfg.min_weight,
-            cfg.max_weight,
-            cfg.sector_cap,
+    if variants:
+        portfolio, errors, prompts_data = _build_variants(
+            variants, shortlist, holdings_map, scored_resp, cfg, chosen_model,
+            deadline, stream, previous, notional, Path(out_json).parent,
         )
-
-        if len(holdings) != 20:
-            typer.echo(f"[ERROR] Only {len(holdings)} valid holdings after parsing, need 20")
-            raise typer.Exit(code=1)
-        
-        # Calculate allocations
-        sector_allocation = calculate_sector_allocation(holdings)
-        
-        portfolio = Portfolio(
-            holdings=holdings,
-            total_weight=sum(h.weight for h in holdings),
-            sector_allocation=sector_allocation,
-            industry_allocation={},  # Would need industry data
-            portfolio_date=date.today(),
-            horizon_end=cfg.portfolio_horizon_end,
-            constructed_at=datetime.now(),
-        )
-        
-        # Validate
-        is_valid, errors = validate_portfolio(
-            portfolio,
-            cfg.min_weight,
-            cfg.max_weight,
-            cfg.sector_cap,
-            cfg.industry_cap,
+        prompts_file.write_text(json.dumps(prompts_data, indent=2), encoding='utf-8')
+        typer.echo(f"Saved prompts and response to {prompts_file}")
+        constructor = None
+    else:
+        portfolio = None
+        errors: list[str] = []
+    
+    if constructor == "llm":
+        portfolio, errors, prompts_data, fallback_reason = _llm_portfolio(
+            shortlist, holdings_map, scored_resp, cfg, chosen_model, deadline, stream, previous, notional
         )
+        if portfolio is None:
+            if not fallback:
+                typer.echo(f"[ERROR] LLM portfolio construction failed: {fallback_reason}")
+                if prompts_data["llm_response"] is not None:
+                    typer.echo(f"LLM response: {json.dumps(prompts_data['llm_response'], indent=2)}")
+                raise typer.Exit(code=1)
+            typer.echo(f"[WARN] LLM portfolio construction failed ({fallback_reason}); using the score-only constructor")
         
-        if not is_valid:
+        # Save prompts and response for submission
+        prompts_file.write_text(json.dumps(prompts_data, indent=2), encoding='utf-8')
+        typer.echo(f"Saved prompts and response to {prompts_file}")
+    
+    if portfolio is None:
+        # Deterministic, LLM-free construction (selected, or falling back)
+        construct_start = time.perf_counter()
+        try:
+            portfolio, errors = _score_portfolio(shortlist, scored_resp, cfg, previous, notional)
+        except PortfolioInfeasibleError as e:
+            typer.echo(f"[ERROR] {e}:")
+            for reason in e.report:
+                typer.echo(f"  - {reason}")
+            raise typer.Exit(code=1)
+        except Exception as e:
+            typer.echo(f"[ERROR] Score-only portfolio construction failed: {e}")
+            raise typer.Exit(code=1)
+        typer.echo(f"[OK] Score-only portfolio built in {(time.perf_counter() - construct_start) * 1000:.0f} ms")
+        if errors:
             typer.echo("[ERROR] Portfolio validation failed:")
             for error in errors:
                 typer.echo(f"  - {error}")
             raise typer.Exit(code=1)
-        
-        typer.echo("[OK] Portfolio validation passed")
-        
-    except Exception as e:
-        typer.echo(f"Failed to parse portfolio from LLM response: {e}")
-        typer.echo(f"LLM response: {json.dumps(result, indent=2)}")
-        raise typer.Exit(code=1)
+        if constructor == "score":
+            prompts_file.write_text(json.dumps({
+                "constructor": "score",
+                "shortlist": [c.ticker for c in shortlist],
+                "timestamp": datetime.now().isoformat(),
+            }, indent=2), encoding='utf-8')
+    
+    typer.echo("[OK] Portfolio validation passed")
+    if portfolio.risk is not None:
+        risk = portfolio.risk
+        top = sorted(risk.risk_contributions.items(), key=lambda x: x[1], reverse=True)[:3]
+        typer.echo(
+            f"[INFO] Ex-ante volatility {risk.volatility:.1%}, beta {risk.beta:.2f} "
+            f"({risk.coverage:.0%} of weight covered); top risk: "
+            + ", ".join(f"{t} {share:.0%}" for t, share in top)
+        )
+    if portfolio.turnover is not None:
+        report = portfolio.turnover
+        line = f"[INFO] Turnover {report.turnover:.1%}"
+        if report.from_scratch_turnover is not None:
+            line += f" (from scratch: {report.from_scratch_turnover:.1%})"
+        line += f"; trades principal ${report.trades_principal:,.0f} at ${report.notional:,.0f}"
+        if report.principal_avoided is not None:
+            line += f", ${report.principal_avoided:,.0f} avoided"
+        typer.echo(line)
+        if report.held_in_band:
+            typer.echo(f"  Held by the {cfg.no_trade_band:.0%} no-trade band: {', '.join(report.held_in_band)}")
+        if report.forced_sells:
+            typer.echo(f"  No longer eligible (sold): {', '.join(report.forced_sells)}")
     
     # Write JSON
     Path(out_json).parent.mkdir(parents=True, exist_ok=True)
@@ -580,6 +1410,7 @@ def construct_portfolio(
                     "Ticker": holding.ticker,
                     "Weight (%)": holding.weight * 100,
                     "Sector": holding.sector or "Unknown",
+                    "Industry": holding.industry or "Unknown",
                     "Theme": holding.theme or "None",
                     "Composite Score": holding.composite_score or 0.0,
                     "Rationale": holding.rationale or "",
@@ -655,6 +1486,149 @@ def construct_portfolio(
     return portfolio
 
 
+def _replay_previous(run_folder: Path, original: Optional[Portfolio]) -> Optional[PreviousPortfolio]:
+    """The previous portfolio a run was built against (from its turnover report), if still on disk."""
+    if original is None or original.turnover is None:
+        return None
+    path = Path(original.turnover.previous_portfolio)
+    if not path.exists():
+        # Recorded relative to another working directory: look for the sibling run folder
+        path = run_folder.parent / path.parent.name / path.name
+    if not path.exists():
+        typer.echo(f"[WARN] Previous portfolio {original.turnover.previous_portfolio} not found; replaying from scratch")
+        return None
+    return load_previous_portfolio(path)
+
+
+def replay_portfolio(run_folder: Path, cfg, notional: Optional[float] = None) -> tuple[Portfolio, list[str], str]:
+    """Rebuild a run's portfolio from its saved prompts_and_response.json without calling the LLM.
+
+    The stored LLM response goes through the same holdings parsing and finalize_portfolio
+    (missing-holding fill, caps and integer weights, validation) as a live build; score-only
+    runs are rebuilt from the stored shortlist. Variant runs use the selected variant's config.
+    Turnover-aware runs replay against the same previous portfolio and notional when present.
+    The ex-ante risk model is the one for the run's date (from the folder name).
+
+    Returns (portfolio, validation errors, constructor replayed).
+    Raises ValueError if the run has nothing to replay.
+    """
+    prompts_file = run_folder / "prompts_and_response.json"
+    scored_file = run_folder / "scored_candidates.json"
+    for required in (prompts_file, scored_file):
+        if not required.exists():
+            raise ValueError(f"{required.name} not found in {run_folder}")
+    prompts = json.loads(prompts_file.read_text(encoding='utf-8'))
+    scored_resp = ScoredCandidatesResponse.model_validate_json(scored_file.read_text(encoding='utf-8'))
+    holdings_map = {c.ticker: c for c in scored_resp.candidates}
+    original = None
+    if (run_folder / "portfolio.json").exists():
+        original = Portfolio.model_validate_json((run_folder / "portfolio.json").read_text(encoding='utf-8'))
+    
+    # Estimate risk (and anything else keyed on "today") as of the run, not the replay
+    try:
+        run_date = datetime.strptime(run_folder.name, "%Y-%m-%d_%H-%M-%S").date()
+    except ValueError:
+        run_date = original.portfolio_date if original is not None else None
+    if run_date is not None:
+        cfg = cfg.model_copy(update={"backtest_mode": True, "backtest_date": run_date})
+    variant = PORTFOLIO_VARIANTS.get(prompts.get("variant") or "")
+    if variant is not None and variant.overrides:
+        cfg = cfg.model_copy(update=variant.overrides)
+    previous = _replay_previous(run_folder, original)
+    if notional is None:
+        notional = original.turnover.notional if original is not None and original.turnover is not None else 1_000_000.0
+    
+    constructor = prompts.get("constructor", "llm")  # Runs before the score constructor only had LLM responses
+    if constructor == "llm":
+        if prompts.get("llm_response") is None:
+            raise ValueError("no stored LLM response")
+        holdings = parse_llm_holdings(prompts["llm_response"], holdings_map)
+        if len(holdings) < MIN_LLM_HOLDINGS:
+            raise ValueError(f"only {len(holdings)} usable holdings in the stored LLM response")
+    else:
+        shortlist = [holdings_map[t] for t in prompts.get("shortlist", []) if t in holdings_map]
+        if not shortlist:
+            raise ValueError("no stored shortlist for the score-only constructor")
+        holdings = score_only_holdings(shortlist, cfg, weighting=prompts.get("weighting", "score"))
+    
+    portfolio, errors = finalize_portfolio(holdings, scored_resp, cfg, previous=previous, notional=notional)
+    if original is not None:
+        portfolio.portfolio_date = original.portfolio_date
+    return portfolio, errors, constructor
+
+
+def portfolio_diff(replayed: Portfolio, original: Portfolio) -> dict:
+    """Names added/removed and the largest weight change between two portfolios."""
+    new = {h.ticker: h.weight for h in replayed.holdings}
+    old = {h.ticker: h.weight for h in original.holdings}
+    max_change = max((abs(new.get(t, 0.0) - old.get(t, 0.0)) for t in set(new) | set(old)), default=0.0)
+    return {
+        "added": sorted(set(new) - set(old)),
+        "removed": sorted(set(old) - set(new)),
+        "max_weight_change": round(max_change, 6),
+        "changed": max_change > 1e-9,
+    }
+
+
+def replay_runs(
+    run_folders: list[Path],
+    cfg,
+    notional: Optional[float] = None,
+    out_json: Optional[Path] = None,
+    fail_on_diff: bool = False,
+) -> list[dict]:
+    """Replay each run, compare with its stored portfolio.json, and print one line per run.
+
+    A single run's replay is written to `out_json` (default <run>/replay_portfolio.json); for
+    several runs `out_json` receives the summary instead. Exits 1 if any replay fails
+    validation, or differs from the stored portfolio with `fail_on_diff`.
+    """
+    started = time.perf_counter()
+    results = []
+    for run_folder in run_folders:
+        entry: dict = {"run": str(run_folder)}
+        try:
+            portfolio, errors, constructor = replay_portfolio(run_folder, cfg, notional)
+        except Exception as e:
+            entry.update(status="skipped", reason=f"{type(e).__name__}: {e}")
+            typer.echo(f"  [WARN] {run_folder.name}: skipped ({entry['reason']})")
+            results.append(entry)
+            continue
+        entry.update(constructor=constructor, errors=errors)
+        original_file = run_folder / "portfolio.json"
+        if original_file.exists():
+            original = Portfolio.model_validate_json(original_file.read_text(encoding='utf-8'))
+            entry.update(portfolio_diff(portfolio, original))
+        entry["status"] = "invalid" if errors else "changed" if entry.get("changed") else "same"
+        if len(run_folders) == 1:
+            out_file = out_json or run_folder / "replay_portfolio.json"
+            out_file.write_text(portfolio.model_dump_json(indent=2), encoding='utf-8')
+            typer.echo(f"Replayed portfolio written to {out_file}")
+        detail = ""
+        if entry.get("changed"):
+            detail = f" (max weight change {entry['max_weight_change']:.2%}"
+            if entry["added"] or entry["removed"]:
+                detail += f"; +{','.join(entry['added']) or '-'} / -{','.join(entry['removed']) or '-'}"
+            detail += ")"
+        if errors:
+            detail += " " + "; ".join(errors)
+        prefix = "[ERROR]" if errors else "[WARN]" if entry.get("changed") else "[OK]"
+        typer.echo(f"  {prefix} {run_folder.name} [{constructor}]: {entry['status']}{detail}")
+        results.append(entry)
+    
+    counts = Counter(r["status"] for r in results)
+    typer.echo(
+        f"Replayed {len(results)} run(s) in {time.perf_counter() - started:.1f}s: "
+        + ", ".join(f"{counts[s]} {s}" for s in ("same", "changed", "invalid", "skipped") if counts[s])
+    )
+    if out_json is not None and len(run_folders) > 1:
+        out_json.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        typer.echo(f"Replay summary written to {out_json}")
+    if counts["invalid"] or (fail_on_diff and counts["changed"]):
+        raise typer.Exit(code=1)
+    return results
+
+
 @app.command()
 def build(
     scored_file: Path = typer.Option(
@@ -675,13 +1649,71 @@ def build(
     runs_base_dir: Optional[Path] = typer.Option(
         None, help="Base directory for run folder (default: data/runs). Use data/runs_biweekly for biweekly mode."
     ),
+    time_budget: float = typer.Option(
+        300.0, help="Time budget in seconds for the portfolio LLM call, including retries"
+    ),
+    stream: bool = typer.Option(
+        True, help="Stream the LLM response and keep holdings received before a timeout"
+    ),
+    constructor: Optional[str] = typer.Option(
+        None, help="llm or score (LLM-free, deterministic); defaults to PORTFOLIO_CONSTRUCTOR"
+    ),
+    fallback: bool = typer.Option(
+        True, help="Fall back to the score-only constructor if the LLM call fails or times out"
+    ),
+    previous_portfolio: Optional[Path] = typer.Option(
+        None, help="Previous portfolio.json for turnover-aware construction (default: latest in the runs folder)"
+    ),
+    turnover_aware: Optional[bool] = typer.Option(
+        None, help="Build against the previous portfolio (defaults to TURNOVER_AWARE)"
+    ),
+    notional: Optional[float] = typer.Option(
+        None, help="Notional for the turnover report's trade principals, as in report trades-csv "
+        "(default $1,000,000; replays default to the run's own)"
+    ),
+    variants: Optional[str] = typer.Option(
+        None, help=f"Comma-separated variants to build concurrently and select from, or 'all' ({', '.join(PORTFOLIO_VARIANTS)})"
+    ),
+    replay: Optional[Path] = typer.Option(
+        None, help="Run folder to rebuild from its saved prompts_and_response.json (no LLM call); "
+        "writes replay_portfolio.json there unless --out-json"
+    ),
+    replay_all: Optional[Path] = typer.Option(
+        None, "--replay-all", help="Runs folder: replay every run and compare with its stored portfolio.json "
+        "(--out-json writes the summary)"
+    ),
+    fail_on_diff: bool = typer.Option(
+        False, help="With --replay/--replay-all, exit 1 if a replayed portfolio differs from the stored one"
+    ),
 ):
     """Construct final portfolio from scored candidates."""
     import shutil
     
+    cfg = load_config()
+    if replay is not None or replay_all is not None:
+        if replay is not None:
+            run_folders = [replay]
+        else:
+            run_folders = [
+                d for d in sorted(replay_all.iterdir())
+                if d.is_dir() and (d / "prompts_and_response.json").exists()
+            ] if replay_all.exists() else []
+        if not run_folders:
+            typer.echo(f"[ERROR] No runs with prompts_and_response.json under {replay or replay_all}")
+            raise typer.Exit(code=1)
+        typer.echo(f"Replaying {len(run_folders)} run(s) from saved responses (optimizer: {cfg.portfolio_optimizer})")
+        replay_runs(
+            run_folders, cfg, notional=notional, out_json=out_json, fail_on_diff=fail_on_diff,
+        )
+        return
+    if turnover_aware is None:
+        turnover_aware = cfg.turnover_aware
+    
     # Create run folder if enabled
     if use_run_folder and out_json is None:
         base_dir = Path("data/runs") if runs_base_dir is None else Path(runs_base_dir)
+        if turnover_aware and previous_portfolio is None:
+            previous_portfolio = find_previous_portfolio(base_dir)
         run_folder = get_run_folder(base_dir=base_dir)
         out_json = run_folder / "portfolio.json"
         
@@ -710,5 +1742,13 @@ def build(
     elif out_json is None:
         out_json = Path("data/portfolio.json")
     
-    construct_portfolio(scored_file, out_json, out_excel, model)
+    construct_portfolio(
+        scored_file, out_json, out_excel, model,
+        time_budget=time_budget, stream=stream, constructor=constructor, fallback=fallback,
+        previous_portfolio=previous_portfolio if turnover_aware else None, notional=notional or 1_000_000.0,
+        variants=(
+            list(PORTFOLIO_VARIANTS) if variants == "all"
+            else [v.strip() for v in variants.split(",") if v.strip()] if variants else None
+        ),
+    )
 
@@ -2,8 +2,7 @@ from __future__ import annotations
 
 import csv
 import json
-import time
-from collections import defaultdict
+from collections import Counter, defaultdict
 from datetime import date
 from pathlib import Path
 from typing import Optional
@@ -11,8 +10,8 @@ from typing import Optional
 import typer
 
 from .config import load_config
-from .data_fetcher import fetch_price_data
 from .models import Portfolio, ScoredCandidatesResponse
+from .trades import FRACTIONAL_DECIMALS, lot_report, size_lots, take_price_snapshot
 
 app = typer.Typer()
 
@@ -39,6 +38,19 @@ def _load_portfolio_and_prices(
     return portfolio, price_by_ticker
 
 
+def _load_positions(positions_file: Path) -> Optional[tuple[dict[str, float], float]]:
+    """({ticker: quantity}, residual cash) from a run's positions.json, or None if missing/unreadable."""
+    if not positions_file.exists():
+        return None
+    try:
+        data = json.loads(positions_file.read_text(encoding="utf-8"))
+        positions = {t: p["quantity"] for t, p in data.get("positions", {}).items() if p.get("quantity")}
+        return positions, float(data.get("residual_cash") or 0.0)
+    except Exception as e:
+        typer.echo(f"[WARN] Could not read {positions_file}: {e}")
+        return None
+
+
 def write_trades_csv(
     portfolio_file: Path,
     out_csv: Path,
@@ -47,128 +59,104 @@ def write_trades_csv(
     side: str = "Buy",
     previous_portfolio_file: Optional[Path] = None,
     previous_scored_file: Optional[Path] = None,
+    fractional: bool = False,
+    live_prices: bool = True,
 ) -> None:
     """Write a trades CSV with columns B/S, SYMBOL, QTY, PRICE, PRINCIPAL.
 
     - Initial run (no previous): all rows are Buy at full target size.
     - Rebalance (previous provided): Sell rows first (reductions/removals), then Buy rows
       (additions/increases), so the sheet rebalances the existing portfolio to the new one.
+
+    Every ticker in the old and new portfolios is priced from one snapshot (see trades.py),
+    and lots are sized to track the target weights within `notional`. The sized positions
+    and a residual-cash report are written next to the CSV (positions.json, residual_cash.json).
     """
     if not portfolio_file.exists():
         typer.echo(f"Portfolio file not found: {portfolio_file}")
         raise typer.Exit(code=1)
 
-    portfolio, price_by_ticker = _load_portfolio_and_prices(
+    portfolio, scored_prices = _load_portfolio_and_prices(
         portfolio_file, scored_candidates_file
     )
+    weights = {h.ticker: h.weight for h in portfolio.holdings}
 
-    def _shares(weight: float, ticker: str) -> int:
-        p = price_by_ticker.get(ticker)
-        if p is None or p <= 0:
-            return 0
-        return int(round(weight * notional / p))
-
-    # Current target shares per ticker
-    current_shares = {}
-    for h in portfolio.holdings:
-        q = _shares(h.weight, h.ticker)
-        if q > 0:
-            current_shares[h.ticker] = q
-
-    if previous_portfolio_file is None or not previous_portfolio_file.exists():
-        # Initial run: all Buy at full size
-        rows = []
-        for holding in portfolio.holdings:
-            price = price_by_ticker.get(holding.ticker)
-            if price is None or price <= 0:
-                typer.echo(f"[WARN] No valid price for {holding.ticker}, skipping row")
-                continue
-            qty = current_shares.get(holding.ticker, 0)
-            if qty <= 0:
-                continue
-            principal = round(qty * price, 2)
-            rows.append({
-                "B/S": "Buy",
-                "SYMBOL": holding.ticker,
-                "QTY": qty,
-                "PRICE": round(price, 4),
-                "PRINCIPAL": principal,
-            })
-    else:
-        # Rebalance: compare to previous portfolio
+    rebalance = previous_portfolio_file is not None and previous_portfolio_file.exists()
+    prev_shares: dict[str, float] = {}
+    prev_prices: dict[str, float] = {}
+    prev_cash = 0.0  # Residual cash left uninvested by the previous sizing
+    if rebalance:
         prev_portfolio, prev_prices = _load_portfolio_and_prices(
             previous_portfolio_file,
             previous_scored_file or (previous_portfolio_file.parent / "scored_candidates.json"),
         )
+        positions = _load_positions(previous_portfolio_file.parent / "positions.json")
+        if positions is not None:
+            prev_shares, prev_cash = positions
+        else:
+            # Runs before positions.json: reconstruct the book at the previous run's prices
+            for h in prev_portfolio.holdings:
+                p = prev_prices.get(h.ticker)
+                if p and p > 0 and int(round(h.weight * notional / p)) > 0:
+                    prev_shares[h.ticker] = int(round(h.weight * notional / p))
+
+    fmp_key = None
+    if live_prices:
+        try:
+            fmp_key = load_config().fmp_api_key
+        except Exception as e:
+            typer.echo(f"[WARN] Config unavailable ({e.__class__.__name__}); skipping FMP quotes")
+    tickers = list(weights) + [t for t in prev_shares if t not in weights]
+    snapshot = take_price_snapshot(tickers, fmp_key, {**prev_prices, **scored_prices}, live=live_prices)
+    prices = snapshot.prices
+    counts = Counter(snapshot.sources.values())
+    typer.echo(
+        f"  Price snapshot: {len(prices)}/{len(tickers)} tickers ("
+        + ", ".join(f"{n} {source}" for source, n in counts.most_common()) + ")"
+    )
+    stale = sorted(t for t, source in snapshot.sources.items() if source == "scored")
+    if stale and live_prices:
+        typer.echo(f"[WARN] Using scored-candidate prices for {len(stale)} ticker(s): {', '.join(stale[:10])}")
+
+    current_shares = size_lots(weights, prices, notional, fractional)
+    for ticker in weights:
+        if ticker not in prices:
+            typer.echo(f"[WARN] No valid price for {ticker}, skipping row")
+
+    def _row(action: str, ticker: str, qty: float) -> dict:
+        price = prices[ticker]
+        return {
+            "B/S": action,
+            "SYMBOL": ticker,
+            "QTY": round(qty, FRACTIONAL_DECIMALS) if fractional else int(qty),
+            "PRICE": round(price, 4),
+            "PRINCIPAL": round(qty * price, 2),
+        }
 
-        def _prev_shares(weight: float, ticker: str) -> int:
-            p = prev_prices.get(ticker)
-            if p is None or p <= 0:
-                return 0
-            return int(round(weight * notional / p))
-
-        prev_shares = {}
-        for h in prev_portfolio.holdings:
-            q = _prev_shares(h.weight, h.ticker)
-            if q > 0:
-                prev_shares[h.ticker] = q
-
-        # Fetch current price for sell-only tickers (not in current run's scored data)
-        sell_only_tickers = set(prev_shares) - set(price_by_ticker)
-        if sell_only_tickers:
-            cfg = load_config()
-            for ticker in sell_only_tickers:
-                typer.echo(f"  Fetching current price for sell-only {ticker}...", nl=False)
-                pd = fetch_price_data(
-                    ticker,
-                    finnhub_key=cfg.finnhub_api_key,
-                    fmp_key=cfg.fmp_api_key,
-                )
-                if pd and pd.price and pd.price > 0:
-                    price_by_ticker[ticker] = pd.price
-                    typer.echo(f" ${pd.price:.2f}")
-                else:
-                    typer.echo(" N/A (using previous run price)")
-                    if prev_prices.get(ticker):
-                        price_by_ticker[ticker] = prev_prices[ticker]
-                time.sleep(0.25)
-
-        # Portfolio value before rebalance (at current prices); P&L = value - target notional
-        portfolio_value_before_rebalance = 0.0
-        for ticker, qty in prev_shares.items():
-            price = price_by_ticker.get(ticker) or prev_prices.get(ticker)
-            if price and price > 0:
-                portfolio_value_before_rebalance += qty * price
+    if not rebalance:
+        # Initial run: all Buy at full size
+        rows = [_row("Buy", h.ticker, current_shares[h.ticker]) for h in portfolio.holdings if h.ticker in current_shares]
+    else:
+        # Portfolio value before rebalance (at snapshot prices, plus the previous residual cash);
+        # P&L = value - target notional
+        portfolio_value_before_rebalance = prev_cash + sum(
+            qty * prices[ticker] for ticker, qty in prev_shares.items() if ticker in prices
+        )
         period_pnl = portfolio_value_before_rebalance - notional
 
-        all_tickers = set(prev_shares) | set(current_shares)
         sell_rows = []
         buy_rows = []
-        for ticker in sorted(all_tickers):
+        for ticker in sorted(set(prev_shares) | set(current_shares)):
             prev_q = prev_shares.get(ticker, 0)
             curr_q = current_shares.get(ticker, 0)
-            # Use current price (from scored data or fetched for sell-only); else previous price
-            price = price_by_ticker.get(ticker) or prev_prices.get(ticker)
-            if price is None or price <= 0:
+            if ticker not in prices:
                 if prev_q > 0:
                     typer.echo(f"[WARN] No price for {ticker}, skipping row")
                 continue
             if curr_q > prev_q:
-                buy_rows.append({
-                    "B/S": "Buy",
-                    "SYMBOL": ticker,
-                    "QTY": curr_q - prev_q,
-                    "PRICE": round(price, 4),
-                    "PRINCIPAL": round((curr_q - prev_q) * price, 2),
-                })
+                buy_rows.append(_row("Buy", ticker, curr_q - prev_q))
             elif curr_q < prev_q:
-                sell_rows.append({
-                    "B/S": "Sell",
-                    "SYMBOL": ticker,
-                    "QTY": prev_q - curr_q,
-                    "PRICE": round(price, 4),
-                    "PRINCIPAL": round((prev_q - curr_q) * price, 2),
-                })
+                sell_rows.append(_row("Sell", ticker, prev_q - curr_q))
 
         rows = sell_rows + buy_rows
 
@@ -180,6 +168,7 @@ def write_trades_csv(
             "target_notional": notional,
             "run_date": date.today().isoformat(),
         }
+        pnl_file.parent.mkdir(parents=True, exist_ok=True)
         pnl_file.write_text(json.dumps(pnl_data, indent=2), encoding="utf-8")
         typer.echo(
             f"  Period P&L: ${period_pnl:+,.2f} (value before rebalance: ${portfolio_value_before_rebalance:,.2f} → target ${notional:,.0f})"
@@ -191,7 +180,27 @@ def write_trades_csv(
         writer.writeheader()
         writer.writerows(rows)
 
+    # Positions after these trades (the next rebalance trades from them) and residual cash
+    report = lot_report(weights, current_shares, prices, notional)
+    positions_data = {
+        "taken_at": snapshot.taken_at.isoformat(timespec="seconds"),
+        "notional": notional,
+        "fractional": fractional,
+        "residual_cash": report["residual_cash"],
+        "positions": {
+            t: {"quantity": q, "price": prices[t], "source": snapshot.sources[t]}
+            for t, q in sorted(current_shares.items())
+        },
+    }
+    (out_csv.parent / "positions.json").write_text(json.dumps(positions_data, indent=2), encoding="utf-8")
+    report["taken_at"] = positions_data["taken_at"]
+    (out_csv.parent / "residual_cash.json").write_text(json.dumps(report, indent=2), encoding="utf-8")
+
     typer.echo(f"Trades CSV written to {out_csv} ({len(rows)} rows)")
+    typer.echo(
+        f"  Residual cash: ${report['residual_cash']:,.2f} ({report['residual_cash_pct']*100:.3f}%), "
+        f"tracking error {report['tracking_error']*100:.3f}%, max deviation {report['max_weight_deviation']*100:.3f}%"
+    )
 
 
 def generate_portfolio_report(
@@ -212,6 +221,21 @@ def generate_portfolio_report(
         typer.echo(f"Failed to parse portfolio file: {e}")
         raise typer.Exit(code=1)
     
+    if portfolio.risk is None:
+        # Portfolios built before the risk model: estimate it for the holdings now
+        from .portfolio import ex_ante_risk
+        
+        try:
+            cfg = load_config()
+        except Exception as e:
+            typer.echo(f"[WARN] Skipping ex-ante risk (config unavailable: {e.__class__.__name__})")
+        else:
+            portfolio.risk = ex_ante_risk(
+                {h.ticker: h.weight for h in portfolio.holdings},
+                [h.ticker for h in portfolio.holdings],
+                cfg,
+            )
+    
     # Sort holdings by weight (descending)
     sorted_holdings = sorted(portfolio.holdings, key=lambda x: x.weight, reverse=True)
     
@@ -342,6 +366,23 @@ def generate_markdown_report(
         count = len([h for h in portfolio.holdings if (h.sector or "Unknown") == sector])
         lines.append(f"| {sector} | {weight*100:.2f}% | {count} |")
     
+    if portfolio.risk is not None:
+        risk = portfolio.risk
+        lines.append("")
+        lines.append(f"### Ex-Ante Risk (risk model as of {risk.as_of})")
+        lines.append("")
+        lines.append(f"- **Volatility (annualized):** {risk.volatility*100:.2f}%")
+        lines.append(f"- **Beta vs SPY:** {risk.beta:.2f}")
+        lines.append(f"- **Weight Covered:** {risk.coverage*100:.0f}%")
+        if risk.missing:
+            lines.append(f"- **No Price History:** {', '.join(risk.missing)}")
+        lines.append("")
+        lines.append("| Ticker | Weight | Share of Risk |")
+        lines.append("|--------|--------|---------------|")
+        weights = {h.ticker: h.weight for h in portfolio.holdings}
+        for ticker, share in sorted(risk.risk_contributions.items(), key=lambda x: x[1], reverse=True):
+            lines.append(f"| {ticker} | {weights.get(ticker, 0)*100:.2f}% | {share*100:.1f}% |")
+    
     lines.append("")
     lines.append("### Theme Distribution")
     lines.append("")
@@ -439,6 +480,16 @@ def generate_text_report(
         count = len([h for h in portfolio.holdings if (h.sector or "Unknown") == sector])
         lines.append(f"  {sector}: {weight*100:.2f}% ({count} holdings)")
     
+    if portfolio.risk is not None:
+        risk = portfolio.risk
+        lines.append("")
+        lines.append(f"Ex-Ante Risk (risk model as of {risk.as_of}):")
+        lines.append(f"  Volatility: {risk.volatility*100:.2f}% annualized")
+        lines.append(f"  Beta vs SPY: {risk.beta:.2f}")
+        lines.append(f"  Weight covered: {risk.coverage*100:.0f}%")
+        top = sorted(risk.risk_contributions.items(), key=lambda x: x[1], reverse=True)[:5]
+        lines.append("  Top risk contributors: " + ", ".join(f"{t} {share*100:.1f}%" for t, share in top))
+    
     lines.append("")
     lines.append("Theme Distribution:")
     for theme, count in sorted(theme_count.items(), key=lambda x: x[1], reverse=True):
@@ -512,6 +563,13 @@ def trades_csv(
         "--previous-run",
         help="Path to previous run folder for rebalance: Sells then Buys to adjust to current portfolio",
     ),
+    fractional: bool = typer.Option(
+        False, "--fractional/--whole-shares", help="Size lots in fractional shares (6 decimals) instead of whole shares"
+    ),
+    snapshot: bool = typer.Option(
+        True, "--snapshot/--no-snapshot",
+        help="Price all tickers from live batched quotes (FMP, then yfinance); --no-snapshot uses stored/scored prices only",
+    ),
 ):
     """Export portfolio to a trades CSV (B/S, SYMBOL, QTY, PRICE, PRINCIPAL).
     With --previous-run, outputs rebalance trades (sells then buys) for a single continuous portfolio.
@@ -531,5 +589,7 @@ def trades_csv(
         side=side,
         previous_portfolio_file=prev_portfolio,
         previous_scored_file=prev_scored if (prev_scored and prev_scored.exists()) else None,
+        fractional=fractional,
+        live_prices=snapshot,
     )
 
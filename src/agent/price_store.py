@@ -0,0 +1,192 @@
+"""Local daily price store.
+
+One CSV per ticker (date,close,volume) under data/prices/. Updates only fetch the dates a
+ticker's file doesn't cover yet (plus a short overlap with the stored tail), so backtests,
+liquidity screens and risk estimates can read whole price histories without hitting the
+network. If the overlapping closes no longer match (a split or restatement re-adjusted the
+history), the ticker's whole range is downloaded again.
+"""
+
+from __future__ import annotations
+
+import csv
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import typer
+
+from .data_apis import fetch_historical_daily_bars
+
+DEFAULT_PRICE_DIR = Path("data/prices")
+
+Bar = tuple[date, float, float]  # (date, close, volume)
+
+# Calendar days of stored history re-fetched on each update to detect re-adjusted closes
+OVERLAP_DAYS = 10
+# Relative close difference on an overlapping day that triggers a full re-download
+ADJUSTMENT_TOLERANCE = 0.005
+# Trading days a ticker's last stored bar may lag the as-of date before readers treat it as stale
+MAX_LAG_DAYS = 3
+
+
+def _path(ticker: str, price_dir: Path) -> Path:
+    return price_dir / f"{ticker.upper().replace('/', '-')}.csv"
+
+
+def last_modified(tickers: Sequence[str], price_dir: Path = DEFAULT_PRICE_DIR) -> float:
+    """Newest modification time of the stored files for `tickers` (0 if none are stored)."""
+    newest = 0.0
+    for ticker in tickers:
+        try:
+            newest = max(newest, _path(ticker, price_dir).stat().st_mtime)
+        except OSError:
+            pass
+    return newest
+
+
+def read_bars(ticker: str, price_dir: Path = DEFAULT_PRICE_DIR) -> list[Bar]:
+    """All stored bars for a ticker, sorted by date ([] if none)."""
+    path = _path(ticker, price_dir)
+    if not path.exists():
+        return []
+    bars = []
+    with path.open(newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        next(reader, None)  # header: date,close,volume
+        for row in reader:
+            try:
+                bars.append((date.fromisoformat(row[0]), float(row[1]), float(row[2]) if len(row) > 2 and row[2] else 0.0))
+            except (IndexError, ValueError):
+                continue
+    bars.sort(key=lambda b: b[0])
+    return bars
+
+
+def write_bars(ticker: str, bars: Sequence[Bar], price_dir: Path = DEFAULT_PRICE_DIR) -> None:
+    price_dir.mkdir(parents=True, exist_ok=True)
+    path = _path(ticker, price_dir)
+    tmp = path.with_suffix(".csv.tmp")
+    with tmp.open("w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["date", "close", "volume"])
+        for d, close, volume in sorted(bars, key=lambda b: b[0]):
+            writer.writerow([d.isoformat(), f"{close:.6g}", f"{volume:.0f}"])
+    tmp.replace(path)
+
+
+def update_ticker(
+    ticker: str,
+    from_date: date,
+    to_date: date,
+    fmp_api_key: str,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> int:
+    """Fetch the parts of [from_date, to_date] not already stored; returns the number of new or replaced bars.
+
+    Appends re-fetch the last OVERLAP_DAYS of stored bars too; when those closes differ by
+    more than ADJUSTMENT_TOLERANCE the stored history is stale (split, restatement) and the
+    ticker's full range is replaced by a fresh download.
+    """
+    existing = read_bars(ticker, price_dir)
+    if not existing:
+        bars = fetch_historical_daily_bars(ticker, from_date, to_date, fmp_api_key)
+        if bars:
+            write_bars(ticker, bars, price_dir)
+        return len(bars)
+
+    first, last = existing[0][0], existing[-1][0]
+    stored = {b[0]: b for b in existing}
+    fetched: list[Bar] = []
+    if to_date > last:
+        fetched += fetch_historical_daily_bars(ticker, last - timedelta(days=OVERLAP_DAYS), to_date, fmp_api_key)
+    for d, close, _ in fetched:
+        old = stored.get(d)
+        if old is not None and old[1] > 0 and abs(close / old[1] - 1.0) > ADJUSTMENT_TOLERANCE:
+            typer.echo(
+                f"  [WARN] {ticker}: stored close {old[1]:g} on {d} is now {close:g}; re-downloading full history"
+            )
+            bars = fetch_historical_daily_bars(ticker, min(from_date, first), max(to_date, last), fmp_api_key)
+            if bars:
+                write_bars(ticker, bars, price_dir)
+            return len(bars)
+    if from_date < first:
+        fetched += fetch_historical_daily_bars(ticker, from_date, first - timedelta(days=1), fmp_api_key)
+
+    added = 0
+    for bar in fetched:
+        if bar[0] not in stored:
+            added += 1
+            stored[bar[0]] = bar
+    if added:
+        write_bars(ticker, list(stored.values()), price_dir)
+    return added
+
+
+def update_prices(
+    tickers: Sequence[str],
+    from_date: date,
+    to_date: date,
+    fmp_api_key: str,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+    pause: float = 0.1,
+) -> dict[str, int]:
+    """Bring the store up to date for many tickers; returns new bar counts per ticker."""
+    added = {}
+    for i, ticker in enumerate(tickers):
+        try:
+            added[ticker] = update_ticker(ticker, from_date, to_date, fmp_api_key, price_dir)
+        except Exception as e:
+            typer.echo(f"  [WARN] {ticker}: price update failed: {e}")
+            added[ticker] = 0
+        if added[ticker] and pause:
+            time.sleep(pause)  # Only pause after real requests; cached tickers are free
+        if (i + 1) % 50 == 0:
+            typer.echo(f"  ... {i + 1}/{len(tickers)} tickers")
+    return added
+
+
+def load_price_fields(
+    tickers: Sequence[str],
+    fields: Sequence[str] = ("close", "volume"),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> tuple[list[date], dict[str, np.ndarray]]:
+    """(dates, {field: matrix}) with one column per ticker over the union of stored trading days.
+
+    Fields are "close" and/or "volume"; each file is read once for all of them. Days a ticker
+    has no bar are NaN.
+    """
+    cols = {name: {"close": 1, "volume": 2}[name] for name in fields}
+    series = {}
+    all_dates: set[date] = set()
+    for ticker in tickers:
+        bars = [b for b in read_bars(ticker, price_dir) if (start is None or b[0] >= start) and (end is None or b[0] <= end)]
+        series[ticker] = bars
+        all_dates.update(b[0] for b in bars)
+
+    dates = sorted(all_dates)
+    index = {d: i for i, d in enumerate(dates)}
+    matrices = {name: np.full((len(dates), len(tickers)), np.nan) for name in cols}
+    for j, ticker in enumerate(tickers):
+        bars = series[ticker]
+        if bars:
+            rows = np.fromiter((index[b[0]] for b in bars), dtype=np.int64, count=len(bars))
+            for name, col in cols.items():
+                matrices[name][rows, j] = [b[col] for b in bars]
+    return dates, matrices
+
+
+def load_price_matrix(
+    tickers: Sequence[str],
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    field: str = "close",
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> tuple[list[date], np.ndarray]:
+    """(dates, matrix) for a single field; see load_price_fields."""
+    dates, matrices = load_price_fields(tickers, (field,), start, end, price_dir)
+    return dates, matrices[field]
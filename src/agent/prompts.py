@@ -199,9 +199,8 @@ def user_portfolio(
     industry_cap: float,
     horizon_end: date,
 ) -> str:
-    # Sort candidates by composite score (highest first) and show top 40 for selection
-    sorted_candidates = sorted(scored_candidates, key=lambda x: x.get("composite_score", -999), reverse=True)
-    top_candidates = sorted_candidates[:min(40, len(sorted_candidates))]
+    # Candidates arrive already shortlisted (see portfolio.shortlist_candidates); show them by score
+    top_candidates = sorted(scored_candidates, key=lambda x: x.get("composite_score", -999), reverse=True)
     
     candidates_text = []
     for cand in top_candidates:
@@ -235,7 +234,7 @@ def user_portfolio(
         - Industry cap: {industry_cap*100:.0f}% (no single industry > {industry_cap*100:.0f}%)
         - Long-only portfolio (no short positions)
         
-        Scored Candidates (sorted by composite score, showing top 40):
+        Scored Candidates (sorted by composite score, {len(top_candidates)} shortlisted with sector coverage):
         {chr(10).join(candidates_text)}
         
         Instructions:
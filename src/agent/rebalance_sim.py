@@ -0,0 +1,203 @@
+"""Rebalance-schedule simulator over the portfolio history in a runs folder.
+
+Each run's portfolio.json is a target that becomes available at the close of its run day
+(or the next trading day). A schedule decides on which trading days the book is traded back
+to the latest target; in between, holdings drift with the stored closes. All schedules are
+simulated together as rows of one (S, N) weight matrix, so a day costs one vector update
+regardless of how many cadences are compared. Threshold schedules rebalance when one-way
+drift from the target exceeds their threshold, which is decided per row inside the same step.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .price_store import DEFAULT_PRICE_DIR, load_price_matrix
+
+FIXED_SCHEDULES = ("daily", "runs", "weekly", "biweekly", "semimonthly", "monthly")
+DEFAULT_SCHEDULES = ("daily", "runs", "weekly", "biweekly", "semimonthly", "threshold:0.05", "threshold:0.10")
+TRADING_DAYS = 252
+# Days of the month the semimonthly schedule trades on (first trading day on or after each)
+SEMIMONTHLY_DAYS = (2, 16)
+
+
+class ScheduleResult(NamedTuple):
+    schedule: str
+    total_return: float
+    gross_return: float  # Before transaction costs
+    cost_drag: float  # gross_return - total_return
+    volatility: float  # Annualized, from daily NAV returns
+    rebalances: int
+    turnover: float  # Sum of one-way turnover over all rebalances
+    annual_turnover: float
+    nav: np.ndarray  # (T,) net NAV, starting at 1
+
+
+def load_target_history(runs_dir: Path) -> list[tuple[date, dict[str, float]]]:
+    """(run date, {ticker: weight}) per day with a portfolio.json (the day's last run wins), oldest first."""
+    by_day: dict[date, Path] = {}
+    for portfolio_file in sorted(runs_dir.glob("*/portfolio.json")):
+        try:
+            run_dt = datetime.strptime(portfolio_file.parent.name, "%Y-%m-%d_%H-%M-%S")
+        except ValueError:
+            continue
+        by_day[run_dt.date()] = portfolio_file  # Sorted, so later runs of a day win
+
+    history = []
+    for run_date, portfolio_file in sorted(by_day.items()):
+        try:
+            data = json.loads(portfolio_file.read_text(encoding="utf-8"))
+            weights = {h["ticker"]: float(h["weight"]) for h in data.get("holdings", [])}
+        except Exception:
+            continue
+        if weights:
+            history.append((run_date, weights))
+    return history
+
+
+def parse_schedule(spec: str) -> tuple[str, Optional[float]]:
+    """("threshold", 0.05) for "threshold:0.05"; (name, None) for the fixed schedules."""
+    if spec.startswith("threshold:"):
+        return "threshold", float(spec.split(":", 1)[1])
+    if spec not in FIXED_SCHEDULES:
+        raise ValueError(f"Unknown schedule {spec!r}; expected one of {FIXED_SCHEDULES} or threshold:<drift>")
+    return spec, None
+
+
+def schedule_mask(name: str, dates: Sequence[date], run_days: np.ndarray) -> np.ndarray:
+    """(T,) True on the trading days a fixed schedule trades. `run_days` marks days a new target arrives."""
+    t = len(dates)
+    if name == "daily":
+        return np.ones(t, dtype=bool)
+    if name == "runs":
+        return run_days.copy()
+    if name in ("weekly", "biweekly"):
+        weeks = np.array([(d.toordinal() - d.weekday()) // 7 for d in dates])  # Continuous Monday-based index
+        first = np.r_[True, weeks[1:] != weeks[:-1]]
+        if name == "biweekly":
+            first &= (weeks - weeks[0]) % 2 == 0
+        return first
+    if name == "monthly":
+        months = np.array([d.year * 12 + d.month for d in dates])
+        return np.r_[True, months[1:] != months[:-1]]
+    if name == "semimonthly":
+        halves = np.array([d.year * 24 + (d.month - 1) * 2 + (d.day >= SEMIMONTHLY_DAYS[1]) for d in dates])
+        day = np.array([d.day for d in dates])
+        eligible = (day >= SEMIMONTHLY_DAYS[0]) | (halves % 2 == 1)
+        mask = np.zeros(t, dtype=bool)
+        seen = set()
+        for i in np.nonzero(eligible)[0]:
+            if halves[i] not in seen:
+                seen.add(halves[i])
+                mask[i] = True
+        return mask
+    raise ValueError(f"Unknown schedule {name!r}")
+
+
+def simulate_schedules(
+    dates: Sequence[date],
+    returns: np.ndarray,
+    targets: np.ndarray,
+    run_days: np.ndarray,
+    schedules: Sequence[str],
+    cost_bps: float = 10.0,
+) -> list[ScheduleResult]:
+    """Simulate all `schedules` over (T, N) daily `returns` toward (T, N) forward-filled `targets`.
+
+    Day 0 starts fully invested in the first target at no cost. On each later day holdings
+    drift with that day's returns, then schedules that trade pay `cost_bps` on the traded
+    notional (two-way, 2 x one-way turnover) and reset to the day's target.
+    """
+    t_count, n = returns.shape
+    parsed = [parse_schedule(s) for s in schedules]
+    s_count = len(parsed)
+    fixed = np.zeros((s_count, t_count), dtype=bool)
+    thresholds = np.full(s_count, np.inf)
+    for k, (name, threshold) in enumerate(parsed):
+        if name == "threshold":
+            thresholds[k] = threshold
+        else:
+            fixed[k] = schedule_mask(name, dates, run_days)
+    cost_rate = cost_bps / 10_000.0
+
+    weights = np.repeat(targets[:1], s_count, axis=0)  # (S, N)
+    nav = np.ones((s_count, t_count))
+    gross = np.ones((s_count, t_count))
+    turnover = np.zeros(s_count)
+    rebalances = np.zeros(s_count, dtype=int)
+    returns = np.where(np.isfinite(returns), returns, 0.0)
+
+    for t in range(1, t_count):
+        growth = weights * (1.0 + returns[t])
+        value = growth.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weights = np.where(value[:, None] > 0, growth / value[:, None], weights)
+        nav[:, t] = nav[:, t - 1] * value
+        gross[:, t] = gross[:, t - 1] * value
+
+        drift = 0.5 * np.abs(weights - targets[t]).sum(axis=1)
+        trade = (fixed[:, t] | (drift > thresholds)) & (drift > 0)
+        nav[:, t] *= np.where(trade, 1.0 - 2.0 * drift * cost_rate, 1.0)
+        turnover += np.where(trade, drift, 0.0)
+        rebalances += trade
+        weights = np.where(trade[:, None], targets[t], weights)
+
+    years = max(t_count - 1, 1) / TRADING_DAYS
+    results = []
+    for k, spec in enumerate(schedules):
+        daily = nav[k, 1:] / nav[k, :-1] - 1.0
+        results.append(ScheduleResult(
+            schedule=spec,
+            total_return=float(nav[k, -1] - 1.0),
+            gross_return=float(gross[k, -1] - 1.0),
+            cost_drag=float(gross[k, -1] - nav[k, -1]),
+            volatility=float(daily.std() * np.sqrt(TRADING_DAYS)) if len(daily) > 1 else 0.0,
+            rebalances=int(rebalances[k]),
+            turnover=float(turnover[k]),
+            annual_turnover=float(turnover[k] / years),
+            nav=nav[k],
+        ))
+    return results
+
+
+def build_inputs(
+    history: list[tuple[date, dict[str, float]]],
+    end: Optional[date] = None,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> tuple[list[date], list[str], np.ndarray, np.ndarray, np.ndarray]:
+    """(dates, tickers, returns (T, N), forward-filled targets (T, N), run_days (T,)) from the price store.
+
+    A target arriving on a non-trading day takes effect on the next trading day. Names
+    without a stored close on a day have a 0 return that day.
+    """
+    tickers = sorted({t for _, weights in history for t in weights})
+    dates, closes = load_price_matrix(tickers, start=history[0][0], end=end, price_dir=price_dir)
+    if not dates:
+        return [], tickers, np.zeros((0, len(tickers))), np.zeros((0, len(tickers))), np.zeros(0, dtype=bool)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = np.vstack([np.zeros((1, len(tickers))), closes[1:] / closes[:-1] - 1.0])
+
+    column = {t: j for j, t in enumerate(tickers)}
+    targets = np.full((len(dates), len(tickers)), np.nan)
+    run_days = np.zeros(len(dates), dtype=bool)
+    ordinals = np.array([d.toordinal() for d in dates])
+    for run_date, weights in history:
+        i = int(np.searchsorted(ordinals, run_date.toordinal()))
+        if i >= len(dates):
+            continue
+        row = np.zeros(len(tickers))
+        for ticker, w in weights.items():
+            row[column[ticker]] = w
+        targets[i] = row / row.sum()
+        run_days[i] = True
+    # Start on the first day with a target, then forward-fill: each day trades toward the latest one
+    first = int(np.argmax(run_days))
+    dates, returns, targets, run_days = dates[first:], returns[first:], targets[first:], run_days[first:]
+    last = np.maximum.accumulate(np.where(run_days, np.arange(len(dates)), 0))
+    targets = targets[last]
+    return dates, tickers, returns, np.where(np.isfinite(targets), targets, 0.0), run_days
@@ -0,0 +1,259 @@
+"""Daily event-risk calendar for the risk screens.
+
+One bulk request per source and day: the FMP earnings calendar for the blackout window,
+the FMP M&A feed, and the Nasdaq trade-halt RSS feed. The results are cached in
+data/risk_calendar/<date>.json and indexed by ticker, so each screen is a dict lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Optional, Sequence
+
+import requests
+import typer
+
+from .models import NewsItem
+
+DEFAULT_CALENDAR_DIR = Path("data/risk_calendar")
+DEFAULT_EARNINGS_BLACKOUT_DAYS = 2
+MA_LOOKBACK_DAYS = 120
+HALT_LOOKBACK_DAYS = 2
+
+NASDAQ_HALTS_RSS = "https://www.nasdaqtrader.com/rss.aspx?feed=tradehalts"
+
+# Limit-up/limit-down pauses last minutes and resume on their own; only flagged while unresolved
+VOLATILITY_HALT_CODES = {"LUDP", "LUDS", "M"}
+
+# Headline phrases that only read naturally about the target of a pending deal. Generic deal
+# words ("merger agreement", "takeover bid", "all-cash deal") are left out: they appear just as
+# often in headlines about the acquirer or a peer in the ticker's feed. The FMP M&A feed
+# (targetedSymbol) is the authoritative check; this only catches deals it hasn't filed yet.
+MA_KEYWORDS = (
+    "to be acquired",
+    "agrees to be acquired",
+    "definitive agreement to be acquired",
+    "to be taken private",
+    "agrees to be taken private",
+    "accepts takeover offer",
+    "accepts buyout offer",
+)
+
+
+def _key(ticker: str) -> str:
+    return ticker.upper().replace(".", "-")
+
+
+def add_trading_days(start: date, days: int) -> date:
+    """The date `days` weekdays after `start` (exchange holidays are not modeled)."""
+    current = start
+    while days > 0:
+        current += timedelta(days=1)
+        if current.weekday() < 5:
+            days -= 1
+    return current
+
+
+def fetch_earnings_calendar_fmp(start: date, end: date, api_key: str) -> dict[str, str]:
+    """{ticker: earliest earnings date (ISO)} for all reports in [start, end], in one request."""
+    url = "https://financialmodelingprep.com/stable/earnings-calendar"
+    params = {"from": start.isoformat(), "to": end.isoformat(), "apikey": api_key}
+    response = requests.get(url, params=params, timeout=(5, 60))
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        raise ValueError(f"Unexpected earnings calendar response: {str(data)[:200]}")
+
+    earnings: dict[str, str] = {}
+    for item in data:
+        symbol, day = item.get("symbol"), item.get("date")
+        if not symbol or not day:
+            continue
+        key = _key(symbol)
+        day = str(day)[:10]
+        if key not in earnings or day < earnings[key]:
+            earnings[key] = day
+    return earnings
+
+
+def fetch_ma_targets_fmp(api_key: str, since: date, limit: int = 1000) -> dict[str, str]:
+    """{target ticker: description} for M&A filings since `since`, from the FMP M&A feed."""
+    url = "https://financialmodelingprep.com/stable/mergers-acquisitions-latest"
+    params = {"page": 0, "limit": limit, "apikey": api_key}
+    response = requests.get(url, params=params, timeout=(5, 60))
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        raise ValueError(f"Unexpected M&A response: {str(data)[:200]}")
+
+    targets: dict[str, str] = {}
+    for item in data:
+        target = item.get("targetedSymbol")
+        day = str(item.get("transactionDate") or item.get("acceptedDate") or "")[:10]
+        if not target or not day or day < since.isoformat():
+            continue
+        acquirer = item.get("companyName") or item.get("symbol") or "unknown acquirer"
+        targets.setdefault(_key(target), f"M&A filing {day}: target of {acquirer}")
+    return targets
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def fetch_trading_halts_nasdaq(as_of: date, lookback_days: int = HALT_LOOKBACK_DAYS) -> dict[str, str]:
+    """{ticker: description} for unresolved halts and recent non-volatility halts from the Nasdaq RSS feed."""
+    response = requests.get(NASDAQ_HALTS_RSS, timeout=(5, 30), headers={"User-Agent": "Mozilla/5.0"})
+    response.raise_for_status()
+    root = ET.fromstring(response.content)
+    since = as_of - timedelta(days=lookback_days + 2)  # Calendar days, enough to cover a weekend
+
+    halts: dict[str, str] = {}
+    for item in root.iter():
+        if _local(item.tag) != "item":
+            continue
+        fields = {_local(child.tag): (child.text or "").strip() for child in item}
+        symbol = fields.get("IssueSymbol")
+        if not symbol:
+            continue
+        try:
+            halt_date = datetime.strptime(fields.get("HaltDate", ""), "%m/%d/%Y").date()
+        except ValueError:
+            continue
+        reason = fields.get("ReasonCode", "")
+        resumed = bool(fields.get("ResumptionTradeTime"))
+        if resumed and (halt_date < since or reason in VOLATILITY_HALT_CODES):
+            continue
+        state = "resumed" if resumed else "not resumed"
+        halts[_key(symbol)] = f"Halted {halt_date.isoformat()} ({reason or 'no code'}, {state})"
+    return halts
+
+
+def scan_ma_news(news: Sequence[NewsItem]) -> Optional[str]:
+    """First headline in `news` that reads like the company is being acquired, or None.
+
+    Only headlines are scanned: summaries routinely mention other companies' deals.
+    """
+    for item in news:
+        text = item.headline.lower()
+        for keyword in MA_KEYWORDS:
+            if keyword in text:
+                return f"News: '{item.headline[:80]}' ({keyword})"
+    return None
+
+
+class RiskCalendar:
+    """Per-ticker index of upcoming earnings, pending M&A targets and trading halts."""
+
+    def __init__(
+        self,
+        as_of: date,
+        blackout_days: int = DEFAULT_EARNINGS_BLACKOUT_DAYS,
+        earnings: Optional[dict[str, str]] = None,
+        ma_targets: Optional[dict[str, str]] = None,
+        halts: Optional[dict[str, str]] = None,
+        sources: Optional[dict[str, bool]] = None,
+    ):
+        self.as_of = as_of
+        self.blackout_end = add_trading_days(as_of, blackout_days)
+        self.earnings = earnings or {}
+        self.ma_targets = ma_targets or {}
+        self.halts = halts or {}
+        self.sources = sources or {}
+
+    def earnings_date(self, ticker: str) -> Optional[date]:
+        """Earnings date within the blackout window, or None."""
+        day = self.earnings.get(_key(ticker))
+        if not day:
+            return None
+        day = date.fromisoformat(day)
+        return day if self.as_of <= day <= self.blackout_end else None
+
+    def pending_ma(self, ticker: str, news: Sequence[NewsItem] = ()) -> Optional[str]:
+        return self.ma_targets.get(_key(ticker)) or scan_ma_news(news)
+
+    def trading_halt(self, ticker: str) -> Optional[str]:
+        return self.halts.get(_key(ticker))
+
+    def to_dict(self) -> dict:
+        return {
+            "as_of": self.as_of.isoformat(),
+            "blackout_end": self.blackout_end.isoformat(),
+            "sources": self.sources,
+            "earnings": self.earnings,
+            "ma_targets": self.ma_targets,
+            "halts": self.halts,
+        }
+
+
+def build_risk_calendar(
+    as_of: date,
+    fmp_api_key: Optional[str],
+    blackout_days: int = DEFAULT_EARNINGS_BLACKOUT_DAYS,
+    live_feeds: bool = True,
+) -> RiskCalendar:
+    """Fetch each source once. A failed source is recorded as unavailable, not fatal.
+
+    `live_feeds=False` skips the M&A and halt feeds, which only describe the present (backtests).
+    """
+    calendar = RiskCalendar(as_of, blackout_days)
+    if fmp_api_key:
+        try:
+            calendar.earnings = fetch_earnings_calendar_fmp(as_of, calendar.blackout_end, fmp_api_key)
+            calendar.sources["earnings"] = True
+        except Exception as e:
+            typer.echo(f"  [WARN] Earnings calendar unavailable: {e}")
+            calendar.sources["earnings"] = False
+        if live_feeds:
+            try:
+                calendar.ma_targets = fetch_ma_targets_fmp(fmp_api_key, as_of - timedelta(days=MA_LOOKBACK_DAYS))
+                calendar.sources["ma"] = True
+            except Exception as e:
+                typer.echo(f"  [WARN] M&A feed unavailable: {e}")
+                calendar.sources["ma"] = False
+    if live_feeds:
+        try:
+            calendar.halts = fetch_trading_halts_nasdaq(as_of)
+            calendar.sources["halts"] = True
+        except Exception as e:
+            typer.echo(f"  [WARN] Trading halt feed unavailable: {e}")
+            calendar.sources["halts"] = False
+    return calendar
+
+
+def load_risk_calendar(
+    as_of: date,
+    fmp_api_key: Optional[str] = None,
+    blackout_days: int = DEFAULT_EARNINGS_BLACKOUT_DAYS,
+    live_feeds: bool = True,
+    cache_dir: Path = DEFAULT_CALENDAR_DIR,
+    refresh: bool = False,
+) -> RiskCalendar:
+    """The calendar for `as_of`, from today's cache file if present, otherwise fetched and cached.
+
+    Calendars where every source failed are not cached, so the next run retries.
+    """
+    path = cache_dir / f"{as_of.isoformat()}.json"
+    if path.exists() and not refresh:
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            if payload.get("blackout_end") == add_trading_days(as_of, blackout_days).isoformat():
+                return RiskCalendar(
+                    as_of,
+                    blackout_days,
+                    earnings=payload.get("earnings"),
+                    ma_targets=payload.get("ma_targets"),
+                    halts=payload.get("halts"),
+                    sources=payload.get("sources"),
+                )
+        except Exception as e:
+            typer.echo(f"  [WARN] Could not read risk calendar {path}: {e}")
+
+    calendar = build_risk_calendar(as_of, fmp_api_key, blackout_days, live_feeds)
+    if any(calendar.sources.values()):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(calendar.to_dict(), indent=2), encoding="utf-8")
+    return calendar
@@ -0,0 +1,253 @@
+"""Ex-ante covariance risk model from the local price store.
+
+Daily returns over the last RISK_MODEL_LOOKBACK_DAYS trading days for the whole candidate
+universe go into one Ledoit-Wolf shrinkage estimate (sample covariance shrunk toward a
+scaled identity), which stays well conditioned with 1,000+ names and ~250 days. Betas are
+regressions on SPY over the same window. The model is cached per day in
+data/risk_model/<date>.npz, so construction, variants and reports share one estimate; a
+cached model is only reused if it was built with the same settings and price directory and
+none of the price files it depends on changed since.
+"""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Optional, Sequence
+
+import numpy as np
+import typer
+
+from .price_store import DEFAULT_PRICE_DIR, last_modified, load_price_fields
+
+DEFAULT_RISK_MODEL_DIR = Path("data/risk_model")
+DEFAULT_LOOKBACK_DAYS = 250
+DEFAULT_MIN_DAYS = 120
+MARKET_TICKER = "SPY"
+TRADING_DAYS = 252
+
+
+def ledoit_wolf(returns: np.ndarray) -> tuple[np.ndarray, float]:
+    """(N, N) shrunk covariance of a (T, N) return matrix, and the shrinkage intensity.
+
+    Missing returns (NaN) count as zero deviations from the column mean. Uses the Ledoit-Wolf
+    (2004) optimal intensity toward mu * I, computed without forming per-day outer products.
+    """
+    t, n = returns.shape
+    mean = np.nanmean(returns, axis=0)
+    x = np.where(np.isfinite(returns), returns - mean, 0.0)
+    sample = x.T @ x / t
+    mu = np.trace(sample) / n
+    sample_sq = np.einsum("ij,ij->", sample, sample)
+    d2 = (sample_sq - 2 * mu * np.trace(sample) + mu * mu * n) / n  # ||S - mu I||^2 / n
+    row_sq = np.einsum("ij,ij->i", x, x)
+    b2 = (np.sum(row_sq ** 2) / t - sample_sq) / (t * n)  # mean ||x_t x_t' - S||^2 / (t n)
+    shrinkage = float(np.clip(b2 / d2, 0.0, 1.0)) if d2 > 0 else 1.0
+    cov = (1.0 - shrinkage) * sample
+    cov[np.diag_indices(n)] += shrinkage * mu
+    return cov, shrinkage
+
+
+class RiskModel:
+    """Annualized covariance and SPY betas for the tickers with enough price history."""
+
+    def __init__(
+        self,
+        as_of: date,
+        tickers: Sequence[str],
+        cov: np.ndarray,
+        betas: np.ndarray,
+        shrinkage: float,
+        market_vol: Optional[float],
+        requested: Sequence[str] = (),
+        lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+        min_days: Optional[int] = None,
+        price_dir: Optional[str] = None,
+        store_mtime: float = 0.0,
+    ):
+        self.as_of = as_of
+        self.tickers = list(tickers)
+        self.cov = cov
+        self.betas = betas
+        self.shrinkage = shrinkage
+        self.market_vol = market_vol
+        self.requested = set(requested) | set(self.tickers)
+        self.lookback_days = lookback_days
+        self.min_days = min_days
+        self.price_dir = price_dir  # Resolved path of the price store it was built from
+        self.store_mtime = store_mtime  # Newest mtime of those price files at build time
+        self.index = {t: i for i, t in enumerate(self.tickers)}
+
+    def _weights(self, weights: dict[str, float]) -> tuple[np.ndarray, np.ndarray, list[str]]:
+        """(model indices, weights, tickers not in the model) for a {ticker: weight} portfolio."""
+        covered = [(self.index[t], w) for t, w in weights.items() if t in self.index]
+        missing = [t for t in weights if t not in self.index]
+        idx = np.array([i for i, _ in covered], dtype=np.int64)
+        return idx, np.array([w for _, w in covered], dtype=float), missing
+
+    def volatility(self, weights: dict[str, float]) -> float:
+        idx, w, _ = self._weights(weights)
+        return float(np.sqrt(max(0.0, w @ self.cov[np.ix_(idx, idx)] @ w)))
+
+    def beta(self, weights: dict[str, float]) -> float:
+        idx, w, _ = self._weights(weights)
+        return float(np.nansum(w * self.betas[idx]))
+
+    def risk_contributions(self, weights: dict[str, float]) -> dict[str, float]:
+        """{ticker: share of portfolio variance}; shares sum to 1 over the covered names."""
+        idx, w, _ = self._weights(weights)
+        sub = self.cov[np.ix_(idx, idx)]
+        marginal = sub @ w
+        variance = float(w @ marginal)
+        if variance <= 0:
+            return {}
+        return {self.tickers[i]: float(wi * mi / variance) for i, wi, mi in zip(idx, w, marginal)}
+
+    def summary(self, weights: dict[str, float]) -> dict:
+        """Ex-ante volatility, beta and risk contributions, with how much of the weight was covered."""
+        _, w, missing = self._weights(weights)
+        return {
+            "as_of": self.as_of,
+            "volatility": self.volatility(weights),
+            "beta": self.beta(weights),
+            "coverage": float(w.sum() / sum(weights.values())) if weights else 0.0,
+            "missing": sorted(missing),
+            "shrinkage": self.shrinkage,
+            "risk_contributions": self.risk_contributions(weights),
+        }
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            np.savez_compressed(
+                f,
+                tickers=np.array(self.tickers),
+                requested=np.array(sorted(self.requested)),
+                cov=self.cov.astype(np.float32),
+                betas=self.betas,
+                shrinkage=self.shrinkage,
+                market_vol=np.nan if self.market_vol is None else self.market_vol,
+                lookback_days=self.lookback_days,
+                min_days=-1 if self.min_days is None else self.min_days,
+                price_dir=self.price_dir or "",
+                store_mtime=self.store_mtime,
+            )
+
+    @classmethod
+    def load(cls, path: Path, as_of: date) -> "RiskModel":
+        with np.load(path) as data:
+            market_vol = float(data["market_vol"])
+            # Caches written before these fields existed never match a build's settings
+            min_days = int(data["min_days"]) if "min_days" in data else -1
+            price_dir = str(data["price_dir"]) if "price_dir" in data else ""
+            return cls(
+                as_of,
+                [str(t) for t in data["tickers"]],
+                data["cov"].astype(float),
+                data["betas"],
+                float(data["shrinkage"]),
+                market_vol if np.isfinite(market_vol) else None,
+                requested=[str(t) for t in data["requested"]],
+                lookback_days=int(data["lookback_days"]),
+                min_days=min_days if min_days >= 0 else None,
+                price_dir=price_dir or None,
+                store_mtime=float(data["store_mtime"]) if "store_mtime" in data else 0.0,
+            )
+
+    def matches(self, lookback_days: int, min_days: int, price_dir: Path) -> bool:
+        """Whether this model was built with these settings from this price directory."""
+        return (
+            self.lookback_days == lookback_days
+            and self.min_days == min_days
+            and self.price_dir == str(price_dir.resolve())
+        )
+
+
+def build_risk_model(
+    tickers: Sequence[str],
+    as_of: date,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    min_days: int = DEFAULT_MIN_DAYS,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> RiskModel:
+    """Estimate the model for `tickers` from stored closes up to `as_of`.
+
+    Tickers with fewer than `min_days` returns in the window are left out of the model.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    built_from = {
+        "min_days": min_days,
+        "price_dir": str(price_dir.resolve()),
+        "store_mtime": last_modified(tickers + [MARKET_TICKER], price_dir),
+    }
+    start = as_of - timedelta(days=int(lookback_days * 1.5) + 10)
+    _, matrices = load_price_fields(tickers + [MARKET_TICKER], ("close",), start, as_of, price_dir)
+    closes = matrices["close"][-(lookback_days + 1):]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        returns = closes[1:] / closes[:-1] - 1.0
+    returns[~np.isfinite(returns)] = np.nan
+
+    market = returns[:, -1]
+    returns = returns[:, :-1]
+    keep = np.isfinite(returns).sum(axis=0) >= min_days
+    kept = [t for t, k in zip(tickers, keep) if k]
+    returns = returns[:, keep]
+    if not kept:
+        return RiskModel(as_of, [], np.zeros((0, 0)), np.zeros(0), 1.0, None, tickers, lookback_days, **built_from)
+
+    cov, shrinkage = ledoit_wolf(returns)
+
+    # Betas over the days both the ticker and SPY have returns
+    market_vol = None
+    betas = np.full(len(kept), np.nan)
+    has_market = np.isfinite(market)
+    if has_market.sum() >= min_days:
+        m = market[has_market] - market[has_market].mean()
+        r = returns[has_market]
+        valid = np.isfinite(r)
+        r = np.where(valid, r - np.nanmean(r, axis=0), 0.0)
+        m_var = np.where(valid, (m ** 2)[:, None], 0.0).sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            betas = np.where(m_var > 0, (r * m[:, None]).sum(axis=0) / m_var, np.nan)
+        market_vol = float(m.std() * np.sqrt(TRADING_DAYS))
+
+    return RiskModel(
+        as_of, kept, cov * TRADING_DAYS, betas, shrinkage, market_vol, tickers, lookback_days, **built_from
+    )
+
+
+def load_risk_model(
+    tickers: Sequence[str],
+    as_of: date,
+    lookback_days: int = DEFAULT_LOOKBACK_DAYS,
+    min_days: int = DEFAULT_MIN_DAYS,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+    cache_dir: Path = DEFAULT_RISK_MODEL_DIR,
+    refresh: bool = False,
+) -> RiskModel:
+    """The model for `as_of` from the day's cache if it is still valid for `tickers`.
+
+    Valid means built with the same lookback/min_days from the same price directory, for (a
+    superset of) `tickers`, and none of their price files modified since. Otherwise it is
+    estimated for `tickers` plus whatever a same-settings cached model covered, and cached.
+    """
+    path = cache_dir / f"{as_of.isoformat()}.npz"
+    cached = None
+    if path.exists() and not refresh:
+        try:
+            cached = RiskModel.load(path, as_of)
+            if not cached.matches(lookback_days, min_days, price_dir):
+                cached = None
+            elif cached.requested.issuperset(tickers) and last_modified(list(tickers) + [MARKET_TICKER], price_dir) <= cached.store_mtime:
+                return cached
+        except Exception as e:
+            typer.echo(f"  [WARN] Could not read risk model {path}: {e}")
+            cached = None
+
+    universe = list(tickers)
+    if cached is not None:
+        universe += sorted(cached.requested - set(tickers))
+    model = build_risk_model(universe, as_of, lookback_days, min_days, price_dir)
+    if model.tickers:
+        model.save(path)
+    return model
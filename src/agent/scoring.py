@@ -1,16 +1,36 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import math
 import statistics
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Optional
 
+import numpy as np
 import typer
 from openai import OpenAI
 
 from .config import load_config
-from .openai_client import get_client, chat_json
+from .openai_client import get_client, chat_json, deadline_after
+from .composite import (
+    COMPONENTS,
+    RISK_FAIL_SCORE,
+    CompositeWeights,
+    composite_bounds,
+    load_weights,
+    rescore,
+    save_weights,
+    viable_mask,
+)
+from .factors import FACTOR_MODES, NEUTRALIZATION_MODES, compute_factor_scores, price_history_stats
+from .liquidity import WINDOWS as LIQUIDITY_WINDOWS, LiquidityEstimate, estimate_liquidity
+from .price_store import MAX_LAG_DAYS as PRICE_STORE_MAX_LAG_DAYS, load_price_fields
+from .risk_calendar import RiskCalendar, load_risk_calendar
+from .security_master import load_security_master
 from .models import (
     StockDataResponse,
     ScoredStock,
@@ -31,6 +51,8 @@ def normalize_ticker(ticker: str) -> str:
     return TICKER_NORMALIZATION_MAP.get(ticker, ticker)
 
 
+# Per-ticker reference versions of the bucket ladders. `score` uses the vectorized
+# equivalents in factors.py (FACTOR_MODE=bucket reproduces these exactly).
 def calculate_value_score(fundamentals) -> Optional[float]:
     """Calculate value factor score from EV/EBITDA, FCF margin, P/E."""
     if not fundamentals:
@@ -254,6 +276,8 @@ def summarize_news(
     news_items: list,
     client: OpenAI,
     model: str,
+    deadline: Optional[float] = None,
+    echo: Callable[[str], None] = typer.echo,
 ) -> Optional[str]:
     """Summarize news articles into 3-4 sentences.
     
@@ -262,6 +286,8 @@ def summarize_news(
         news_items: List of NewsItem objects
         client: OpenAI client
         model: Model name
+        deadline: Optional stage deadline (see openai_client.deadline_after)
+        echo: Log function (the scoring workers pass their per-ticker buffer)
     
     Returns:
         News summary string (3-4 sentences) or None if no news
@@ -299,7 +325,7 @@ Output JSON with a "summary" field containing the summary text (3-4 sentences):
 }}"""
     
     try:
-        result = chat_json(client, model, system, user, timeout=60.0)
+        result = chat_json(client, model, system, user, timeout=60.0, deadline=deadline)
         summary = result.get("summary")
         if summary:
             return str(summary).strip()
@@ -313,10 +339,102 @@ Output JSON with a "summary" field containing the summary text (3-4 sentences):
         
         return None
     except Exception as e:
-        typer.echo(f"  [WARN] Error summarizing news for {ticker}: {e}")
+        echo(f"  [WARN] Error summarizing news for {ticker}: {e}")
         return None
 
 
+def normalize_price_target(target: Optional[float], current_price: Optional[float]) -> Optional[float]:
+    """Adjust obviously unadjusted targets (e.g., pre-split values)."""
+    if not target or not current_price or current_price <= 0:
+        return target
+    
+    ratio = target / current_price
+    # Detect common split ratios (2x, 3x, 4x, 5x, 10x) with tolerance
+    for split in (10, 5, 4, 3, 2):
+        if 0.6 * split <= ratio <= 1.4 * split:
+            return target / split
+    return target
+
+
+def calculate_price_target_upside(
+    ticker: str,
+    analyst_recs,
+    price_data,
+    echo: Callable[[str], None] = typer.echo,
+) -> Optional[float]:
+    """Upside % from the current price to the (split-adjusted) consensus price target, capped at 400%."""
+    if not (analyst_recs and analyst_recs.price_target and price_data):
+        return None
+    current_price = price_data.price
+    adjusted_target = normalize_price_target(analyst_recs.price_target, current_price)
+    if adjusted_target != analyst_recs.price_target:
+        echo(
+            f"    [WARN] Adjusted price target for {ticker} from "
+            f"{analyst_recs.price_target} to {adjusted_target} (possible split)"
+        )
+    if not (current_price > 0 and adjusted_target and adjusted_target > 0):
+        return None
+    price_target_upside = ((adjusted_target - current_price) / current_price) * 100
+    # Cap extreme upside to avoid runaway scores from bad targets
+    if price_target_upside > 400:
+        echo(
+            f"    [WARN] Price target upside {price_target_upside:.1f}% for {ticker} exceeds cap; capping to 400%"
+        )
+        price_target_upside = 400.0
+    return price_target_upside
+
+
+def _fingerprint(payload) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:16]
+
+
+def _quantize(value: Optional[float], step: float = 0.01) -> Optional[int]:
+    """Bucket a positive value on a log scale (~1% steps) so tiny moves don't change a fingerprint."""
+    if value is None or value <= 0:
+        return None
+    return round(math.log(value) / math.log1p(step))
+
+
+def sentiment_fingerprint(stock_data, model: str, as_of_date: Optional[date] = None) -> str:
+    """Hash of everything synthesize_sentiment sends to the LLM (price and technicals quantized)."""
+    recs = stock_data.analyst_recommendations
+    price = stock_data.price_data
+    news = stock_data.news
+    if as_of_date:
+        news = [n for n in news if n.published_at and n.published_at.date() <= as_of_date]
+    return _fingerprint({
+        "model": model,
+        "as_of": as_of_date,
+        "recs": recs.model_dump(exclude={"as_of"}) if recs else None,
+        "news": [(n.headline, n.sentiment or "neutral") for n in news[:5]],
+        "price": _quantize(price.price) if price else None,
+        "sma_20": _quantize(price.sma_20) if price else None,
+        "sma_50": _quantize(price.sma_50) if price else None,
+        "rsi_14": round(price.rsi_14) if price and price.rsi_14 is not None else None,
+    })
+
+
+def news_fingerprint(news_items: list, model: str) -> str:
+    """Hash of the articles summarize_news sends to the LLM."""
+    return _fingerprint({
+        "model": model,
+        "news": [
+            (n.headline, n.summary or "", n.source, n.published_at.date() if n.published_at else None)
+            for n in news_items[:10]
+        ],
+    })
+
+
+def _is_fallback_sentiment(sentiment: SentimentAnalysis) -> bool:
+    """The neutral placeholder synthesize_sentiment returns on LLM errors; not worth caching."""
+    return (
+        sentiment.sentiment_score == 0.0
+        and not sentiment.key_drivers
+        and not sentiment.key_risks
+        and sentiment.analyst_consensus is None
+    )
+
+
 def synthesize_sentiment(
     ticker: str,
     analyst_recs,
@@ -326,27 +444,22 @@ def synthesize_sentiment(
     model: str,
     as_of_date: Optional[date] = None,
     model_cutoff: Optional[date] = None,
+    deadline: Optional[float] = None,
+    echo: Callable[[str], None] = typer.echo,
+    price_target_upside: Optional[float] = None,
 ) -> SentimentAnalysis:
-    """Synthesize sentiment from analyst recs and news using LLM."""
+    """Synthesize sentiment from analyst recs and news using LLM.
+
+    Log lines go to `echo` (the scoring workers pass their per-ticker buffer).
+    `price_target_upside` is the already computed upside, if any (otherwise computed here).
+    """
     # Normalize legacy tickers (e.g., FB -> META) to avoid stale data artifacts
     if ticker == "FB":
         ticker = "META"
     
-    def normalize_price_target(target: Optional[float], current_price: Optional[float]) -> Optional[float]:
-        """Adjust obviously unadjusted targets (e.g., pre-split values)."""
-        if not target or not current_price or current_price <= 0:
-            return target
-        
-        ratio = target / current_price
-        # Detect common split ratios (2x, 3x, 4x, 5x, 10x) with tolerance
-        for split in (10, 5, 4, 3, 2):
-            if 0.6 * split <= ratio <= 1.4 * split:
-                return target / split
-        return target
-    
-    typer.echo(f"    [DEBUG] Starting sentiment synthesis for {ticker}")
-    typer.echo(f"    [DEBUG] Analyst recs available: {analyst_recs is not None}")
-    typer.echo(f"    [DEBUG] News items count: {len(news_items)}")
+    echo(f"    [DEBUG] Starting sentiment synthesis for {ticker}")
+    echo(f"    [DEBUG] Analyst recs available: {analyst_recs is not None}")
+    echo(f"    [DEBUG] News items count: {len(news_items)}")
     
     # Build context
     analyst_info = []
@@ -451,32 +564,17 @@ Output JSON:
 }}"""
     
     try:
-        typer.echo(f"    [DEBUG] Calling LLM ({model}) for sentiment synthesis...")
-        result = chat_json(client, model, system, user)
-        typer.echo(f"    [DEBUG] LLM call completed, parsing result...")
+        echo(f"    [DEBUG] Calling LLM ({model}) for sentiment synthesis...")
+        result = chat_json(client, model, system, user, deadline=deadline)
+        echo(f"    [DEBUG] LLM call completed, parsing result...")
         
         # Calculate price target upside if we have both
-        price_target_upside = None
-        if analyst_recs and analyst_recs.price_target and price_data:
-            current_price = price_data.price
-            adjusted_target = normalize_price_target(analyst_recs.price_target, current_price)
-            if adjusted_target != analyst_recs.price_target:
-                typer.echo(
-                    f"    [WARN] Adjusted price target for {ticker} from "
-                    f"{analyst_recs.price_target} to {adjusted_target} (possible split)"
-                )
-            if current_price > 0 and adjusted_target and adjusted_target > 0:
-                price_target_upside = ((adjusted_target - current_price) / current_price) * 100
-                # Cap extreme upside to avoid runaway scores from bad targets
-                if price_target_upside > 400:
-                    typer.echo(
-                        f"    [WARN] Price target upside {price_target_upside:.1f}% for {ticker} exceeds cap; capping to 400%"
-                    )
-                    price_target_upside = 400.0
+        if price_target_upside is None:
+            price_target_upside = calculate_price_target_upside(ticker, analyst_recs, price_data, echo)
         
         return SentimentAnalysis(
             overall_sentiment=result.get("overall_sentiment", "neutral"),
-            sentiment_score=float(result.get("sentiment_score", 0.0)),
+            sentiment_score=max(-1.0, min(1.0, float(result.get("sentiment_score", 0.0)))),
             analyst_consensus=result.get("analyst_consensus") or (analyst_recs.consensus if analyst_recs else None),
             analyst_score=result.get("analyst_score"),
             news_sentiment=result.get("news_sentiment"),
@@ -486,7 +584,7 @@ Output JSON:
             price_target_upside=price_target_upside if price_target_upside is not None else result.get("price_target_upside"),
         )
     except Exception as e:
-        typer.echo(f"  [WARN] Error synthesizing sentiment for {ticker}: {e}")
+        echo(f"  [WARN] Error synthesizing sentiment for {ticker}: {e}")
         # Return neutral sentiment as fallback
         return SentimentAnalysis(
             overall_sentiment="neutral",
@@ -500,12 +598,26 @@ def apply_risk_screens(
     ticker: str,
     price_data,
     cfg,
+    calendar: Optional[RiskCalendar] = None,
+    news=(),
+    liquidity: Optional[LiquidityEstimate] = None,
 ) -> RiskFlags:
-    """Apply hard risk screens."""
+    """Apply hard risk screens.
+    
+    Halt, M&A and earnings checks need a RiskCalendar (see risk_calendar.py); without one
+    they pass. `news` is the ticker's already-fetched news, scanned for deal headlines.
+    `liquidity` comes from liquidity.estimate_liquidity; names with no usable volume pass.
+    """
     failed_checks = []
     
-    # Liquidity check disabled (FMP often returns zero volume placeholders)
+    # Liquidity: median dollar volume against MIN_AVG_DOLLAR_VOLUME
     liquidity_ok = True
+    dollar_volume = liquidity.dollar_volume if liquidity else None
+    if dollar_volume is not None and dollar_volume < cfg.min_avg_dollar_volume:
+        liquidity_ok = False
+        failed_checks.append(
+            f"Dollar volume too low (${dollar_volume / 1e6:.2f}M < ${cfg.min_avg_dollar_volume / 1e6:.2f}M, {liquidity.source})"
+        )
     
     # Price check
     price_ok = True
@@ -517,17 +629,24 @@ def apply_risk_screens(
         price_ok = False
         failed_checks.append("No price data")
     
-    # Trading halts (would need real-time data - placeholder)
     no_trading_halts = True
-    # TODO: Check for trading halts if we have real-time data source
-    
-    # Pending M&A (would need real-time data - placeholder)
     no_pending_ma = True
-    # TODO: Check for pending M&A announcements
-    
-    # Earnings (would need calendar data - placeholder)
     earnings_clear = True
-    # TODO: Check if earnings within 2 trading days
+    if calendar is not None:
+        halt = calendar.trading_halt(ticker)
+        if halt:
+            no_trading_halts = False
+            failed_checks.append(f"Trading halt: {halt}")
+        
+        deal = calendar.pending_ma(ticker, news or ())
+        if deal:
+            no_pending_ma = False
+            failed_checks.append(f"Pending M&A: {deal}")
+        
+        earnings_day = calendar.earnings_date(ticker)
+        if earnings_day:
+            earnings_clear = False
+            failed_checks.append(f"Earnings on {earnings_day.isoformat()} (within {cfg.earnings_blackout_days} trading days)")
     
     passed_all_checks = len(failed_checks) == 0
     
@@ -539,6 +658,7 @@ def apply_risk_screens(
         no_trading_halts=no_trading_halts,
         no_pending_ma=no_pending_ma,
         earnings_clear=earnings_clear,
+        avg_dollar_volume=dollar_volume,
     )
 
 
@@ -546,60 +666,38 @@ def calculate_composite_score(
     factor_scores: FactorScores,
     sentiment: SentimentAnalysis,
     risk_flags: RiskFlags,
+    weights: Optional[CompositeWeights] = None,
 ) -> float:
-    """Calculate composite score combining factors and sentiment."""
+    """Calculate composite score combining factors and sentiment.
+    
+    Weights default to CompositeWeights(); see composite.composite_matrix for the
+    vectorized version used by `rerank`.
+    """
     # If failed risk checks, heavily penalize
     if not risk_flags.passed_all_checks:
-        return -10.0  # Effectively disqualify
-    
-    # Weight factors
-    weights = {
-        "value": 0.20,
-        "quality": 0.25,
-        "growth": 0.20,
-        "stability": 0.10,
-        "revisions": 0.10,
-        "momentum": 0.05,
-        "sentiment": 0.15,
-    }
+        return RISK_FAIL_SCORE  # Effectively disqualify
+    
+    weights = weights or CompositeWeights()
     
     score = 0.0
     weight_sum = 0.0
     
     # Add factor scores
-    if factor_scores.value is not None:
-        score += factor_scores.value * weights["value"]
-        weight_sum += weights["value"]
-    
-    if factor_scores.quality is not None:
-        score += factor_scores.quality * weights["quality"]
-        weight_sum += weights["quality"]
-    
-    if factor_scores.growth is not None:
-        score += factor_scores.growth * weights["growth"]
-        weight_sum += weights["growth"]
-    
-    if factor_scores.stability is not None:
-        score += factor_scores.stability * weights["stability"]
-        weight_sum += weights["stability"]
-    
-    if factor_scores.revisions is not None:
-        score += factor_scores.revisions * weights["revisions"]
-        weight_sum += weights["revisions"]
-    
-    if getattr(factor_scores, "momentum", None) is not None:
-        score += factor_scores.momentum * weights["momentum"]
-        weight_sum += weights["momentum"]
+    for name in COMPONENTS[:-1]:
+        value = getattr(factor_scores, name, None)
+        if value is not None:
+            score += value * getattr(weights, name)
+            weight_sum += getattr(weights, name)
     
     # Add sentiment score
-    score += sentiment.sentiment_score * weights["sentiment"]
-    weight_sum += weights["sentiment"]
+    score += sentiment.sentiment_score * weights.sentiment
+    weight_sum += weights.sentiment
 
     # Penalty for negative price target upside to avoid over-allocating to names
-    # that are trading above consensus targets. Doubled from previous version.
+    # that are trading above consensus targets.
     if sentiment.price_target_upside is not None and sentiment.price_target_upside < 0:
-        # Scale penalty: -5% upside -> -0.10 (doubled), capped at -0.20
-        pt_penalty = max(-0.20, (sentiment.price_target_upside / 100.0) * 2)
+        # Default scale: -5% upside -> -0.10, capped at -0.20
+        pt_penalty = max(-weights.pt_penalty_cap, (sentiment.price_target_upside / 100.0) * weights.pt_penalty_scale)
         score += pt_penalty
     
     # Normalize by actual weight sum (in case some factors are missing)
@@ -609,6 +707,90 @@ def calculate_composite_score(
     return score
 
 
+def _load_price_store(stock_data: list, cfg) -> tuple[list, Optional[np.ndarray], Optional[np.ndarray]]:
+    """(dates, closes, volumes) from the price store; columns follow `stock_data`, plus SPY last.
+
+    Columns of tickers whose last stored bar lags `effective_date` by more than
+    PRICE_STORE_MAX_LAG_DAYS trading days are blanked (NaN), so callers fall back as if unstored.
+    """
+    as_of = cfg.effective_date
+    tickers = [normalize_ticker(sd.ticker) for sd in stock_data]
+    # Calendar-day window comfortably covering the stability lookback and the liquidity windows
+    lookback = max(cfg.stability_lookback_days, max(LIQUIDITY_WINDOWS))
+    start = as_of - timedelta(days=int(lookback * 1.5) + 10)
+    dates, matrices = load_price_fields(tickers + ["SPY"], start=start, end=as_of, price_dir=Path(cfg.price_store_dir))
+    if not dates:
+        return [], None, None
+    closes, volumes = matrices["close"], matrices["volume"]
+    
+    # A ticker whose last stored bar is too old is treated as absent from the store
+    has_bar = np.isfinite(closes)
+    last = np.where(has_bar.any(axis=0), len(dates) - 1 - np.argmax(has_bar[::-1], axis=0), -1)
+    last_dates = np.array([dates[i] if i >= 0 else start for i in last], dtype="datetime64[D]")
+    lag = np.busday_count(last_dates, np.datetime64(as_of, "D"))
+    stale = has_bar.any(axis=0) & (lag > PRICE_STORE_MAX_LAG_DAYS)
+    if stale.any():
+        names = [t for t, s in zip(tickers + ["SPY"], stale) if s]
+        typer.echo(
+            f"  [WARN] Price store is stale for {len(names)} tickers (last bar more than "
+            f"{PRICE_STORE_MAX_LAG_DAYS} trading days before {as_of}; e.g. {', '.join(names[:5])}); "
+            "ignoring their stored bars. Run: python main.py data prices"
+        )
+        closes[:, stale] = np.nan
+        volumes[:, stale] = np.nan
+    return dates, closes, volumes
+
+
+def _price_history_stats(dates: list, closes: Optional[np.ndarray], cfg) -> Optional[dict]:
+    """Stability inputs (realized vol, drawdown, downside deviation, beta vs SPY) from the price store."""
+    if not dates or closes is None or not np.isfinite(closes[:, -1]).any():
+        typer.echo(f"  [INFO] No SPY/price history in {cfg.price_store_dir}; stability uses profile beta")
+        return None
+    closes = closes[-(cfg.stability_lookback_days + 1):]
+    stats = price_history_stats(closes[:, :-1], closes[:, -1], min_days=cfg.stability_min_days)
+    covered = int(np.isfinite(stats["hist_vol"]).sum())
+    typer.echo(
+        f"  [INFO] Price-history stability for {covered}/{closes.shape[1] - 1} stocks "
+        f"({len(closes)} days to {dates[-1]})"
+    )
+    return stats
+
+
+def _load_partial_scores(path: Path, run_key: str) -> dict[str, ScoredStock]:
+    """Tickers already scored by an interrupted run with the same inputs ({} if none)."""
+    if not path.exists():
+        return {}
+    done = {}
+    with path.open(encoding="utf-8") as f:
+        try:
+            header = json.loads(f.readline() or "{}")
+        except json.JSONDecodeError:
+            return {}
+        if header.get("run_key") != run_key:
+            typer.echo(f"  [INFO] Ignoring {path} (written for different inputs)")
+            return {}
+        for line in f:
+            try:
+                stock = ScoredStock.model_validate_json(line)
+            except Exception:
+                continue  # A line cut off by the crash
+            done[stock.ticker] = stock
+    return done
+
+
+def _load_configured_weights(cfg) -> CompositeWeights:
+    """Composite weights from COMPOSITE_WEIGHTS_FILE, or the defaults."""
+    if not cfg.composite_weights_file:
+        return CompositeWeights()
+    try:
+        weights = load_weights(Path(cfg.composite_weights_file))
+    except Exception as e:
+        typer.echo(f"Failed to load composite weights from {cfg.composite_weights_file}: {e}")
+        raise typer.Exit(code=1)
+    typer.echo(f"[INFO] Composite weights from {cfg.composite_weights_file}")
+    return weights
+
+
 @app.command()
 def score(
     stock_data_file: Path = typer.Option(
@@ -621,11 +803,28 @@ def score(
         Path("data/scored_candidates.json"), help="Output JSON path"
     ),
     model: Optional[str] = typer.Option(None, help="OpenAI model override (defaults to cheap_model for efficiency)"),
+    time_budget: Optional[float] = typer.Option(
+        None, help="Stage time budget in seconds; LLM calls past it fall back to neutral sentiment / no summary"
+    ),
+    incremental: bool = typer.Option(
+        True, help="Reuse sentiment/news summaries from the previous scored file when a ticker's inputs are unchanged"
+    ),
+    previous_file: Optional[Path] = typer.Option(
+        None, help="Previous scored candidates to reuse LLM outputs from (defaults to --out)"
+    ),
+    workers: Optional[int] = typer.Option(
+        None, help="Tickers scored concurrently (defaults to LLM_CONCURRENCY)"
+    ),
+    resume: bool = typer.Option(
+        True, help="Continue an interrupted run from <out>.partial.jsonl if its inputs match"
+    ),
 ):
     """Score candidates using factor analysis, sentiment synthesis, and risk screens."""
     cfg = load_config()
+    deadline = deadline_after(time_budget) if time_budget else None
     # Use cheap model by default for sentiment synthesis (high volume, doesn't need complex reasoning)
     chosen_model = model or cfg.cheap_model
+    weights = _load_configured_weights(cfg)
     
     if not stock_data_file.exists():
         typer.echo(f"Stock data file not found: {stock_data_file}")
@@ -682,22 +881,32 @@ def score(
                 typer.echo(f"  [WARN] Could not load candidates file: {e}")
                 typer.echo("  Continuing without sector/theme info...")
     
+    # Previous scores: LLM outputs are reused for tickers whose inputs haven't changed
+    previous_map = {}
+    previous_file = previous_file or out
+    if incremental and previous_file.exists():
+        try:
+            previous_resp = ScoredCandidatesResponse.model_validate(
+                json.loads(previous_file.read_text(encoding='utf-8'))
+            )
+            previous_map = {c.ticker: c for c in previous_resp.candidates}
+            typer.echo(f"  [INFO] Incremental scoring against {len(previous_map)} tickers in {previous_file}")
+        except Exception as e:
+            typer.echo(f"  [WARN] Could not load previous scores from {previous_file}: {e}")
+    as_of_date = cfg.backtest_date if cfg.backtest_mode else None
+    
     client = get_client()
-    scored_stocks = []
     
     typer.echo(f"Scoring {len(stock_data_resp.data)} stocks...")
     
     import time
     start_time = time.time()
     
-    for i, stock_data in enumerate(stock_data_resp.data):
+    # Drop nonexistent/delisted or obviously bad data before computing cross-sectional factors
+    kept = []
+    for stock_data in stock_data_resp.data:
         ticker_raw = stock_data.ticker
         ticker = normalize_ticker(ticker_raw)
-        ticker_out = ticker
-        ticker_start = time.time()
-        typer.echo(f"[{i+1}/{len(stock_data_resp.data)}] Scoring {ticker_raw} (as {ticker})...")
-        
-        # Drop nonexistent/delisted or obviously bad data (all key metrics zero)
         if ticker in {"TWTR"}:
             typer.echo(f"  [WARN] Dropping {ticker_raw} (delisted/nonexistent)")
             continue
@@ -719,81 +928,256 @@ def score(
         if bad_metrics:
             typer.echo(f"  [WARN] Dropping {ticker_raw} (all main metrics zero)")
             continue
-        
-        # Get sector/theme from candidates
-        typer.echo(f"  -> Getting sector/theme info...")
-        candidate = candidates_map.get(ticker) or candidates_map.get(ticker_raw)
-        sector = candidate.sector if candidate else None
-        theme = candidate.theme if candidate else None
-        
         # Guard: if market cap missing, drop ticker (likely bad/nonexistent data)
         if not stock_data.price_data or stock_data.price_data.market_cap is None:
-            typer.echo("  [WARN] Missing market_cap or price data; dropping ticker")
+            typer.echo(f"  [WARN] Missing market_cap or price data; dropping {ticker_raw}")
             continue
+        kept.append(stock_data)
 
-        # Calculate factor scores
-        typer.echo(f"  -> Calculating factor scores...")
-        factor_scores = FactorScores(
-            value=calculate_value_score(stock_data.fundamentals),
-            quality=calculate_quality_score(stock_data.fundamentals),
-            growth=calculate_growth_score(stock_data.fundamentals),
-            stability=calculate_stability_score(stock_data.price_data),
-            revisions=calculate_revisions_score(stock_data.analyst_recommendations),
-            momentum=calculate_momentum_score(stock_data.price_data),
+    # Factor scores for the whole cross-section in one vectorized pass
+    if cfg.factor_mode not in FACTOR_MODES:
+        typer.echo(f"Unknown FACTOR_MODE {cfg.factor_mode!r}; expected one of {FACTOR_MODES}")
+        raise typer.Exit(code=1)
+    if cfg.factor_neutralization not in NEUTRALIZATION_MODES:
+        typer.echo(
+            f"Unknown FACTOR_NEUTRALIZATION {cfg.factor_neutralization!r}; expected one of {NEUTRALIZATION_MODES}"
         )
+        raise typer.Exit(code=1)
+    
+    # Security master fills in sectors the candidates file lacks and provides industries
+    # (for industry-neutral factors and the portfolio industry caps)
+    security_master = load_security_master(fmp_api_key=cfg.fmp_api_key)
+    
+    def classify(stock_data) -> tuple[Optional[str], Optional[str]]:
+        ticker = normalize_ticker(stock_data.ticker)
+        candidate = candidates_map.get(ticker) or candidates_map.get(stock_data.ticker)
+        master = security_master.get(ticker) or security_master.get(stock_data.ticker) or {}
+        sector = (candidate.sector if candidate else None) or master.get("sector")
+        industry = (candidate.industry if candidate else None) or master.get("industry")
+        return sector, industry
+    
+    group_labels = None
+    if cfg.factor_mode == "zscore" and cfg.factor_neutralization != "none":
+        field = 0 if cfg.factor_neutralization == "sector" else 1
+        group_labels = [classify(sd)[field] for sd in kept]
+        covered = sum(1 for label in group_labels if label)
+        typer.echo(
+            f"[INFO] {cfg.factor_neutralization.title()}-neutral z-scores: {covered}/{len(kept)} stocks classified "
+            f"into {len({label for label in group_labels if label})} groups (min group size {cfg.factor_min_group_size})"
+        )
+        if covered == 0:
+            typer.echo("[WARN] No group labels found; run 'python main.py data security-master' for industries")
+    elif cfg.factor_neutralization != "none":
+        typer.echo("[WARN] FACTOR_NEUTRALIZATION only applies to FACTOR_MODE=zscore; ignoring")
+    
+    # Event-risk calendar: a few bulk requests per day, then per-ticker lookups
+    risk_calendar = None
+    if cfg.risk_calendar_enabled:
+        risk_calendar = load_risk_calendar(
+            cfg.effective_date,
+            fmp_api_key=cfg.fmp_api_key,
+            blackout_days=cfg.earnings_blackout_days,
+            live_feeds=not cfg.backtest_mode,
+        )
+        available = [name for name, ok in risk_calendar.sources.items() if ok]
+        typer.echo(
+            f"[INFO] Risk calendar {cfg.effective_date}: {len(risk_calendar.earnings)} earnings through "
+            f"{risk_calendar.blackout_end}, {len(risk_calendar.ma_targets)} M&A targets, {len(risk_calendar.halts)} halts "
+            f"(sources: {', '.join(available) or 'none; news scan only'})"
+        )
+    
+    # One price-store read feeds both the stability factor and the liquidity screen
+    price_dates, price_closes, price_volumes = _load_price_store(kept, cfg)
+    price_history = _price_history_stats(price_dates, price_closes, cfg) if cfg.factor_mode == "zscore" else None
+    
+    liquidity = estimate_liquidity(
+        kept,
+        price_closes[:, :-1] if price_closes is not None else None,
+        price_volumes[:, :-1] if price_volumes is not None else None,
+    )
+    sources = Counter(est.source for est in liquidity)
+    illiquid = sum(
+        1 for est in liquidity if est.dollar_volume is not None and est.dollar_volume < cfg.min_avg_dollar_volume
+    )
+    typer.echo(
+        f"[INFO] Liquidity: {illiquid}/{len(kept)} below ${cfg.min_avg_dollar_volume:,.0f} median dollar volume "
+        f"(sources: {', '.join(f'{k}={v}' for k, v in sorted(sources.items()))})"
+    )
+    factor_start = time.perf_counter()
+    all_factor_scores = compute_factor_scores(
+        kept,
+        mode=cfg.factor_mode,
+        group_labels=group_labels,
+        min_group_size=cfg.factor_min_group_size,
+        price_history=price_history,
+    )
+    typer.echo(
+        f"[INFO] Factor scores ({cfg.factor_mode}) for {len(kept)} stocks "
+        f"in {(time.perf_counter() - factor_start) * 1000:.1f} ms"
+    )
+    
+    # Phase one: risk screens and composite bounds for everyone, without the LLM
+    all_risk_flags = [
+        apply_risk_screens(normalize_ticker(sd.ticker), sd.price_data, cfg, risk_calendar, sd.news, liquidity[i])
+        for i, sd in enumerate(kept)
+    ]
+    passed_mask = np.array([rf.passed_all_checks for rf in all_risk_flags], dtype=bool)
+    # Computed once here (split/cap warnings print once); the workers reuse them
+    all_upsides = [
+        calculate_price_target_upside(normalize_ticker(sd.ticker), sd.analyst_recommendations, sd.price_data)
+        for sd in kept
+    ]
+    viable = passed_mask.copy()
+    if cfg.prellm_keep_rank > 0 and len(kept):
+        factor_components = np.array(
+            [[getattr(fs, name) if getattr(fs, name) is not None else np.nan for name in COMPONENTS[:-1]]
+             for fs in all_factor_scores],
+            dtype=float,
+        )
+        upside = np.array(all_upsides, dtype=float)
+        lower, upper = composite_bounds(factor_components, upside, passed_mask, weights)
+        viable = viable_mask(
+            lower, upper, passed_mask, cfg.prellm_keep_rank,
+            groups=[classify(sd)[0] for sd in kept],
+            group_keep=max(1, math.ceil(cfg.sector_cap / cfg.max_weight - 1e-9)),
+        )
+    typer.echo(
+        f"[INFO] Pre-LLM screen: {int(passed_mask.sum())}/{len(kept)} pass risk screens, "
+        f"{int(viable.sum())} can reach rank {cfg.prellm_keep_rank or 'any'} (or their sector's top names) "
+        f"and go to the LLM"
+    )
+    
+    # Phase two: LLM sentiment and news summaries for the viable names only, overlapped across
+    # tickers by a bounded worker pool. Each finished ticker is appended to a partial JSONL file
+    # so an interrupted run can resume; the final order is the input order, as if sequential.
+    partial_path = out.with_name(out.stem + ".partial.jsonl")
+    run_key = _fingerprint({
+        "stock_data": hashlib.sha256(stock_data_text.encode("utf-8")).hexdigest(),
+        "model": chosen_model,
+        "as_of": cfg.effective_date,
+        "weights": weights.model_dump(),
+        "factor_mode": cfg.factor_mode,
+        "neutralization": cfg.factor_neutralization,
+        "prellm_keep_rank": cfg.prellm_keep_rank,
+    })
+    results: list[Optional[tuple]] = [None] * len(kept)
+    if resume:
+        resumed = _load_partial_scores(partial_path, run_key)
+        for i, stock_data in enumerate(kept):
+            done = resumed.get(normalize_ticker(stock_data.ticker))
+            if done is not None:
+                results[i] = (done, {"resumed": True, "skipped": done.sentiment_skipped})
+        if resumed:
+            typer.echo(f"  [INFO] Resuming: {sum(r is not None for r in results)} tickers already scored in {partial_path}")
+    
+    def score_one(i: int) -> tuple[ScoredStock, dict, list[str]]:
+        """Score kept[i]; returns the result, what was reused/skipped, and its log lines."""
+        stock_data, factor_scores = kept[i], all_factor_scores[i]
+        log = []
+        echo = log.append
+        ticker_raw = stock_data.ticker
+        ticker = normalize_ticker(ticker_raw)
+        ticker_out = ticker
+        ticker_start = time.time()
+        echo(f"[{i+1}/{len(kept)}] Scoring {ticker_raw} (as {ticker})...")
+        
+        # Get sector/theme from candidates
+        candidate = candidates_map.get(ticker) or candidates_map.get(ticker_raw)
+        sector, industry = classify(stock_data)
+        theme = candidate.theme if candidate else None
+
         value_str = f"{factor_scores.value:.2f}" if factor_scores.value is not None else 'N/A'
         quality_str = f"{factor_scores.quality:.2f}" if factor_scores.quality is not None else 'N/A'
         growth_str = f"{factor_scores.growth:.2f}" if factor_scores.growth is not None else 'N/A'
         momentum_str = f"{factor_scores.momentum:.2f}" if factor_scores.momentum is not None else 'N/A'
-        typer.echo(f"  [OK] Factor scores: value={value_str}, quality={quality_str}, growth={growth_str}, momentum={momentum_str}")
-        
-        # Synthesize sentiment
-        typer.echo(f"  -> Synthesizing sentiment (LLM call - this may take a moment)...")
-        sentiment_start = time.time()
-        sentiment = synthesize_sentiment(
-            ticker,
-            stock_data.analyst_recommendations,
-            stock_data.news,
-            stock_data.price_data,
-            client,
-            chosen_model,
-            as_of_date=cfg.backtest_date if cfg.backtest_mode else None,
-            model_cutoff=cfg.backtest_model_cutoff,
-        )
-        sentiment_elapsed = time.time() - sentiment_start
-        typer.echo(f"  [OK] Sentiment: {sentiment.overall_sentiment} (score={sentiment.sentiment_score:.2f}, took {sentiment_elapsed:.1f}s)")
-        
-        # Apply risk screens
-        typer.echo(f"  -> Applying risk screens...")
-        risk_flags = apply_risk_screens(ticker, stock_data.price_data, cfg)
-        typer.echo(f"  [OK] Risk checks: {'PASSED' if risk_flags.passed_all_checks else 'FAILED'} "
-                   f"{'(' + ', '.join(risk_flags.failed_checks) + ')' if risk_flags.failed_checks else ''}")
+        echo(f"  [OK] Factor scores: value={value_str}, quality={quality_str}, growth={growth_str}, momentum={momentum_str}")
         
-        # Calculate composite score
-        typer.echo(f"  -> Calculating composite score...")
-        composite_score = calculate_composite_score(factor_scores, sentiment, risk_flags)
-        typer.echo(f"  [OK] Composite score: {composite_score:.3f}")
+        risk_flags = all_risk_flags[i]
+        echo(f"  [OK] Risk checks: {'PASSED' if risk_flags.passed_all_checks else 'FAILED'} "
+             f"{'(' + ', '.join(risk_flags.failed_checks) + ')' if risk_flags.failed_checks else ''}")
         
-        # Summarize news articles
-        news_summary = None
-        if stock_data.news:
-            typer.echo(f"  -> Summarizing news articles...")
-            news_summary_start = time.time()
-            news_summary = summarize_news(
+        # Synthesize sentiment (reused from the previous run if its inputs are unchanged)
+        counts = {"reused_sentiment": False, "reused_summary": False, "skipped": False}
+        previous = previous_map.get(ticker_out)
+        sentiment_fp = sentiment_fingerprint(stock_data, chosen_model, as_of_date)
+        reusable = bool(previous and previous.sentiment_fingerprint == sentiment_fp)
+        sentiment_skipped = not viable[i] and not reusable
+        if sentiment_skipped:
+            # Neutral placeholder; the name is disqualified or can't reach the top ranks anyway
+            sentiment = SentimentAnalysis(
+                overall_sentiment="neutral",
+                sentiment_score=0.0,
+                key_drivers=[],
+                key_risks=[],
+                price_target_upside=all_upsides[i],
+            )
+            sentiment_fp = None
+            counts["skipped"] = True
+            reason = "failed risk screens" if not risk_flags.passed_all_checks else "cannot reach top ranks"
+            echo(f"  [OK] Sentiment skipped ({reason})")
+        elif reusable:
+            sentiment = previous.sentiment.model_copy()
+            # Price moves within the fingerprint's ~1% bucket still update the target upside
+            if all_upsides[i] is not None:
+                sentiment.price_target_upside = all_upsides[i]
+            counts["reused_sentiment"] = True
+            echo(f"  [OK] Sentiment: {sentiment.overall_sentiment} (score={sentiment.sentiment_score:.2f}, reused, inputs unchanged)")
+        else:
+            sentiment_start = time.time()
+            sentiment = synthesize_sentiment(
                 ticker,
+                stock_data.analyst_recommendations,
                 stock_data.news,
+                stock_data.price_data,
                 client,
                 chosen_model,
+                as_of_date=as_of_date,
+                model_cutoff=cfg.backtest_model_cutoff,
+                deadline=deadline,
+                echo=echo,
+                price_target_upside=all_upsides[i],
             )
-            news_summary_elapsed = time.time() - news_summary_start
-            if news_summary:
-                typer.echo(f"  [OK] News summary generated (took {news_summary_elapsed:.1f}s)")
+            sentiment_elapsed = time.time() - sentiment_start
+            echo(f"  [OK] Sentiment: {sentiment.overall_sentiment} (score={sentiment.sentiment_score:.2f}, took {sentiment_elapsed:.1f}s)")
+            if _is_fallback_sentiment(sentiment):
+                sentiment_fp = None  # Retry next run instead of caching the placeholder
+        
+        # Calculate composite score
+        composite_score = calculate_composite_score(factor_scores, sentiment, risk_flags, weights)
+        echo(f"  [OK] Composite score: {composite_score:.3f}")
+        
+        # Summarize news articles (reused from the previous run if the articles are unchanged)
+        news_summary = None
+        news_fp = None
+        if stock_data.news:
+            news_fp = news_fingerprint(stock_data.news, chosen_model)
+            if previous and previous.news_fingerprint == news_fp and previous.news_summary:
+                news_summary = previous.news_summary
+                counts["reused_summary"] = True
+                echo(f"  [OK] News summary reused (articles unchanged)")
+            elif sentiment_skipped:
+                news_fp = None
             else:
-                typer.echo(f"  [WARN] Could not generate news summary")
+                news_summary_start = time.time()
+                news_summary = summarize_news(
+                    ticker,
+                    stock_data.news,
+                    client,
+                    chosen_model,
+                    deadline=deadline,
+                    echo=echo,
+                )
+                news_summary_elapsed = time.time() - news_summary_start
+                if news_summary:
+                    echo(f"  [OK] News summary generated (took {news_summary_elapsed:.1f}s)")
+                else:
+                    echo(f"  [WARN] Could not generate news summary")
+                    news_fp = None
         
         scored_stock = ScoredStock(
             ticker=ticker_out,
             sector=sector,
+            industry=industry,
             theme=theme,
             factor_scores=factor_scores,
             sentiment=sentiment,
@@ -802,12 +1186,39 @@ def score(
             news_summary=news_summary,
             price=stock_data.price_data.price if stock_data.price_data else None,
             market_cap=stock_data.price_data.market_cap if stock_data.price_data else None,
+            sentiment_fingerprint=sentiment_fp,
+            news_fingerprint=news_fp,
+            sentiment_skipped=sentiment_skipped,
         )
         
-        scored_stocks.append(scored_stock)
-        
         ticker_elapsed = time.time() - ticker_start
-        typer.echo(f"  [OK] Completed {ticker} in {ticker_elapsed:.1f}s")
+        echo(f"  [OK] Completed {ticker} in {ticker_elapsed:.1f}s")
+        return scored_stock, counts, log
+    
+    pending = [i for i, r in enumerate(results) if r is None]
+    workers = max(1, workers or cfg.llm_concurrency)
+    typer.echo(f"[INFO] Scoring {len(pending)} tickers with {min(workers, max(1, len(pending)))} workers")
+    partial_path.parent.mkdir(parents=True, exist_ok=True)
+    fresh = not (resume and partial_path.exists() and len(pending) < len(kept))
+    with partial_path.open("w" if fresh else "a", encoding="utf-8") as partial:
+        if fresh:
+            partial.write(json.dumps({"run_key": run_key}) + "\n")
+            partial.flush()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="score") as pool:
+            futures = {pool.submit(score_one, i): i for i in pending}
+            for future in as_completed(futures):
+                i = futures[future]
+                scored_stock, counts, log = future.result()
+                results[i] = (scored_stock, counts)
+                typer.echo("\n".join(log))
+                partial.write(scored_stock.model_dump_json() + "\n")
+                partial.flush()
+    
+    scored_stocks = [r[0] for r in results]
+    reused_sentiment = sum(1 for _, c in results if c.get("reused_sentiment"))
+    reused_summaries = sum(1 for _, c in results if c.get("reused_summary"))
+    skipped_llm = sum(1 for _, c in results if c.get("skipped"))
+    resumed_count = sum(1 for _, c in results if c.get("resumed"))
     
     # Sort by composite score (descending)
     scored_stocks.sort(key=lambda x: x.composite_score, reverse=True)
@@ -819,18 +1230,221 @@ def score(
         "passed_risk_screens": len(passed),
         "avg_composite_score": statistics.mean([s.composite_score for s in scored_stocks]),
         "top_10_scores": [s.composite_score for s in scored_stocks[:10]],
+        "reused_sentiment": reused_sentiment,
+        "reused_news_summaries": reused_summaries,
+        "llm_skipped": skipped_llm,
+        "resumed": resumed_count,
+        "llm_viable": int(viable.sum()),
+        "composite_weights": weights.model_dump(),
     }
     
     response = ScoredCandidatesResponse(candidates=scored_stocks, stats=stats)
     
     Path(out).parent.mkdir(parents=True, exist_ok=True)
     out.write_text(response.model_dump_json(indent=2), encoding='utf-8')
+    partial_path.unlink(missing_ok=True)
     
     typer.echo(f"Scored {len(scored_stocks)} stocks -> {out}")
-    typer.echo(f"  [OK] {len(passed)} passed risk screens")
+    typer.echo(f"  [OK] {len(passed)} passed risk screens; {skipped_llm} names skipped the LLM")
+    if previous_map:
+        typer.echo(
+            f"  [OK] Reused {reused_sentiment} sentiments and {reused_summaries} news summaries "
+            f"from {previous_file} ({len(scored_stocks) - reused_sentiment - skipped_llm} sentiments recomputed)"
+        )
     typer.echo(f"  [OK] Top 5 scores: {[f'{s.ticker}: {s.composite_score:.2f}' for s in scored_stocks[:5]]}")
 
 
+@app.command()
+def rerank(
+    scored_file: Path = typer.Option(
+        Path("data/scored_candidates.json"), help="Scored candidates JSON to rerank"
+    ),
+    weights_file: Optional[Path] = typer.Option(
+        None, help="Composite weights JSON (defaults to COMPOSITE_WEIGHTS_FILE, then built-in weights)"
+    ),
+    out: Optional[Path] = typer.Option(
+        None, help="Output JSON path (defaults to overwriting --scored-file)"
+    ),
+):
+    """Recompute composite scores and ranks from stored components with a new weight set (no LLM calls)."""
+    cfg = load_config()
+    if weights_file is not None:
+        try:
+            weights = load_weights(weights_file)
+        except Exception as e:
+            typer.echo(f"Failed to load composite weights from {weights_file}: {e}")
+            raise typer.Exit(code=1)
+    else:
+        weights = _load_configured_weights(cfg)
+    
+    if not scored_file.exists():
+        typer.echo(f"Scored candidates file not found: {scored_file}")
+        raise typer.Exit(code=1)
+    try:
+        scored_resp = ScoredCandidatesResponse.model_validate(json.loads(scored_file.read_text(encoding='utf-8')))
+    except Exception as e:
+        typer.echo(f"Failed to parse scored candidates file: {e}")
+        raise typer.Exit(code=1)
+    
+    candidates = scored_resp.candidates
+    if not candidates:
+        typer.echo("No candidates to rerank")
+        raise typer.Exit(code=1)
+    old_rank = {c.ticker: i for i, c in enumerate(sorted(candidates, key=lambda x: x.composite_score, reverse=True))}
+    
+    import time
+    start = time.perf_counter()
+    scores = rescore(candidates, weights)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    for cand, new_score in zip(candidates, scores):
+        cand.composite_score = float(new_score)
+    candidates.sort(key=lambda x: x.composite_score, reverse=True)
+    
+    stats = dict(scored_resp.stats or {})
+    stats.update({
+        "avg_composite_score": statistics.mean([c.composite_score for c in candidates]),
+        "top_10_scores": [c.composite_score for c in candidates[:10]],
+        "composite_weights": weights.model_dump(),
+    })
+    scored_resp.stats = stats
+    
+    out = out or scored_file
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(scored_resp.model_dump_json(indent=2), encoding='utf-8')
+    
+    moved = sum(1 for i, c in enumerate(candidates) if old_rank[c.ticker] != i)
+    typer.echo(f"Reranked {len(candidates)} stocks in {elapsed_ms:.1f} ms -> {out}")
+    typer.echo(f"  [OK] {moved} ranks changed")
+    # Skipped names are ranked on factors alone; under new weights they may belong in the top ranks
+    keep_rank = cfg.prellm_keep_rank or 20
+    unseen = [c.ticker for c in candidates[:keep_rank] if c.sentiment_skipped and c.risk_flags.passed_all_checks]
+    if unseen:
+        typer.echo(
+            f"  [WARN] {len(unseen)} of the top {keep_rank} were ranked without LLM sentiment "
+            f"(skipped when scored): {', '.join(unseen)}; rerun 'score score' to score them fully"
+        )
+    typer.echo(
+        "  [OK] Top 10: "
+        + ", ".join(f"{c.ticker} {c.composite_score:.2f} (was #{old_rank[c.ticker] + 1})" for c in candidates[:10])
+    )
+
+
+@app.command()
+def optimize_weights(
+    runs_dir: Path = typer.Option(Path("data/runs"), help="Runs with scored_candidates.json to learn from"),
+    price_dir: Path = typer.Option(Path("data/prices"), help="Local price store (see 'data prices --runs-dir')"),
+    horizon: int = typer.Option(10, help="Forward return horizon in trading days"),
+    method: str = typer.Option("grid", help="Weight candidates: grid or random"),
+    grid_step: float = typer.Option(0.1, help="Grid step for --method grid"),
+    samples: int = typer.Option(5000, help="Number of weight sets for --method random"),
+    objective_kind: str = typer.Option("ic", "--objective", help="Selection objective: ic (mean rank IC) or top (mean top-N return)"),
+    turnover_penalty: float = typer.Option(0.0, help="Objective penalty per unit of average top-N turnover"),
+    top_n: int = typer.Option(20, help="Portfolio size for top-N return and turnover"),
+    folds: int = typer.Option(4, help="Walk-forward test blocks"),
+    min_train: int = typer.Option(20, help="Runs in the first training window"),
+    seed: int = typer.Option(0, help="Seed for --method random"),
+    out: Path = typer.Option(Path("data/weight_search_report.json"), help="Report JSON path"),
+    write_weights: Optional[Path] = typer.Option(
+        None, help="Write the best full-sample weights here (usable as COMPOSITE_WEIGHTS_FILE)"
+    ),
+):
+    """Search composite weights against realized forward returns, with walk-forward validation."""
+    from .weight_search import (
+        attach_forward_returns,
+        evaluate_weights,
+        load_snapshots,
+        objective,
+        random_weights,
+        summarize,
+        walk_forward,
+        weight_grid,
+    )
+    import time
+    
+    cfg = load_config()
+    current = _load_configured_weights(cfg)
+    if method not in ("grid", "random") or objective_kind not in ("ic", "top"):
+        typer.echo("--method must be grid or random; --objective must be ic or top")
+        raise typer.Exit(code=1)
+    
+    t0 = time.time()
+    snapshots = load_snapshots(runs_dir)
+    typer.echo(f"Loaded {len(snapshots)} daily runs from {runs_dir}")
+    snapshots = attach_forward_returns(snapshots, horizon, price_dir)
+    if len(snapshots) < 2:
+        typer.echo(f"Only {len(snapshots)} runs have {horizon}-day forward returns in {price_dir}")
+        typer.echo("Update the price store first: python main.py data prices --runs-dir data/runs")
+        raise typer.Exit(code=1)
+    run_dates = [s.run_date for s in snapshots]
+    typer.echo(f"  [OK] {len(snapshots)} runs with {horizon}-day forward returns ({run_dates[0]} to {run_dates[-1]})")
+    
+    # Row 0 is the current weight set, the baseline everything is compared with
+    candidates = weight_grid(grid_step) if method == "grid" else random_weights(samples, seed)
+    weights = np.vstack([current.vector(), candidates])
+    typer.echo(f"Evaluating {len(weights)} weight sets...")
+    t1 = time.time()
+    metrics = evaluate_weights(snapshots, weights, top_n=top_n, penalty=current)
+    typer.echo(f"  [OK] Evaluated in {time.time() - t1:.1f}s")
+    
+    everything = slice(0, len(snapshots))
+    scores = objective(metrics, everything, objective_kind, turnover_penalty)
+    best = int(np.nanargmax(scores))
+    folds_result = walk_forward(
+        metrics, weights, run_dates, horizon, folds=folds, min_train=min_train,
+        kind=objective_kind, turnover_penalty=turnover_penalty,
+    )
+    
+    def oos(key: str, which: str) -> Optional[float]:
+        values = [f[which][key] for f in folds_result if f[which][key] is not None]
+        return statistics.mean(values) if values else None
+    
+    best_weights = current.model_copy(update=dict(zip(COMPONENTS, (weights[best] / weights[best].sum()).round(4).tolist())))
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "runs": len(snapshots),
+        "run_range": [run_dates[0].isoformat(), run_dates[-1].isoformat()],
+        "horizon_days": horizon,
+        "method": method,
+        "weight_sets": len(weights),
+        "objective": objective_kind,
+        "turnover_penalty": turnover_penalty,
+        "top_n": top_n,
+        "current_weights": current.model_dump(),
+        "current_in_sample": summarize(metrics, 0, everything),
+        "best_in_sample": {"weights": best_weights.model_dump(), **summarize(metrics, best, everything)},
+        "walk_forward": folds_result,
+        "walk_forward_mean": {
+            "chosen": {k: oos(k, "test") for k in ("rank_ic", "top_return", "turnover")},
+            "current": {k: oos(k, "test_baseline") for k in ("rank_ic", "top_return", "turnover")},
+        },
+        "note": (
+            "Forward windows of consecutive daily runs overlap, so per-run metrics are autocorrelated; "
+            f"walk-forward training purges the {horizon} runs before each test block."
+        ),
+    }
+    Path(out).parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    
+    def fmt(m: dict) -> str:
+        parts = []
+        for key, label in (("rank_ic", "IC"), ("top_return", "top-N"), ("turnover", "turnover")):
+            parts.append(f"{label}={m[key]:.4f}" if m.get(key) is not None else f"{label}=N/A")
+        return ", ".join(parts)
+    
+    typer.echo(f"  Current weights (in-sample): {fmt(report['current_in_sample'])}")
+    typer.echo(f"  Best weights (in-sample):    {fmt(report['best_in_sample'])}")
+    typer.echo("    " + ", ".join(f"{k}={getattr(best_weights, k):.2f}" for k in COMPONENTS))
+    if folds_result:
+        typer.echo(f"  Walk-forward ({len(folds_result)} folds) chosen: {fmt(report['walk_forward_mean']['chosen'])}")
+        typer.echo(f"  Walk-forward ({len(folds_result)} folds) current: {fmt(report['walk_forward_mean']['current'])}")
+    else:
+        typer.echo(f"  [WARN] Not enough runs for walk-forward validation (need more than {min_train + horizon}: {min_train} training + {horizon} purged)")
+    if write_weights:
+        save_weights(best_weights, write_weights)
+        typer.echo(f"  [OK] Wrote best weights -> {write_weights}")
+    typer.echo(f"Weight search finished in {time.time() - t0:.1f}s -> {out}")
+
+
 def main():
     app()
 
@@ -0,0 +1,118 @@
+"""Cached ticker -> sector/industry lookup.
+
+Refreshed in bulk from the FMP company screener (one request for the whole US market)
+and stored in data/security_master.json, so classification never needs per-ticker calls.
+"""
+
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Sequence
+
+import requests
+import typer
+
+from .models import Candidate
+
+DEFAULT_MASTER_PATH = Path("data/security_master.json")
+DEFAULT_MAX_AGE_DAYS = 7
+
+# FMP sector names -> the GICS names used by candidates and sector caps
+FMP_TO_GICS_SECTOR = {
+    "Technology": "Information Technology",
+    "Healthcare": "Health Care",
+    "Financial Services": "Financials",
+    "Consumer Cyclical": "Consumer Discretionary",
+    "Consumer Defensive": "Consumer Staples",
+    "Basic Materials": "Materials",
+    "Communication Services": "Communication Services",
+    "Energy": "Energy",
+    "Industrials": "Industrials",
+    "Utilities": "Utilities",
+    "Real Estate": "Real Estate",
+}
+
+
+def fetch_security_master_fmp(api_key: str, limit: int = 10000) -> dict[str, dict]:
+    """Fetch sector/industry for all actively traded US stocks from the FMP screener."""
+    url = "https://financialmodelingprep.com/stable/company-screener"
+    params = {
+        "apikey": api_key,
+        "country": "US",
+        "isActivelyTrading": "true",
+        "isEtf": "false",
+        "isFund": "false",
+        "limit": limit,
+    }
+    response = requests.get(url, params=params, timeout=(5, 60))
+    response.raise_for_status()
+    data = response.json()
+    if not isinstance(data, list):
+        raise ValueError(f"Unexpected screener response: {str(data)[:200]}")
+
+    securities = {}
+    for item in data:
+        symbol = item.get("symbol")
+        if not symbol:
+            continue
+        sector = item.get("sector") or None
+        securities[symbol.upper()] = {
+            "sector": FMP_TO_GICS_SECTOR.get(sector, sector),
+            "industry": item.get("industry") or None,
+        }
+    return securities
+
+
+def refresh_security_master(api_key: str, path: Path = DEFAULT_MASTER_PATH) -> dict[str, dict]:
+    """Download the security master and write it to `path`."""
+    securities = fetch_security_master_fmp(api_key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps({"refreshed_at": datetime.now().isoformat(), "securities": securities}, indent=2),
+        encoding="utf-8",
+    )
+    return securities
+
+
+def load_security_master(
+    path: Path = DEFAULT_MASTER_PATH,
+    fmp_api_key: Optional[str] = None,
+    max_age_days: int = DEFAULT_MAX_AGE_DAYS,
+) -> dict[str, dict]:
+    """Return {ticker: {"sector", "industry"}}, refreshing the cache if stale and a key is available.
+
+    A stale cache is still returned if the refresh fails; an empty dict if there is nothing.
+    """
+    cached: dict[str, dict] = {}
+    refreshed_at = None
+    if path.exists():
+        try:
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            cached = payload.get("securities", {})
+            refreshed_at = datetime.fromisoformat(payload["refreshed_at"])
+        except Exception as e:
+            typer.echo(f"  [WARN] Could not read security master {path}: {e}")
+
+    stale = refreshed_at is None or datetime.now() - refreshed_at > timedelta(days=max_age_days)
+    if stale and fmp_api_key:
+        try:
+            securities = refresh_security_master(fmp_api_key, path)
+            typer.echo(f"  [OK] Refreshed security master: {len(securities)} tickers -> {path}")
+            return securities
+        except Exception as e:
+            typer.echo(f"  [WARN] Security master refresh failed: {e}")
+    return cached
+
+
+def classify_candidates(candidates: Sequence[Candidate], master: dict[str, dict]) -> list[Candidate]:
+    """Candidates with industry (and sector, if missing) filled in from the security master."""
+    out = []
+    for cand in candidates:
+        entry = master.get(cand.ticker.upper()) or {}
+        out.append(cand.model_copy(update={
+            "sector": cand.sector or entry.get("sector"),
+            "industry": cand.industry or entry.get("industry"),
+        }))
+    return out
@@ -7,7 +7,7 @@ from typing import Optional
 import typer
 
 from .config import load_config
-from .openai_client import get_client, chat_json
+from .openai_client import get_client, chat_json, chat_json_stream, deadline_after, is_transient
 from .data_apis import fetch_general_news_fmp
 from .prompts import (
     system_themes,
@@ -15,7 +15,7 @@ from .prompts import (
     system_theme_candidates,
     user_theme_candidates,
 )
-from .models import ThemeResponse, CandidateResponse
+from .models import Candidate, ThemeResponse, CandidateResponse
 
 app = typer.Typer(add_completion=False)
 
@@ -24,9 +24,11 @@ app = typer.Typer(add_completion=False)
 def identify(
     out: Path = typer.Option(Path("data/themes.json"), help="Output JSON path"),
     model: Optional[str] = typer.Option(None, help="OpenAI model override (defaults to cheap_model for efficiency)"),
+    time_budget: float = typer.Option(240.0, help="Stage time budget in seconds (bounds LLM timeouts and retries)"),
 ):
     """Identify major market themes using recent news and market analysis."""
     cfg = load_config()
+    deadline = deadline_after(time_budget)
     # Use cheap model by default (simple identification task)
     chosen_model = model or cfg.cheap_model
 
@@ -44,7 +46,7 @@ def identify(
     system = system_themes()
     user = user_themes(cfg.portfolio_horizon_end, cfg.remaining_days, general_news)
 
-    result = chat_json(client, chosen_model, system, user)
+    result = chat_json(client, chosen_model, system, user, deadline=deadline)
 
     try:
         parsed = ThemeResponse.model_validate(result)
@@ -69,9 +71,12 @@ def generate_candidates(
     ),
     model: Optional[str] = typer.Option(None, help="OpenAI model override (defaults to cheap_model for efficiency)"),
     batch_size: int = typer.Option(3, help="Number of themes to process per batch"),
+    time_budget: float = typer.Option(900.0, help="Stage time budget in seconds shared by all batches"),
+    stream: bool = typer.Option(True, help="Stream LLM responses and keep candidates received before a timeout"),
 ):
     """Generate stock candidates based on identified themes."""
     cfg = load_config()
+    deadline = deadline_after(time_budget)
     # Use cheap model by default (simple generation task)
     chosen_model = model or cfg.cheap_model
 
@@ -111,7 +116,40 @@ def generate_candidates(
         )
 
         # Theme candidate generation can take longer due to multiple themes
-        result = chat_json(client, chosen_model, system, user, timeout=300.0)  # 5 minute timeout
+        if stream:
+            # Validate each candidate as it arrives; a cut-off batch keeps what was received
+            llm_stream = chat_json_stream(client, chosen_model, system, user, "candidates", timeout=300.0, deadline=deadline)
+            batch_candidates = []
+            try:
+                for item in llm_stream:
+                    try:
+                        batch_candidates.append(Candidate.model_validate(item))
+                    except Exception as e:
+                        typer.echo(f"  [WARN] Skipping invalid candidate {item.get('ticker')}: {e}")
+            except Exception as e:
+                # Deadline or an API error that survived the retries: keep the earlier batches
+                if not is_transient(e):
+                    raise
+                typer.echo(f"  [WARN] Batch {batch_num} failed ({type(e).__name__}: {e}); skipping remaining batches")
+                all_candidates.extend(batch_candidates)
+                break
+            all_candidates.extend(batch_candidates)
+            if llm_stream.complete:
+                typer.echo(f"  Generated {len(batch_candidates)} candidates from batch {batch_num}")
+            else:
+                typer.echo(
+                    f"  [WARN] Batch {batch_num} cut off ({llm_stream.error}); "
+                    f"kept {len(batch_candidates)} candidates received"
+                )
+            continue
+
+        try:
+            result = chat_json(client, chosen_model, system, user, timeout=300.0, deadline=deadline)  # 5 minute timeout
+        except Exception as e:
+            if not is_transient(e):
+                raise
+            typer.echo(f"  [WARN] Batch {batch_num} failed ({type(e).__name__}: {e}); skipping remaining batches")
+            break
 
         try:
             parsed = CandidateResponse.model_validate(result)
@@ -0,0 +1,157 @@
+"""Trade sizing from one consistent price snapshot.
+
+All tickers in the old and new portfolios are priced together (one batched FMP quote call,
+then a batched yfinance download, the local price store and finally the run's scored
+prices for anything still missing), so sells and buys use prices from the same moment.
+Lots are sized to track the target weights as closely as possible without spending more
+than the notional; the leftover is reported as residual cash.
+"""
+
+from __future__ import annotations
+
+import heapq
+import math
+from datetime import datetime
+from pathlib import Path
+from typing import NamedTuple, Optional, Sequence
+
+import typer
+
+from .data_apis import fetch_quotes_fmp_batch
+from .price_store import DEFAULT_PRICE_DIR, read_bars
+
+# Decimal places kept for fractional-share quantities
+FRACTIONAL_DECIMALS = 6
+
+
+class PriceSnapshot(NamedTuple):
+    prices: dict[str, float]
+    sources: dict[str, str]  # "fmp", "yfinance", "price_store" or "scored"
+    taken_at: datetime
+
+
+def _yfinance_last_prices(tickers: Sequence[str]) -> dict[str, float]:
+    import yfinance as yf
+
+    data = yf.download(list(tickers), period="5d", progress=False, auto_adjust=False, group_by="column")
+    closes = data["Close"]
+    if len(tickers) == 1 and not hasattr(closes, "columns"):
+        closes = closes.to_frame(tickers[0])
+    prices = {}
+    for ticker in tickers:
+        if ticker in closes:
+            series = closes[ticker].dropna()
+            if len(series):
+                prices[ticker] = float(series.iloc[-1])
+    return prices
+
+
+def take_price_snapshot(
+    tickers: Sequence[str],
+    fmp_api_key: Optional[str] = None,
+    fallback_prices: Optional[dict[str, float]] = None,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+    live: bool = True,
+) -> PriceSnapshot:
+    """Prices for every ticker, each source queried once for all names it still lacks."""
+    tickers = list(dict.fromkeys(tickers))
+    prices: dict[str, float] = {}
+    sources: dict[str, str] = {}
+
+    def take(found: dict[str, float], source: str) -> None:
+        for ticker, price in found.items():
+            if ticker in tickers and ticker not in prices and price and price > 0:
+                prices[ticker] = price
+                sources[ticker] = source
+
+    if live and fmp_api_key:
+        try:
+            take(fetch_quotes_fmp_batch(tickers, fmp_api_key), "fmp")
+        except Exception as e:
+            typer.echo(f"  [WARN] Batched FMP quotes failed: {e}")
+    missing = [t for t in tickers if t not in prices]
+    if live and missing:
+        try:
+            take(_yfinance_last_prices(missing), "yfinance")
+        except Exception as e:
+            typer.echo(f"  [WARN] Batched yfinance prices failed: {e}")
+    for ticker in [t for t in tickers if t not in prices]:
+        bars = read_bars(ticker, price_dir)
+        if bars:
+            take({ticker: bars[-1][1]}, "price_store")
+    take(fallback_prices or {}, "scored")
+    return PriceSnapshot(prices, sources, datetime.now())
+
+
+def size_lots(
+    weights: dict[str, float],
+    prices: dict[str, float],
+    notional: float,
+    fractional: bool = False,
+) -> dict[str, float]:
+    """{ticker: quantity} closest to the target weights (least squares in dollars) within `notional`.
+
+    Whole shares: start from the floor of each target, then keep buying the single share that
+    most reduces the squared dollar shortfall while cash allows. Fractional: quantities are
+    rounded down to FRACTIONAL_DECIMALS places. Names without a price get nothing.
+    """
+    total = sum(w for t, w in weights.items() if prices.get(t)) or 1.0
+    targets = {t: w / total * notional for t, w in weights.items() if prices.get(t) and w > 0}
+    if fractional:
+        scale = 10 ** FRACTIONAL_DECIMALS
+        return {t: math.floor(dollars / prices[t] * scale) / scale for t, dollars in targets.items()}
+
+    qty = {t: math.floor(dollars / prices[t]) for t, dollars in targets.items()}
+    cash = notional - sum(q * prices[t] for t, q in qty.items())
+
+    def gain(ticker: str) -> float:
+        # Reduction in squared shortfall from one more share: s^2 - (s - p)^2
+        shortfall = targets[ticker] - qty[ticker] * prices[ticker]
+        return prices[ticker] * (2 * shortfall - prices[ticker])
+
+    heap = [(-gain(t), t) for t in targets]
+    heapq.heapify(heap)
+    while heap:
+        neg_gain, ticker = heapq.heappop(heap)
+        if -neg_gain <= 0:
+            break
+        if prices[ticker] > cash + 1e-9:
+            continue  # Can't afford this one; cheaper names may still fit
+        qty[ticker] += 1
+        cash -= prices[ticker]
+        heapq.heappush(heap, (-gain(ticker), ticker))
+    return {t: q for t, q in qty.items() if q > 0}
+
+
+def lot_report(
+    weights: dict[str, float],
+    quantities: dict[str, float],
+    prices: dict[str, float],
+    notional: float,
+) -> dict:
+    """Residual cash and tracking of the sized lots against the target weights."""
+    total = sum(weights.values()) or 1.0
+    invested = sum(q * prices[t] for t, q in quantities.items())
+    rows = []
+    squared = 0.0
+    for ticker, weight in sorted(weights.items(), key=lambda x: x[1], reverse=True):
+        actual = quantities.get(ticker, 0) * prices.get(ticker, 0.0) / notional
+        target = weight / total
+        squared += (actual - target) ** 2
+        rows.append({
+            "ticker": ticker,
+            "target_weight": round(target, 6),
+            "actual_weight": round(actual, 6),
+            "quantity": quantities.get(ticker, 0),
+            "price": prices.get(ticker),
+        })
+    return {
+        "notional": notional,
+        "invested": round(invested, 2),
+        "residual_cash": round(notional - invested, 2),
+        "residual_cash_pct": round((notional - invested) / notional, 6) if notional else 0.0,
+        "tracking_error": round(math.sqrt(squared), 6),
+        "max_weight_deviation": round(max((abs(r["actual_weight"] - r["target_weight"]) for r in rows), default=0.0), 6),
+        "unpriced": sorted(t for t in weights if not prices.get(t)),
+        "holdings": rows,
+    }
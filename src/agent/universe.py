@@ -7,9 +7,10 @@ from typing import Optional
 import typer
 
 from .config import load_config
-from .openai_client import get_client, chat_json
+from .openai_client import get_client, chat_json, deadline_after
 from .prompts import system_universe, user_universe
 from .models import CandidateResponse
+from .security_master import classify_candidates, load_security_master
 
 app = typer.Typer(add_completion=False)
 
@@ -19,8 +20,10 @@ def generate(
     out: Path = typer.Option(Path("data/candidates.json"), help="Output JSON path"),
     count: Optional[int] = typer.Option(None, help="Candidate count override"),
     model: Optional[str] = typer.Option(None, help="OpenAI model override (defaults to cheap_model for efficiency)"),
+    time_budget: float = typer.Option(240.0, help="Stage time budget in seconds (bounds LLM timeouts and retries)"),
 ):
     cfg = load_config()
+    deadline = deadline_after(time_budget)
     target_count = count or cfg.candidate_count
     # Use cheap model by default (simple generation task)
     chosen_model = model or cfg.cheap_model
@@ -38,7 +41,7 @@ def generate(
         liquidity_dollar_min=cfg.min_avg_dollar_volume,
     )
 
-    result = chat_json(client, chosen_model, system, user)
+    result = chat_json(client, chosen_model, system, user, deadline=deadline)
 
     try:
         parsed = CandidateResponse.model_validate(result)
@@ -96,13 +99,7 @@ def merge(
         for cand in regular_resp.candidates:
             # If this regular candidate doesn't have a theme but there's a theme candidate with the same ticker, assign the theme
             if cand.theme is None and cand.ticker in theme_map:
-                from .models import Candidate
-                cand = Candidate(
-                    ticker=cand.ticker,
-                    sector=cand.sector,
-                    rationale=cand.rationale,
-                    theme=theme_map[cand.ticker]
-                )
+                cand = cand.model_copy(update={"theme": theme_map[cand.ticker]})
             seen[cand.ticker] = cand
         # Theme candidates override regular ones if duplicate
         for cand in themes_resp.candidates:
@@ -114,17 +111,18 @@ def merge(
         for cand in regular_resp.candidates:
             if cand.theme is None and cand.ticker in theme_map:
                 # Create a new candidate with the theme assigned
-                from .models import Candidate
-                cand = Candidate(
-                    ticker=cand.ticker,
-                    sector=cand.sector,
-                    rationale=cand.rationale,
-                    theme=theme_map[cand.ticker]
-                )
+                cand = cand.model_copy(update={"theme": theme_map[cand.ticker]})
             regular_with_themes.append(cand)
         merged_candidates = list(regular_with_themes)
         merged_candidates.extend(themes_resp.candidates)
 
+    # Industries (and missing sectors) from the cached security master
+    master = load_security_master(fmp_api_key=load_config().fmp_api_key)
+    merged_candidates = classify_candidates(merged_candidates, master)
+    classified = sum(1 for c in merged_candidates if c.industry)
+    if master:
+        typer.echo(f"  [INFO] Industries for {classified}/{len(merged_candidates)} candidates from the security master")
+    
     merged = CandidateResponse(candidates=merged_candidates)
     Path(out).parent.mkdir(parents=True, exist_ok=True)
     out.write_text(merged.model_dump_json(indent=2), encoding='utf-8')
@@ -0,0 +1,222 @@
+"""Composite-weight search against realized forward returns.
+
+Joins the scored_candidates.json of past runs with forward returns from the local price
+store, scores many weight vectors at once (rank IC, top-N return, top-N turnover) and
+validates the chosen weights walk-forward: pick on past runs, measure on the next ones.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+from datetime import date, datetime
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import numpy as np
+
+from .composite import COMPONENTS, CompositeWeights, component_arrays, composite_matrix
+from .models import ScoredCandidatesResponse
+from .price_store import DEFAULT_PRICE_DIR, load_price_matrix
+
+# Runs with fewer names that have both a score and a forward return are skipped
+MIN_NAMES_PER_RUN = 20
+
+
+class RunSnapshot(NamedTuple):
+    run_date: date
+    tickers: list[str]
+    components: np.ndarray  # (N, len(COMPONENTS))
+    upside: np.ndarray      # (N,)
+    passed: np.ndarray      # (N,)
+    forward: Optional[np.ndarray] = None  # (N,) forward returns, NaN where unknown
+
+
+def load_snapshots(runs_dir: Path) -> list[RunSnapshot]:
+    """Stored score components of each run (the last run of each day), oldest first."""
+    by_day: dict[date, Path] = {}
+    for scored_file in sorted(runs_dir.glob("*/scored_candidates.json")):
+        try:
+            run_dt = datetime.strptime(scored_file.parent.name, "%Y-%m-%d_%H-%M-%S")
+        except ValueError:
+            continue
+        by_day[run_dt.date()] = scored_file  # Sorted, so later runs of a day win
+
+    snapshots = []
+    for run_date, scored_file in sorted(by_day.items()):
+        try:
+            resp = ScoredCandidatesResponse.model_validate(json.loads(scored_file.read_text(encoding="utf-8")))
+        except Exception:
+            continue
+        if not resp.candidates:
+            continue
+        components, upside, passed = component_arrays(resp.candidates)
+        snapshots.append(RunSnapshot(run_date, [c.ticker for c in resp.candidates], components, upside, passed))
+    return snapshots
+
+
+def attach_forward_returns(
+    snapshots: list[RunSnapshot],
+    horizon: int,
+    price_dir: Path = DEFAULT_PRICE_DIR,
+) -> list[RunSnapshot]:
+    """Add `horizon`-trading-day forward returns (close on/after the run date to `horizon` days later).
+
+    Runs whose horizon extends past the stored prices, or with too few priced names, are dropped.
+    """
+    if not snapshots:
+        return []
+    universe = sorted({t for s in snapshots for t in s.tickers})
+    col = {t: j for j, t in enumerate(universe)}
+    dates, closes = load_price_matrix(universe, start=snapshots[0].run_date, price_dir=price_dir)
+    if not dates:
+        return []
+    day_numbers = np.array([d.toordinal() for d in dates])
+
+    out = []
+    for snap in snapshots:
+        entry = int(np.searchsorted(day_numbers, snap.run_date.toordinal(), side="left"))
+        exit_ = entry + horizon
+        if exit_ >= len(dates):
+            continue
+        cols = np.array([col[t] for t in snap.tickers])
+        with np.errstate(invalid="ignore", divide="ignore"):
+            forward = closes[exit_, cols] / closes[entry, cols] - 1.0
+        if np.isfinite(forward[snap.passed & np.isfinite(snap.components[:, -1])]).sum() >= MIN_NAMES_PER_RUN:
+            out.append(snap._replace(forward=forward))
+    return out
+
+
+def weight_grid(step: float = 0.1) -> np.ndarray:
+    """All weight vectors over COMPONENTS in multiples of `step` that sum to 1 (stars and bars)."""
+    units = int(round(1.0 / step))
+    k = len(COMPONENTS)
+    rows = []
+    for bars in itertools.combinations(range(units + k - 1), k - 1):
+        edges = (-1,) + bars + (units + k - 1,)
+        rows.append([edges[i + 1] - edges[i] - 1 for i in range(k)])
+    return np.array(rows, dtype=float) / units
+
+
+def random_weights(n: int, seed: int = 0) -> np.ndarray:
+    """n weight vectors drawn uniformly from the simplex."""
+    return np.random.default_rng(seed).dirichlet(np.ones(len(COMPONENTS)), size=n)
+
+
+def _row_ranks(x: np.ndarray) -> np.ndarray:
+    return x.argsort(axis=-1).argsort(axis=-1).astype(float)
+
+
+def evaluate_weights(
+    snapshots: list[RunSnapshot],
+    weights: np.ndarray,
+    top_n: int = 20,
+    penalty: Optional[CompositeWeights] = None,
+    chunk: int = 4096,
+) -> dict[str, np.ndarray]:
+    """Per-run metrics for K weight sets over snapshots with forward returns.
+
+    Returns {"ic": (K, T), "top": (K, T), "turnover": (K, T)} where turnover[:, 0] is NaN and
+    turnover[:, t] is the share of the top-N replaced between runs t-1 and t. The price-target
+    penalty settings come from `penalty` (defaults to CompositeWeights()).
+    """
+    penalty = penalty or CompositeWeights()
+    k, t_count = len(weights), len(snapshots)
+    universe = {t: j for j, t in enumerate(sorted({t for s in snapshots for t in s.tickers}))}
+    ic = np.full((k, t_count), np.nan)
+    top = np.full((k, t_count), np.nan)
+    turnover = np.full((k, t_count), np.nan)
+
+    for start in range(0, k, chunk):
+        w = weights[start:start + chunk]
+        rows = np.arange(len(w))[:, None]
+        prev_members = None
+        for t, snap in enumerate(snapshots):
+            # Names whose sentiment was skipped (NaN) are left out: their composite was never fully known
+            valid = snap.passed & np.isfinite(snap.forward) & np.isfinite(snap.components[:, -1])
+            n = int(valid.sum())
+            scores = composite_matrix(
+                snap.components[valid], snap.upside[valid], snap.passed[valid], w,
+                penalty.pt_penalty_scale, penalty.pt_penalty_cap,
+            )
+            returns = snap.forward[valid]
+
+            # Spearman rank IC: Pearson correlation of ranks, all weight sets at once
+            rs = _row_ranks(scores)
+            rr = _row_ranks(returns)
+            rs -= rs.mean(axis=1, keepdims=True)
+            rr -= rr.mean()
+            denom = np.sqrt((rs ** 2).sum(axis=1) * (rr ** 2).sum())
+            with np.errstate(invalid="ignore", divide="ignore"):
+                ic[start:start + len(w), t] = (rs @ rr) / denom
+
+            m = min(top_n, n)
+            picks = np.argpartition(-scores, m - 1, axis=1)[:, :m]
+            top[start:start + len(w), t] = returns[picks].mean(axis=1)
+
+            members = np.zeros((len(w), len(universe)), dtype=bool)
+            tickers = np.array([universe[x] for x in np.array(snap.tickers)[valid]])
+            members[rows, tickers[picks]] = True
+            if prev_members is not None:
+                turnover[start:start + len(w), t] = 1.0 - (members & prev_members).sum(axis=1) / m
+            prev_members = members
+
+    return {"ic": ic, "top": top, "turnover": turnover}
+
+
+def objective(
+    metrics: dict[str, np.ndarray],
+    runs: slice,
+    kind: str = "ic",
+    turnover_penalty: float = 0.0,
+) -> np.ndarray:
+    """(K,) objective over a range of runs: mean rank IC, or mean top-N return; minus a turnover penalty."""
+    base = metrics["ic"] if kind == "ic" else metrics["top"]
+    value = np.nanmean(base[:, runs], axis=1)
+    if turnover_penalty:
+        value = value - turnover_penalty * np.nan_to_num(np.nanmean(metrics["turnover"][:, runs], axis=1))
+    return value
+
+
+def summarize(metrics: dict[str, np.ndarray], k: int, runs: slice) -> dict[str, float]:
+    def mean(name: str) -> Optional[float]:
+        values = metrics[name][k, runs]
+        values = values[np.isfinite(values)]
+        return float(values.mean()) if len(values) else None
+    return {"rank_ic": mean("ic"), "top_return": mean("top"), "turnover": mean("turnover")}
+
+
+def walk_forward(
+    metrics: dict[str, np.ndarray],
+    weights: np.ndarray,
+    run_dates: list[date],
+    horizon: int,
+    folds: int = 4,
+    min_train: int = 20,
+    kind: str = "ic",
+    turnover_penalty: float = 0.0,
+    baseline: int = 0,
+) -> list[dict]:
+    """Expanding-window validation: choose weights on runs [0, s - horizon), measure on the next block.
+
+    The `horizon` runs before each test block are purged from training: their forward returns
+    are realized inside the test block.
+    """
+    t_count = len(run_dates)
+    first_test = min_train + horizon
+    if t_count <= first_test:
+        return []
+    results = []
+    for block in np.array_split(np.arange(first_test, t_count), min(folds, t_count - first_test)):
+        s = int(block[0])
+        train, test = slice(0, s - horizon), slice(s, int(block[-1]) + 1)
+        best = int(np.nanargmax(objective(metrics, train, kind, turnover_penalty)))
+        results.append({
+            "train_runs": [run_dates[0].isoformat(), run_dates[train.stop - 1].isoformat()],
+            "purged_runs": horizon,
+            "test_runs": [run_dates[test.start].isoformat(), run_dates[test.stop - 1].isoformat()],
+            "chosen_weights": dict(zip(COMPONENTS, weights[best].round(4).tolist())),
+            "test": summarize(metrics, best, test),
+            "test_baseline": summarize(metrics, baseline, test),
+        })
+    return results